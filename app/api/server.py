@@ -1,19 +1,26 @@
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 import os
 import time
 from datetime import date
 
 from fastapi import FastAPI, Request, APIRouter, HTTPException
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
 from pydantic import BaseModel
 from prometheus_client import Counter, Histogram, make_asgi_app
 
 from ..graph.graph import build_graph
 from ..graph.state import GraphState
 from ..db import init_db
-from ..utils.pii import scrub_in, scrub_out, redact
-from ..utils.memory import get_slots, update_slots, get_history, append_history
-from ..utils.lang import detect_lang
+from ..utils.pii import StreamScrubber, scrub_out, redact
+from ..utils.session_store import get_session_store
+from ..utils.write_behind import WRITE_BEHIND_ON, get_writer
+from ..utils.lang import adetect_lang
+from ..llm.ollama_client import aclose as close_llm_client
+from ..utils.deadline import budget, deadline
+from ..rag.retriever import aclose as close_retriever, warm_up as warm_up_retriever
+from ..graph.intents import warm_up as warm_up_intents
+from ..graph.cities import warm_up as warm_up_cities
 from app.repositories.booking_repo_pg import (
     create_hold_pg,
     confirm_hold_pg,
@@ -57,8 +64,10 @@ def _parse_iso_date(s: str, field: str) -> date:
         )
 
 
+# Booking handlers use the sync SQLAlchemy engine, so they are plain `def`:
+# FastAPI runs them in its threadpool instead of on the event loop.
 @router.post("/booking/hold")
-async def create_booking_hold(req: BookingRequest):
+def create_booking_hold(req: BookingRequest):
     try:
         check_in = _parse_iso_date(req.check_in, "check_in")
         check_out = _parse_iso_date(req.check_out, "check_out")
@@ -82,7 +91,7 @@ async def create_booking_hold(req: BookingRequest):
 
 
 @router.get("/booking/{booking_id}")
-async def get_booking(booking_id: str):
+def get_booking(booking_id: str):
     row = get_booking_pg(booking_id)
     if not row:
         raise HTTPException(status_code=404, detail="Not found")
@@ -90,20 +99,20 @@ async def get_booking(booking_id: str):
 
 
 @router.post("/booking/confirm")
-async def confirm_booking(req: ConfirmRequest):
+def confirm_booking(req: ConfirmRequest):
     # no payment_ref in your schema; confirm by id only
     confirm_hold_pg(req.booking_id)
     return {"booking_id": req.booking_id, "status": "confirmed"}
 
 
 @router.post("/booking/cancel")
-async def cancel_booking(req: CancelRequest):
+def cancel_booking(req: CancelRequest):
     cancel_booking_pg(req.booking_id)
     return {"booking_id": req.booking_id, "status": "cancelled"}
 
 
 @router.post("/booking/expire")
-async def expire_holds(request: Request):
+def expire_holds(request: Request):
     if request.headers.get("X-Admin-Key") != os.getenv("ADMIN_KEY"):
         raise HTTPException(status_code=403, detail="forbidden")
     return {"released": expire_holds_pg()}
@@ -127,10 +136,30 @@ class ChatResponse(BaseModel):
     citations: Optional[Any] = None
 
 
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    # LLM/retrieval calls made for this request share one time budget;
+    # streaming bodies run in a task that inherits it. Clients may ask for a
+    # shorter budget with X-Request-Timeout (seconds), never a longer one.
+    with deadline(budget(request.headers.get("X-Request-Timeout"))):
+        return await call_next(request)
+
+
 @app.on_event("startup")
 def on_start() -> None:
     # Initialize DB connections, etc.
     init_db()
+    # load the embedder and resolve the FAQ collection once, not per request
+    warm_up_retriever()
+    warm_up_intents()
+    warm_up_cities()
+
+
+@app.on_event("shutdown")
+async def on_stop() -> None:
+    await get_writer().aclose()
+    await close_llm_client()
+    await close_retriever()
 
 
 def _session_id(req: Request) -> str:
@@ -142,113 +171,216 @@ def _session_id(req: Request) -> str:
     )
 
 
+SAFETY_REPLY = "For your safety, please don't share emails or card numbers. I can help with rooms or hotel policies."
+EMPTY_REPLY = "Sorry, I couldn’t find an answer."
+
+
+def _count_request() -> None:
+    if OBS_ON:
+        try:
+            requests_total.inc()
+        except Exception:
+            pass
+
+
+def _observe_latency(start: float) -> None:
+    if OBS_ON:
+        try:
+            latency_seconds.observe(time.perf_counter() - start)
+        except Exception:
+            pass
+
+
+async def _prepare_state(raw_text: str, session_id: str) -> Optional[GraphState]:
+    """Load memory, run guardrails and seed the graph state (None = PII block)."""
+    # 1) Load remembered slots
+    if MEMORY_ON:
+        if WRITE_BEHIND_ON:
+            # includes this worker's not-yet-flushed writes for the session
+            slots, history = await get_writer().aload(session_id)
+        else:
+            slots, history = await get_session_store().aload(session_id)
+    else:
+        slots, history = {}, []
+    # 2) Guardrails: detect & redact PII
+    # one scan gives both the masked text and the verdict
+    redacted_text, has_pii = redact(raw_text)
+
+    if has_pii and GUARDRAILS_ON:
+        return None
+
+    # 3) Build initial state (seed with memory)
+    # short/ambiguous messages keep the session's language
+    detected_lang = await adetect_lang(raw_text, sticky=slots.get("lang"))
+    return GraphState(
+        user_text=redacted_text,
+        user_text_raw=raw_text,
+        lang=detected_lang,
+        history=history,
+        city=slots.get("city"),
+        budget=slots.get("budget"),
+        occupancy=slots.get("occupancy"),
+        check_in=slots.get("check_in"),
+        check_out=slots.get("check_out"),
+    )
+
+
+def _collect(out: Any, state: GraphState) -> dict:
+    """Extract reply fields + updated slots from the graph output."""
+    if isinstance(out, dict):
+        get = out.get
+    else:
+
+        def get(key: str, default: Any = None) -> Any:
+            return getattr(out, key, default)
+
+    return {
+        "reply": get("reply") or get("answer") or get("text") or "",
+        "intent": get("intent"),
+        "results": get("results"),
+        "citations": get("citations"),
+        "city": get("city") or state.city,
+        "budget": get("budget") or state.budget,
+        "occupancy": get("occupancy") or state.occupancy,
+        "check_in": get("check_in") or state.check_in,
+        "check_out": get("check_out") or state.check_out,
+        "lang": get("lang") or state.lang,
+    }
+
+
+async def _save_turn(session_id: str, raw_text: str, fields: dict) -> None:
+    if not MEMORY_ON:
+        return
+    # slots + both turns in one round trip
+    slot_names = ("city", "budget", "occupancy", "check_in", "check_out", "lang")
+    slots = {k: fields[k] for k in slot_names}
+    messages = [
+        {"role": "user", "content": raw_text},
+        {"role": "assistant", "content": fields["reply"]},
+    ]
+    if WRITE_BEHIND_ON:
+        # off the response path; flushed (coalesced per session) by write_behind
+        get_writer().enqueue(session_id, slots, messages)
+        return
+    try:
+        await get_session_store().asave(session_id, slots, messages)
+    except Exception as e:
+        print(f"[memory] could not save turn for {session_id}: {e}")
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest, request: Request) -> ChatResponse:
     start = time.perf_counter()
     try:
-        if OBS_ON:
-            try:
-                requests_total.inc()
-            except Exception:
-                pass
+        _count_request()
 
         session_id = _session_id(request)
-
-        # 1) Load remembered slots
-        slots = get_slots(session_id) if MEMORY_ON else {}
-        history = get_history(session_id) if MEMORY_ON else []
-        # 2) Guardrails: detect & redact PII
         raw_text = req.message
-        redacted_text, has_pii = (scrub_in(raw_text), False)
-        if GUARDRAILS_ON:
-            redacted_text, has_pii = redact(raw_text)
-
-        if has_pii:
+        state = await _prepare_state(raw_text, session_id)
+        if state is None:
             return ChatResponse(
-                reply="For your safety, please don't share emails or card numbers. I can help with rooms or hotel policies.",
+                reply=SAFETY_REPLY,
                 intent="safety_block",
                 results={},
                 citations=[],
             )
 
-        # 3) Build initial state (seed with memory)
-        detected_lang = detect_lang(req.message)
-        state = GraphState(
-            user_text=redacted_text,
-            user_text_raw=raw_text,
-            lang=detected_lang,
-            history=history,
-            city=slots.get("city"),
-            budget=slots.get("budget"),
-            occupancy=slots.get("occupancy"),
-            check_in=slots.get("check_in"),
-            check_out=slots.get("check_out"),
-        )
-
         # 4) Run graph
-        out = workflow.invoke(state)
+        out = await workflow.ainvoke(state)
 
         # 5) Extract fields + collect updated slots
-        if isinstance(out, dict):
-            reply = out.get("reply") or out.get("answer") or out.get("text") or ""
-            intent = out.get("intent")
-            results = out.get("results")
-            citations = out.get("citations")
-            city = out.get("city") or state.city
-            budget = out.get("budget") or state.budget
-            occupancy = out.get("occupancy") or state.occupancy
-            check_in = out.get("check_in") or state.check_in
-            check_out = out.get("check_out") or state.check_out
-        else:
-            reply = (
-                getattr(out, "reply", None)
-                or getattr(out, "answer", None)
-                or getattr(out, "text", "")
-                or ""
-            )
-            intent = getattr(out, "intent", None)
-            results = getattr(out, "results", None)
-            citations = getattr(out, "citations", None)
-            city = getattr(out, "city", None) or state.city
-            budget = getattr(out, "budget", None) or state.budget
-            occupancy = getattr(out, "occupancy", None) or state.occupancy
-            check_in = getattr(out, "check_in", None) or state.check_in
-            check_out = getattr(out, "check_out", None) or state.check_out
+        fields = _collect(out, state)
 
         # 6) Scrub outbound text
         if GUARDRAILS_ON:
-            reply = scrub_out(reply)
+            fields["reply"] = scrub_out(fields["reply"])
 
         # 7) Save memory
-        if MEMORY_ON:
-            update_slots(
-                session_id,
-                city=city,
-                budget=budget,
-                occupancy=occupancy,
-                check_in=check_in,
-                check_out=check_out,
-            )
-
-            # Append both user and assistant turns
-            try:
-                append_history(session_id, "user", raw_text)
-                append_history(session_id, "assistant", reply)
-            except Exception:
-                pass
+        await _save_turn(session_id, raw_text, fields)
 
         return ChatResponse(
-            reply=reply or "Sorry, I couldn’t find an answer.",
-            intent=intent,
-            results=results or [],
-            citations=(citations or [])[:3],
+            reply=fields["reply"] or EMPTY_REPLY,
+            intent=fields["intent"],
+            results=fields["results"] or [],
+            citations=(fields["citations"] or [])[:3],
         )
     finally:
-        if OBS_ON:
-            try:
-                latency_seconds.observe(time.perf_counter() - start)
-            except Exception:
-                pass
+        _observe_latency(start)
+
+
+# --- Streaming (Server-Sent Events) ---
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request) -> StreamingResponse:
+    """
+    Same pipeline as /chat, emitted as SSE:
+      event: token    {"text": ...}   LLM deltas (FAQ answers)
+      event: message  {"text": ...}   whole reply (rooms / fallback / safety)
+      event: done     {"intent", "results", "citations"}
+    """
+    session_id = _session_id(request)
+    raw_text = req.message
+
+    async def events() -> AsyncIterator[str]:
+        start = time.perf_counter()
+        try:
+            _count_request()
+            state = await _prepare_state(raw_text, session_id)
+            if state is None:
+                yield _sse("message", {"text": SAFETY_REPLY})
+                yield _sse(
+                    "done", {"intent": "safety_block", "results": {}, "citations": []}
+                )
+                return
+
+            state.stream = True
+            scrubber = StreamScrubber() if GUARDRAILS_ON else None
+            streamed = False
+            out: Any = None
+            async for mode, chunk in workflow.astream(
+                state, stream_mode=["custom", "values"]
+            ):
+                if mode == "values":
+                    out = chunk
+                    continue
+                tok = chunk.get("token") if isinstance(chunk, dict) else None
+                if not tok:
+                    continue
+                streamed = True
+                safe = scrubber.feed(tok) if scrubber else tok
+                if safe:
+                    yield _sse("token", {"text": safe})
+
+            if scrubber and (rest := scrubber.flush()):
+                yield _sse("token", {"text": rest})
+
+            fields = _collect(out or {}, state)
+            if GUARDRAILS_ON:
+                fields["reply"] = scrub_out(fields["reply"])
+            if not streamed:
+                yield _sse("message", {"text": fields["reply"] or EMPTY_REPLY})
+            # before "done": clients hang up on it, which stops this generator
+            await _save_turn(session_id, raw_text, fields)
+            yield _sse(
+                "done",
+                {
+                    "intent": fields["intent"],
+                    "results": fields["results"] or [],
+                    "citations": (fields["citations"] or [])[:3],
+                },
+            )
+        finally:
+            _observe_latency(start)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # 8) Expose /metrics for Prometheus (only if enabled)
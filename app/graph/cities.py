@@ -0,0 +1,235 @@
+# app/graph/cities.py
+"""
+City gazetteer: resolves the city a guest typed to the canonical name stored
+in `hotels.city`, so the rooms query and the FAQ vector filter can both use
+exact (indexed) equality instead of ILIKE '%city%' / title-casing.
+
+The distinct hotel cities, plus the exonyms in CITY_ALIASES for the cities we
+actually have ("Roma"/"Rom" -> "Rome"), go into a character trie keyed by the
+folded name (casefold, accents stripped, "-"/"'" as spaces). Lookup is an
+exact walk first, then a bounded edit-distance search over the trie
+(CITY_FUZZY_MAX edits, fewer for short names), dropping trailing words
+("Rome city centre" -> "Rome") before giving up.
+
+Built at startup (`warm_up`) and rebuilt when the "hotels" data version moves
+(scripts/load_to_postgres.py bumps it after loading hotels).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter
+
+from ..utils.data_version import aget_version, get_version
+
+CITY_GAZETTEER_ON = os.getenv("CITY_GAZETTEER", "on") == "on"
+CITY_FUZZY_MAX = int(os.getenv("CITY_FUZZY_MAX", "2"))
+# after a failed load (DB down) wait this long before trying again
+CITY_RETRY_SECONDS = float(os.getenv("CITY_RETRY_SECONDS", "30"))
+
+city_resolutions = Counter(
+    "city_resolve_total", "City slot resolutions by outcome", ["result"]
+)
+
+# exonyms and local names; each group is one city, matched against the
+# hotels table by any of its names
+CITY_ALIASES: List[List[str]] = [
+    ["Rome", "Roma", "Rom"],
+    ["Milan", "Milano", "Mailand", "Milán"],
+    ["Florence", "Firenze", "Florenz", "Florencia"],
+    ["Venice", "Venezia", "Venedig", "Venise", "Venecia"],
+    ["Naples", "Napoli", "Neapel", "Nápoles"],
+    ["Turin", "Torino", "Turín"],
+    ["Genoa", "Genova", "Genua", "Gênes", "Génova"],
+    ["Paris", "Parigi", "París"],
+    ["Nice", "Nizza", "Niza"],
+    ["Marseille", "Marseilles", "Marsiglia", "Marsella"],
+    ["Lyon", "Lione", "Lyons"],
+    ["London", "Londra", "Londres"],
+    ["Edinburgh", "Edimburgo", "Édimbourg"],
+    ["Munich", "München", "Monaco di Baviera", "Múnich"],
+    ["Cologne", "Köln", "Colonia"],
+    ["Vienna", "Wien", "Vienne", "Viena"],
+    ["Zurich", "Zürich", "Zurigo", "Zúrich"],
+    ["Geneva", "Genève", "Genf", "Ginevra", "Ginebra"],
+    ["Brussels", "Bruxelles", "Brüssel", "Bruselas"],
+    ["Lisbon", "Lisboa", "Lisbona", "Lissabon", "Lisbonne"],
+    ["Seville", "Sevilla", "Siviglia", "Séville"],
+    ["Barcelona", "Barcellona", "Barcelone"],
+    ["Prague", "Praha", "Prag", "Praga"],
+    ["Warsaw", "Warszawa", "Varsavia", "Warschau", "Varsovie", "Varsovia"],
+    ["Copenhagen", "København", "Copenaghen", "Kopenhagen", "Copenhague"],
+    ["Athens", "Athína", "Atene", "Athen", "Athènes", "Atenas"],
+    ["Moscow", "Moskva", "Mosca", "Moskau", "Moscou", "Moscú"],
+    ["New York", "New York City", "NYC", "Nueva York"],
+]
+
+
+def fold(name: str) -> str:
+    """Case-, accent- and punctuation-insensitive form used as the trie key."""
+    s = unicodedata.normalize("NFKD", name.casefold())
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    s = s.replace("-", " ").replace("'", " ").replace(".", " ")
+    return " ".join(s.split())
+
+
+class _Node:
+    __slots__ = ("kids", "city")
+
+    def __init__(self) -> None:
+        self.kids: Dict[str, "_Node"] = {}
+        self.city: Optional[str] = None  # canonical name ending here
+
+
+class Gazetteer:
+    """Trie of folded city names and aliases -> canonical hotels.city value."""
+
+    def __init__(self, cities: Iterable[str], aliases=CITY_ALIASES) -> None:
+        self.root = _Node()
+        self.cities = sorted({c.strip() for c in cities if c and c.strip()})
+        canonical = {fold(c): c for c in self.cities}
+        for c in self.cities:
+            self._add(fold(c), c)
+        for group in aliases:
+            hit = next(
+                (canonical[fold(n)] for n in group if fold(n) in canonical), None
+            )
+            if hit is None:
+                continue
+            for n in group:
+                if fold(n) not in canonical:  # a real hotel city always wins
+                    self._add(fold(n), hit)
+
+    def _add(self, key: str, city: str) -> None:
+        node = self.root
+        for ch in key:
+            node = node.kids.setdefault(ch, _Node())
+        node.city = city
+
+    def exact(self, key: str) -> Optional[str]:
+        node = self.root
+        for ch in key:
+            node = node.kids.get(ch)
+            if node is None:
+                return None
+        return node.city
+
+    def fuzzy(self, key: str, max_edits: int) -> Optional[str]:
+        """
+        Closest name within `max_edits` (edits and adjacent transpositions);
+        None if there is none or two cities tie.
+        """
+        n = len(key)
+        best: Tuple[int, Optional[str]] = (max_edits + 1, None)
+        tie = False
+        # (node, its DP row, the parent's row, the char leading to node)
+        stack = [(self.root, list(range(n + 1)), None, "")]
+        while stack:
+            node, prev, prev2, last = stack.pop()
+            for ch, kid in node.kids.items():
+                row = [prev[0] + 1]
+                for j in range(1, n + 1):
+                    d = min(
+                        row[j - 1] + 1, prev[j] + 1, prev[j - 1] + (key[j - 1] != ch)
+                    )
+                    if prev2 and j > 1 and key[j - 1] == last and key[j - 2] == ch:
+                        d = min(d, prev2[j - 2] + 1)
+                    row.append(d)
+                if kid.city is not None and row[n] <= best[0]:
+                    if row[n] < best[0]:
+                        best, tie = (row[n], kid.city), False
+                    elif kid.city != best[1]:
+                        tie = True
+                # every extension costs at least min(row) edits
+                if min(row) <= best[0]:
+                    stack.append((kid, row, prev, ch))
+        return None if tie else best[1]
+
+    def resolve(self, text: str) -> Tuple[Optional[str], str]:
+        """(canonical city, "exact"/"fuzzy"/"miss") for a city phrase."""
+        words = fold(text).split()
+        prefixes = [" ".join(words[:k]) for k in range(len(words), 0, -1)]
+        for key in prefixes:
+            city = self.exact(key)
+            if city is not None:
+                return city, "exact"
+        for key in prefixes:
+            # short names get fewer edits: "Rom"/"Roma" are aliases, not typos
+            edits = min(CITY_FUZZY_MAX, 0 if len(key) < 4 else 1 if len(key) < 8 else 2)
+            city = self.fuzzy(key, edits) if edits else None
+            if city is not None:
+                return city, "fuzzy"
+        return None, "miss"
+
+
+_current: Optional[Gazetteer] = None
+_version: Optional[str] = None
+_lock: Optional[asyncio.Lock] = None
+_failed_at = float("-inf")
+
+
+def _load() -> Gazetteer:
+    from sqlmodel import select
+
+    from ..db import get_session
+    from ..models import Hotel
+
+    with get_session() as session:
+        return Gazetteer(session.exec(select(Hotel.city).distinct()).all())
+
+
+def warm_up() -> None:
+    """Build the gazetteer at startup instead of on the first rooms request."""
+    global _current, _version
+    if not CITY_GAZETTEER_ON:
+        return
+    try:
+        _version = get_version("hotels")
+        _current = _load()
+        print(f"[cities] {len(_current.cities)} cities loaded")
+    except Exception as e:
+        print(f"[cities] warm-up failed: {e}")
+
+
+async def agazetteer() -> Optional[Gazetteer]:
+    """The current gazetteer, rebuilt off the event loop when hotels reload."""
+    global _current, _version, _lock, _failed_at
+    if not CITY_GAZETTEER_ON:
+        return None
+    v = await aget_version("hotels")
+    if _current is not None and v == _version:
+        return _current
+    if time.monotonic() - _failed_at < CITY_RETRY_SECONDS:
+        return _current
+    if _lock is None:
+        _lock = asyncio.Lock()
+    async with _lock:
+        if _current is None or v != _version:
+            try:
+                _current = await asyncio.to_thread(_load)
+                _version = v
+            except Exception as e:
+                _failed_at = time.monotonic()
+                print(f"[cities] reload failed, keeping previous: {e}")
+    return _current
+
+
+def canonical_city(text: Optional[str]) -> Optional[str]:
+    """Canonical name from the already-loaded gazetteer (no I/O), else None."""
+    if not text or _current is None:
+        return None
+    return _current.resolve(text)[0]
+
+
+async def aresolve_city(text: str) -> Optional[str]:
+    g = await agazetteer()
+    if g is None:
+        return None
+    city, result = g.resolve(text)
+    city_resolutions.labels(result).inc()
+    return city
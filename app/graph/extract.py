@@ -0,0 +1,547 @@
+# app/graph/extract.py
+"""
+Single-pass intent + slot extraction for router_node.
+
+The message is tokenized once (words, numbers, dates, punctuation) into
+parallel lists. A token-level Aho-Corasick automaton built from the keyword
+tables of the message language plus English tags keyword phrases ("check in",
+"moins de", ...) with their categories; it only runs from tokens that can
+start a phrase. A small state machine then visits the tagged tokens, numbers,
+dates and punctuation once - plain words are skipped - and fills:
+
+- intent      "rooms" / "faq" keywords (rooms wins)
+- city        words after a city marker ("in", "à", "en", ...); a marker
+              that is also a stop word ("a") needs a capitalized city
+              ("a Roma", not "il y a des chambres")
+- budget      number after a price marker ("under", "sotto", "moins de", ...)
+- occupancy   number after "for"/"per"/... or before "people"/"persone"/...
+- check_in / check_out   ISO dates ("12/05", "2025-05-12", "12 May",
+              "May 12th"), assigned by "from"/"to"/"check-in"/"dal"/"al"/...
+              markers, else in order of appearance
+
+Keyword tables are per language (TABLES below); ROUTER_KEYWORDS_PATH can
+point to a JSON file {lang: {category: [phrases]}} whose entries are added
+to them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+ROUTER_KEYWORDS_PATH = os.getenv("ROUTER_KEYWORDS_PATH", "")
+# "12/05" = 12 May (on) or December 5 (off)
+DATE_DAY_FIRST = os.getenv("DATE_DAY_FIRST", "on") == "on"
+CITY_MAX_WORDS = 4
+# a marker ("under", "for", ...) stays pending for this many tokens
+MARKER_REACH = 2
+
+# categories: rooms/faq = intent keywords; city/price/occ/in/out = markers for
+# the following value; guests/nights = units after a number; stop = words
+# that end a city name unless capitalized ("in the centre", "The Hague")
+TABLES: Dict[str, Dict[str, List[str]]] = {
+    "en": {
+        "rooms": [
+            "room", "rooms", "book", "price", "rate", "option", "deal",
+            "availability",
+        ],
+        "faq": [
+            "check-in", "check in", "checkin", "check-out", "check out",
+            "checkout", "policy", "refund", "breakfast", "parking", "wifi", "faq",
+            "question",
+        ],
+        "city": ["in", "at"],
+        "price": [
+            "under", "below", "max", "maximum", "less than", "up to", "budget",
+        ],
+        "occ": ["for"],
+        "guests": ["people", "persons", "guests", "adults", "person", "guest"],
+        "nights": ["night", "nights"],
+        "in": ["from", "check-in", "check in", "checkin", "arriving", "since"],
+        "out": [
+            "to", "until", "till", "check-out", "check out", "checkout",
+            "leaving",
+        ],
+        "stop": [
+            "the", "a", "an", "my", "your", "our", "this", "that", "with", "on",
+            "by", "near", "and", "or", "please", "center", "centre", "today",
+            "tonight", "tomorrow", "next", "weekend",
+        ],
+    },
+    "it": {
+        "rooms": [
+            "camera", "camere", "stanza", "stanze", "prenotare", "prenotazione",
+            "prezzo", "prezzi", "tariffa", "disponibilità",
+        ],
+        "faq": [
+            "colazione", "parcheggio", "rimborso", "politica", "cancellazione",
+            "orari", "orario", "animali",
+        ],
+        "city": ["a", "in"],
+        "price": ["sotto", "massimo", "meno di", "fino a", "entro"],
+        "occ": ["per"],
+        "guests": ["persone", "persona", "ospiti", "adulti"],
+        "nights": ["notte", "notti"],
+        "in": ["dal", "dall", "arrivo"],
+        "out": ["al", "all", "fino al", "partenza"],
+        "stop": ["il", "lo", "la", "i", "gli", "le", "con", "e", "vicino"],
+    },
+    "fr": {
+        "rooms": [
+            "chambre", "chambres", "réserver", "réservation", "prix", "tarif",
+            "disponibilité",
+        ],
+        "faq": [
+            "petit-déjeuner", "parking", "remboursement", "politique",
+            "annulation", "horaires", "animaux",
+        ],
+        "city": ["à", "a", "en"],
+        "price": ["moins de", "maximum", "max", "jusqu à"],
+        "occ": ["pour"],
+        "guests": ["personnes", "personne", "adultes", "invités"],
+        "nights": ["nuit", "nuits"],
+        "in": ["du", "arrivée"],
+        "out": ["au", "jusqu au", "départ"],
+        "stop": ["le", "la", "les", "l", "un", "une", "avec", "et", "près"],
+    },
+    "es": {
+        "rooms": [
+            "habitación", "habitaciones", "reservar", "reserva", "precio",
+            "tarifa", "disponibilidad",
+        ],
+        "faq": [
+            "desayuno", "aparcamiento", "estacionamiento", "reembolso",
+            "política", "cancelación", "horario", "mascotas",
+        ],
+        "city": ["en"],
+        "price": ["menos de", "máximo", "hasta"],
+        "occ": ["para"],
+        "guests": ["personas", "persona", "adultos", "huéspedes"],
+        "nights": ["noche", "noches"],
+        "in": ["del", "desde", "llegada"],
+        "out": ["al", "hasta", "salida"],
+        "stop": ["el", "la", "los", "las", "un", "una", "con", "y", "cerca"],
+    },
+    "de": {
+        "rooms": [
+            "zimmer", "buchen", "buchung", "preis", "preise", "verfügbarkeit",
+        ],
+        "faq": [
+            "frühstück", "parkplatz", "rückerstattung", "stornierung",
+            "richtlinie", "haustiere",
+        ],
+        "city": ["in"],
+        "price": ["unter", "maximal", "höchstens", "bis zu"],
+        "occ": ["für"],
+        "guests": ["personen", "person", "erwachsene", "gäste"],
+        "nights": ["nacht", "nächte"],
+        "in": ["vom", "ab", "anreise"],
+        "out": ["bis", "bis zum", "abreise"],
+        "stop": ["der", "die", "das", "ein", "eine", "mit", "und", "nähe"],
+    },
+}  # fmt: skip
+
+MONTHS: Dict[str, List[str]] = {
+    "en": "january february march april may june july august september october "
+    "november december".split(),
+    "it": "gennaio febbraio marzo aprile maggio giugno luglio agosto settembre "
+    "ottobre novembre dicembre".split(),
+    "fr": "janvier février mars avril mai juin juillet août septembre octobre "
+    "novembre décembre".split(),
+    "es": "enero febrero marzo abril mayo junio julio agosto septiembre octubre "
+    "noviembre diciembre".split(),
+    "de": "januar februar märz april mai juni juli august september oktober "
+    "november dezember".split(),
+}
+_ORDINALS = {"st", "nd", "rd", "th", "er", "º", "°"}
+_DATE_JOINERS = {"of", "de", "di"}  # "5th of May", "5 de mayo"
+_MARKERS = frozenset(("price", "occ", "in", "out", "city"))
+_NO_CATS: frozenset = frozenset()
+
+
+def load_tables(path: str) -> None:
+    """Add the phrases of a {lang: {category: [phrases]}} JSON file to TABLES."""
+    with open(path, "r", encoding="utf-8") as f:
+        extra = json.load(f)
+    for lang, cats in extra.items():
+        for cat, phrases in cats.items():
+            TABLES.setdefault(lang, {}).setdefault(cat, []).extend(phrases)
+    automaton.cache_clear()
+
+
+# words first (most tokens); dates before plain numbers
+_TOKEN = re.compile(
+    r"[^\W\d_]+(?:-[^\W\d_]+)*"
+    r"|\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{1,2}\.\d{1,2}\.\d{2,4}"
+    r"|\d+(?:[.,]\d+)?"
+    r"|[,.!?;:]"
+)
+_PUNCT = frozenset(",.!?;:")
+
+
+def _kind(tok: str) -> str:
+    """Kind of a _TOKEN match that is not a word: punct, date or num."""
+    if tok in _PUNCT:
+        return "punct"
+    # the only digit tokens with "/", "-" or two dots are dates
+    return "date" if "/" in tok or "-" in tok or tok.count(".") == 2 else "num"
+
+
+class _Node:
+    __slots__ = ("goto", "fail", "out")
+
+    def __init__(self) -> None:
+        self.goto: Dict[str, "_Node"] = {}
+        self.fail: Optional["_Node"] = None
+        # longest phrase ending here: (length in tokens, categories, month)
+        self.out: Optional[Tuple[int, frozenset, int]] = None
+
+
+class Automaton:
+    """Aho-Corasick over tokens; a node's `out` is the longest phrase ending there."""
+
+    def __init__(self, phrases: Dict[Tuple[str, ...], Tuple[frozenset, int]]) -> None:
+        self.root = _Node()
+        for toks, (cats, month) in phrases.items():
+            node = self.root
+            for t in toks:
+                node = node.goto.setdefault(t, _Node())
+            node.out = (len(toks), cats, month)
+        # BFS for failure links; inherit the fail target's output when none
+        queue = []
+        for child in self.root.goto.values():
+            child.fail = self.root
+            queue.append(child)
+        for node in queue:
+            for t, child in node.goto.items():
+                f = node.fail
+                while f is not self.root and t not in f.goto:
+                    f = f.fail
+                child.fail = f.goto.get(t, self.root)
+                if child.out is None:
+                    child.out = child.fail.out
+                queue.append(child)
+
+
+@lru_cache(maxsize=16)
+def automaton(langs: Tuple[str, ...]) -> Automaton:
+    phrases: Dict[Tuple[str, ...], Tuple[frozenset, int]] = {}
+
+    def add(phrase: str, cat: str, month: int = 0) -> None:
+        key = tuple(_tokens(phrase))
+        if not key or _PUNCT.intersection(key):
+            return  # phrases never span punctuation
+        cats, m = phrases.get(key, (_NO_CATS, 0))
+        phrases[key] = (cats | {cat}, month or m)  # frozensets: shared by tokens
+
+    for lang in langs:
+        for cat, words in TABLES.get(lang, {}).items():
+            for w in words:
+                add(w, cat)
+        for i, name in enumerate(MONTHS.get(lang, []), start=1):
+            add(name, "month", i)
+            if lang == "en" and len(name) > 3:
+                add(name[:3], "month", i)
+    return Automaton(phrases)
+
+
+def _tokens(text: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(text)]
+
+
+@dataclass
+class Extraction:
+    intent: str = "unknown"
+    city: Optional[str] = None
+    budget: Optional[float] = None
+    occupancy: Optional[int] = None
+    check_in: Optional[str] = None
+    check_out: Optional[str] = None
+
+
+class _Tokens:
+    """A message's tokens as parallel lists: most are plain words, left untouched."""
+
+    __slots__ = ("raw", "low", "kind", "cats", "month", "visit")
+
+    def __init__(self, raw: List[str]) -> None:
+        self.raw = raw
+        # tokens never contain spaces: one lower() for the whole message
+        self.low = " ".join(raw).lower().split(" ") if raw else []
+        self.kind = ["word"] * len(raw)
+        # categories of the keyword phrase starting here; _INNER = rest of one
+        self.cats: List[frozenset] = [_NO_CATS] * len(raw)
+        self.month = [0] * len(raw)
+        # positions the walker acts on, in order
+        self.visit: List[int] = []
+
+
+_INNER = frozenset(("kw",))
+# categories the walker acts on; the rest are only looked up from a neighbour
+_ACTIVE = _MARKERS | {"rooms", "faq", "month"}
+
+
+def _tag(text: str, auto: Automaton) -> _Tokens:
+    """Tokenize and tag keyword phrases in one pass."""
+    toks = _Tokens(_TOKEN.findall(text))
+    low, kind, cats, month = toks.low, toks.kind, toks.cats, toks.month
+    # words start with a letter: only digits and punctuation sort below "A"
+    other = [
+        i for i, t in enumerate(low) if t < "A" or (t > "\x7f" and t[0].isdecimal())
+    ]
+    for i in other:
+        kind[i] = _kind(low[i])
+    # Aho-Corasick, started only where a phrase can start (the automaton sits
+    # at the root in between); phrases never span punctuation
+    root, tagged, end = auto.root, [], -1
+    for start in [i for i, t in enumerate(low) if t in root.goto]:
+        if start <= end:
+            continue  # already walked
+        node, i = root, start
+        while i < len(low):
+            t = low[i]
+            if t in _PUNCT:
+                break
+            nxt = node.goto.get(t)
+            while nxt is None and node is not root:
+                node = node.fail
+                nxt = node.goto.get(t)
+            if nxt is None:
+                break
+            node = nxt
+            if node.out is not None:
+                n, phrase, m = node.out
+                first = i - n + 1
+                if n > 1:
+                    cats[first + 1 : i + 1] = [_INNER] * (n - 1)
+                    month[first + 1 : i + 1] = [0] * (n - 1)
+                cats[first], month[first] = phrase, m
+                tagged.append(first)
+            if not node.goto and node.fail is root:
+                break  # back at the root with the next token
+            i += 1
+        end = i
+    active = [i for i in tagged if not _ACTIVE.isdisjoint(cats[i])]
+    toks.visit = sorted(set(active + other)) if active else other
+    return toks
+
+
+def _number(raw: str) -> Optional[float]:
+    try:
+        return float(raw.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _iso(year: Optional[int], month: int, day: int, today: date) -> Optional[str]:
+    if year is not None and year < 100:
+        year += 2000
+    try:
+        d = date(year or today.year, month, day)
+        if year is None and d < today:
+            d = date(today.year + 1, month, day)  # "12 May" means the next one
+    except ValueError:
+        return None
+    return d.isoformat()
+
+
+def _numeric_date(raw: str, today: date) -> Optional[str]:
+    parts = [int(p) for p in re.split(r"[-/.]", raw) if p]
+    if parts[0] > 31:  # ISO
+        return _iso(parts[0], parts[1], parts[2], today) if len(parts) == 3 else None
+    day, month = parts[0], parts[1]
+    if not DATE_DAY_FIRST:
+        day, month = month, day
+    return _iso(parts[2] if len(parts) > 2 else None, month, day, today)
+
+
+class _Walker:
+    """State machine over tagged tokens (one left-to-right pass)."""
+
+    def __init__(self, toks: _Tokens, today: Optional[date]) -> None:
+        self.toks, self._today = toks, today
+        self.raw, self.low, self.kind = toks.raw, toks.low, toks.kind
+        self.cats, self.month = toks.cats, toks.month
+        self.out = Extraction()
+        self.pending: frozenset = _NO_CATS
+        self.pending_at = -1
+        self.rooms = 0
+        self.faq: List[int] = []  # positions of faq keywords
+        self.dates: List[Tuple[Optional[str], str]] = []  # (role, iso)
+        self.loose_day: Optional[Tuple[Optional[str], int]] = None
+        self.city_open = True  # the first city phrase wins
+
+    @property
+    def today(self) -> date:
+        if self._today is None:
+            self._today = date.today()  # only messages with dates need it
+        return self._today
+
+    def _skip_ordinal(self, i: int) -> int:
+        # "12th", "1er", German "12."
+        if i < len(self.raw) and (self.low[i] in _ORDINALS or self.raw[i] == "."):
+            return i + 1
+        return i
+
+    def _month_at(self, i: int) -> int:
+        """Index of the month token at i (after an optional "of"/"de"), else -1."""
+        if i < len(self.low) and self.low[i] in _DATE_JOINERS:
+            i += 1
+        return i if i < len(self.cats) and "month" in self.cats[i] else -1
+
+    def _role(self) -> Optional[str]:
+        for role in ("in", "out"):
+            if role in self.pending:
+                return role
+        return None
+
+    def _add_date(self, iso: Optional[str], month: int = 0) -> None:
+        if iso is None:
+            return
+        role = self._role()
+        if self.loose_day is not None and month:
+            # "from 12 to 14 May": the first day takes the later month
+            lrole, day = self.loose_day
+            first = _iso(None, month, day, self.today)
+            if first:
+                self.dates.append((lrole, first))
+        self.loose_day = None
+        if role and self.pending_at in self.faq:
+            self.faq.remove(self.pending_at)  # "check-in 12/05" is not a question
+        self.dates.append((role, iso))
+        self.pending = _NO_CATS
+
+    def _year_after(self, i: int) -> Tuple[Optional[int], int]:
+        if i < len(self.raw) and self.kind[i] == "num" and len(self.raw[i]) == 4:
+            return int(self.raw[i]), i + 1
+        return None, i
+
+    def _city_word(self, i: int) -> bool:
+        if self.kind[i] != "word":
+            return False
+        # other keywords always end a city; stop words only in lower case
+        cats = self.cats[i]
+        return not cats or (cats == {"stop"} and self.raw[i][:1].isupper())
+
+    def _set_city(self, city: List[int]) -> None:
+        while city and "stop" in self.cats[city[-1]]:
+            city.pop()  # "in Rome The" -> "Rome"
+        if city:
+            self.out.city = " ".join(self.raw[i] for i in city)
+
+    def _city(self, i: int) -> int:
+        """Read the city words from i on; index of the first token after them."""
+        city: List[int] = []
+        while i < len(self.kind) and len(city) < CITY_MAX_WORDS and self._city_word(i):
+            city.append(i)
+            i += 1
+        if city:
+            self._set_city(city)
+            self.city_open = False
+        self.pending = _NO_CATS
+        return i
+
+    def run(self) -> Extraction:
+        cats, nxt = self.cats, 0
+        # only keywords, markers, numbers, dates and punctuation need a look;
+        # city words are read ahead from their marker
+        for i in self.toks.visit:
+            if i < nxt:
+                continue  # read as part of a date or a city
+            if i - self.pending_at > MARKER_REACH:
+                self.pending = _NO_CATS
+            if "rooms" in cats[i]:
+                self.rooms += 1
+            if "faq" in cats[i]:
+                self.faq.append(i)
+            nxt = self._token(i)
+        return self._finish()
+
+    def _token(self, i: int) -> int:
+        kinds, cats = self.kind, self.cats[i]
+        if kinds[i] == "date":
+            self._add_date(_numeric_date(self.raw[i], self.today))
+        elif kinds[i] == "num":
+            return self._num(i)
+        elif "month" in cats:
+            # "May 12th (2025)"
+            j = self._skip_ordinal(i + 1)
+            if j < len(kinds) and kinds[j] == "num" and self.raw[j].isdecimal():
+                year, k = self._year_after(self._skip_ordinal(j + 1))
+                month = self.month[i]
+                self._add_date(_iso(year, month, int(self.raw[j]), self.today), month)
+                return k
+        elif kinds[i] == "punct":
+            self.pending = _NO_CATS
+        elif cats & _MARKERS:
+            self.pending, self.pending_at = cats & _MARKERS, i
+            if self.pending == {"city"}:
+                if i + 1 == len(kinds) or not self._city_word(i + 1):
+                    self.pending = _NO_CATS
+                elif "stop" in cats and not self.raw[i + 1][:1].isupper():
+                    # "a" is a marker in "a Roma" but a plain word in
+                    # "il y a des chambres" / "camera a due letti"
+                    self.pending = _NO_CATS
+            if "city" in self.pending and self.city_open:
+                return self._city(i + 1)
+        return i + 1
+
+    def _num(self, i: int) -> int:
+        value = _number(self.raw[i])
+        if value is None:
+            return i + 1
+        j = self._skip_ordinal(i + 1)
+        nxt = self.cats[j] if j < len(self.cats) else None
+        m = self._month_at(j)
+        if m >= 0 and value.is_integer():
+            # "12 May (2025)", "5 de mayo"
+            year, k = self._year_after(m + 1)
+            month = self.month[m]
+            self._add_date(_iso(year, month, int(value), self.today), month)
+            return k
+        if "price" in self.pending:
+            self.out.budget = value
+        elif nxt is not None and "guests" in nxt and value.is_integer():
+            self.out.occupancy = int(value)
+        elif "occ" in self.pending and value.is_integer():
+            if nxt is None or "nights" not in nxt:
+                self.out.occupancy = int(value)
+        elif self._role() and value.is_integer() and 1 <= value <= 31:
+            self.loose_day = (self._role(), int(value))
+        self.pending = _NO_CATS
+        return i + 1
+
+    def _finish(self) -> Extraction:
+        out = self.out
+        if self.rooms:
+            out.intent = "rooms"
+        elif self.faq:
+            out.intent = "faq"
+        ins = [d for r, d in self.dates if r == "in"]
+        outs = [d for r, d in self.dates if r == "out"]
+        rest = [d for r, d in self.dates if r is None]
+        out.check_in = ins[0] if ins else (rest.pop(0) if rest else None)
+        out.check_out = outs[0] if outs else (rest.pop(0) if rest else None)
+        if out.check_in and out.check_out and out.check_out <= out.check_in:
+            out.check_out = None
+        return out
+
+
+def extract(
+    text: str, lang: Optional[str] = None, today: Optional[date] = None
+) -> Extraction:
+    """Intent and slots of one message (see module docstring)."""
+    langs = ("en",) if not lang or lang == "en" or lang not in TABLES else ("en", lang)
+    toks = _tag(text or "", automaton(langs))
+    if not toks.visit:
+        return Extraction()  # no keyword, number or date: nothing to read
+    return _Walker(toks, today).run()
+
+
+if ROUTER_KEYWORDS_PATH:
+    load_tables(ROUTER_KEYWORDS_PATH)
@@ -1,6 +1,8 @@
 # app/graph/graph.py
 from __future__ import annotations
 
+import asyncio
+
 from langgraph.graph import StateGraph, END
 from .state import GraphState
 from .router import router_node
@@ -8,8 +10,8 @@ from .nodes_rooms import rooms_node
 from .nodes_faq import faq_node
 from .nodes_fallback import fallback_node
 from .nodes_generator import generator_node  # NEW
-from app.utils.memory import get_slots, update_slots
-from app.utils.lang import detect_lang  # language detection
+from app.utils.session_store import get_session_store
+from app.utils.lang import adetect_lang  # language detection
 
 _GRAPH = None
 
@@ -54,8 +56,13 @@ def build_graph():
 
     # terminal wiring
     sg.add_edge("rooms", END)
-    # FAQ now flows into generator (to localize / fill answer), then END
-    sg.add_edge("faq", "generator")
+    # FAQ flows into generator (to localize / fill answer), then END;
+    # answer-cache hits already carry the localized reply
+    sg.add_conditional_edges(
+        "faq",
+        lambda s: "cached" if s.cached else "generate",
+        {"cached": END, "generate": "generator"},
+    )
     sg.add_edge("generator", END)
     sg.add_edge("fallback", END)
 
@@ -72,12 +79,13 @@ def _get_graph():
     return _GRAPH
 
 
-def run_chat_with_memory(session_id: str, message: str):
-    # 1) hydrate slots from Redis
-    slots = get_slots(session_id)
+async def arun_chat_with_memory(session_id: str, message: str):
+    # 1) hydrate slots from the session store (SESSION_STORE)
+    store = get_session_store()
+    slots = await store.aget_slots(session_id)
 
-    # 2) detect language
-    lang = detect_lang(message)
+    # 2) detect language (short/ambiguous messages keep the session's one)
+    lang = await adetect_lang(message, sticky=slots.get("lang"))
 
     # 3) build initial state
     #    Provide both user_utterance and user_text for backward compatibility
@@ -85,20 +93,29 @@ def run_chat_with_memory(session_id: str, message: str):
         user_utterance=message,
         user_text=message,
         lang=lang,
-        **slots,
+        **{k: v for k, v in slots.items() if k != "lang"},
     )
 
-    # 4) run the compiled graph
+    # 4) run the compiled graph (nodes are async, so use ainvoke)
     graph = _get_graph()
-    out = graph.invoke(state)
+    out = GraphState(**await graph.ainvoke(state))
 
     # 5) persist updated slots
-    update_slots(
+    await store.asave(
         session_id,
-        city=out.city,
-        budget=out.budget,
-        occupancy=out.occupancy,
-        check_in=out.check_in,
-        check_out=out.check_out,
+        {
+            "city": out.city,
+            "budget": out.budget,
+            "occupancy": out.occupancy,
+            "check_in": out.check_in,
+            "check_out": out.check_out,
+            "lang": out.lang,
+        },
+        [],
     )
     return out
+
+
+def run_chat_with_memory(session_id: str, message: str):
+    """Sync entry point for scripts; do not call from inside an event loop."""
+    return asyncio.run(arun_chat_with_memory(session_id, message))
@@ -0,0 +1,126 @@
+# app/graph/intents.py
+"""
+Embedding-based intent classification and the turn's shared query vector.
+
+The query is embedded once per turn (`aquery_vec`, stored in
+GraphState.query_vec) and reused by the router, the answer cache and the FAQ
+retriever. The router compares it against one centroid per intent - the
+normalized mean of the multilingual example utterances below, embedded once
+per process - with a single matrix-vector product, so non-English questions
+that miss the keyword rules still route correctly.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from prometheus_client import Counter
+
+from .state import GraphState
+from ..rag.embed import aembed_query, aembed_texts, embed_texts, model_name
+
+INTENT_CENTROIDS_ON = os.getenv("INTENT_CENTROIDS", "on") == "on"
+# below this cosine similarity to the best centroid the intent stays unknown
+INTENT_MIN_SIM = float(os.getenv("INTENT_MIN_SIM", "0.35"))
+
+intent_routes = Counter(
+    "router_intent_total", "Router decisions by source and intent", ["source", "intent"]
+)
+
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "rooms": [
+        "show me rooms in Rome",
+        "I need a room for two people under 150",
+        "book a double room in Paris",
+        "any hotel availability this weekend?",
+        "camere disponibili a Milano per 2 persone",
+        "vorrei prenotare una camera doppia",
+        "une chambre pour deux personnes à Paris",
+        "je voudrais réserver une chambre",
+        "habitación doble en Madrid para dos",
+        "quiero reservar una habitación",
+        "ein Zimmer für zwei Personen in Berlin",
+        "ich möchte ein Zimmer buchen",
+    ],
+    "faq": [
+        "what time is check-in?",
+        "is breakfast included?",
+        "what is the cancellation policy?",
+        "are pets allowed?",
+        "Quali sono gli orari di check-in?",
+        "la colazione è inclusa?",
+        "avete il parcheggio?",
+        "à quelle heure est le check-out ?",
+        "le petit-déjeuner est-il inclus ?",
+        "¿a qué hora es la salida?",
+        "¿se admiten mascotas?",
+        "wann ist der Check-out?",
+        "gibt es WLAN im Hotel?",
+    ],
+    "unknown": [
+        "hello",
+        "ciao, come stai?",
+        "bonjour",
+        "hola",
+        "thanks a lot",
+        "who are you?",
+        "tell me a joke",
+        "what's the weather like tomorrow?",
+    ],
+}
+
+# model name -> (intent labels, centroid matrix [n_intents, dim])
+_CENTROIDS: Dict[str, Tuple[List[str], np.ndarray]] = {}
+
+
+def _build(vectors: List[List[float]]) -> Tuple[List[str], np.ndarray]:
+    labels, rows, i = [], [], 0
+    for intent, examples in INTENT_EXAMPLES.items():
+        c = np.asarray(vectors[i : i + len(examples)], dtype=np.float32).mean(axis=0)
+        rows.append(c / (np.linalg.norm(c) or 1.0))
+        labels.append(intent)
+        i += len(examples)
+    return labels, np.stack(rows)
+
+
+def _examples() -> List[str]:
+    return [e for examples in INTENT_EXAMPLES.values() for e in examples]
+
+
+def warm_up() -> None:
+    """Embed the intent examples at startup instead of on the first request."""
+    if not INTENT_CENTROIDS_ON or model_name() in _CENTROIDS:
+        return
+    try:
+        _CENTROIDS[model_name()] = _build(embed_texts(_examples()))
+    except Exception as e:
+        print(f"[intents] warm-up failed: {e}")
+
+
+async def acentroids() -> Tuple[List[str], np.ndarray]:
+    name = model_name()
+    if name not in _CENTROIDS:
+        _CENTROIDS[name] = _build(await aembed_texts(_examples()))
+    return _CENTROIDS[name]
+
+
+def classify(
+    vec: List[float], centroids: Tuple[List[str], np.ndarray]
+) -> Tuple[str, float]:
+    """(intent, similarity) of the nearest centroid; "unknown" below INTENT_MIN_SIM."""
+    labels, m = centroids
+    sims = m @ np.asarray(vec, dtype=np.float32)
+    best = int(np.argmax(sims))
+    score = float(sims[best])
+    return (labels[best] if score >= INTENT_MIN_SIM else "unknown"), score
+
+
+async def aquery_vec(state: GraphState) -> Optional[List[float]]:
+    """The turn's query embedding, computed on first use and kept on the state."""
+    if state.query_vec is None:
+        text = (state.user_text or "").strip()
+        if text:
+            state.query_vec = await aembed_query(text)
+    return state.query_vec
@@ -3,12 +3,15 @@ from __future__ import annotations
 import os
 from typing import Any, Dict, List, Optional
 
+from .intents import aquery_vec
 from .state import GraphState
-from ..rag.retriever import (
-    retrieve,
-)  # expects: retrieve(query: str, topk: int, city: Optional[str] = None)
+from ..rag.answer_cache import ANSWER_CACHE_ON, get_answer_cache
+from ..rag.retriever import aretrieve_tiered
+from ..utils.data_version import aget_version
 
 TOPK = int(os.getenv("TOPK", "5"))
+# below this much time left, skip the cross-encoder rerank
+FAQ_RERANK_MIN_SECONDS = float(os.getenv("FAQ_RERANK_MIN_SECONDS", "1.5"))
 
 
 def _best_answer(hits: List[Dict[str, Any]]) -> str:
@@ -31,7 +34,7 @@ def _get_query(state: GraphState) -> str:
     ).strip()
 
 
-def faq_node(state: GraphState) -> GraphState:
+async def faq_node(state: GraphState) -> GraphState:
     # normalize slots (populates state.city etc.)
     state.normalize()
 
@@ -42,20 +45,38 @@ def faq_node(state: GraphState) -> GraphState:
         return state
 
     city: Optional[str] = getattr(state, "city", None) or None
+    lang: Optional[str] = getattr(state, "lang", None)
+
+    if ANSWER_CACHE_ON:
+        # a paraphrase of an already-answered question skips retrieval + LLM
+        try:
+            vec = await aquery_vec(state)  # usually already set by the router
+            hit = get_answer_cache().get(vec, lang, city, await aget_version("faq"))
+        except Exception:
+            hit = None
+        if hit:
+            state.reply, state.citations = hit
+            state.answer = _best_answer(state.citations)
+            state.cached = True
+            return state
+
+    use_rerank = not state.short_on_time(FAQ_RERANK_MIN_SECONDS)
+    if not use_rerank:
+        state.degrade("skip_rerank")
 
     try:
-        # Try city + language first
-        hits = retrieve(
-            query=q, topk=TOPK, city=city, lang=getattr(state, "lang", None)
+        # city + language, then language only, then no filter - one round trip
+        hits = await aretrieve_tiered(
+            query=q,
+            topk=TOPK,
+            tiers=[
+                {"city": city, "lang": lang},
+                {"city": None, "lang": lang},
+                {"city": None, "lang": None},
+            ],
+            use_rerank=use_rerank,
+            vec=state.query_vec,
         )
-        # Fallback without city if nothing found
-        if not hits:
-            hits = retrieve(
-                query=q, topk=TOPK, city=None, lang=getattr(state, "lang", None)
-            )
-        # Final fallback: no language filter
-        if not hits:
-            hits = retrieve(query=q, topk=TOPK, city=None, lang=None)
     except Exception as e:
         state.citations = []
         state.answer = f"FAQ search failed: {e}"
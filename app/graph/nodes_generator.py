@@ -1,14 +1,30 @@
 from __future__ import annotations
+import os
 from typing import List, Dict, Any
 
+from langgraph.config import get_stream_writer
+from prometheus_client import Counter
+
 from .state import GraphState
-from ..llm.ollama_client import chat
+from ..llm.ollama_client import achat, astream_chat
+from ..llm.prompt import build_messages
+from ..rag.answer_cache import ANSWER_CACHE_ON, get_answer_cache
+from ..rag.embed import aembed_query
+from ..utils.data_version import aget_version
+from ..utils.deadline import DeadlineExceeded
+
+# below this much time left, skip the LLM and answer with the English FAQ text
+GENERATOR_MIN_SECONDS = float(os.getenv("GENERATOR_MIN_SECONDS", "2"))
 
 SYSTEM = (
     "You are Chatbi, a hotel assistant. Keep answers concise and factual. "
     "Follow the user's requested language exactly."
 )
 
+answer_source = Counter(
+    "faq_answer_source_total", "Localized FAQ replies by source", ["source"]
+)
+
 
 def _compose_from_hits(hits: List[Dict[str, Any]]) -> Dict[str, str]:
     if not hits:
@@ -20,16 +36,50 @@ def _compose_from_hits(hits: List[Dict[str, Any]]) -> Dict[str, str]:
     }
 
 
-def generator_node(state: GraphState) -> GraphState:
+def _stored_answer(hits: List[Dict[str, Any]], lang: str) -> str:
+    """The FAQ answer in `lang` if it needs no LLM: the original or a pre-translation."""
+    if not hits:
+        return ""
+    top, lang = hits[0], lang.lower()
+    if lang == ((top.get("meta") or {}).get("lang") or "en").lower():
+        return (top.get("answer") or "").strip()
+    # answer_<lang> from scripts/pretranslate_faqs.py
+    return (top.get(f"answer_{lang}") or "").strip()
+
+
+async def _remember(
+    state: GraphState, user: str, lang: str, hits: List[Dict[str, Any]]
+) -> None:
+    """Keep a grounded reply for paraphrases (see nodes_faq / answer_cache)."""
+    # the turn's vector (graph/intents.py); else served by the embedding cache
+    vec = state.query_vec or await aembed_query(user)
+    get_answer_cache().put(
+        vec, lang, state.city, await aget_version("faq"), state.reply, hits
+    )
+
+
+async def generator_node(state: GraphState) -> GraphState:
     # language from pipeline (e.g., 'it', 'en', 'fr' ...)
     lang = (getattr(state, "lang", None) or "en").strip()
     user = (
         getattr(state, "user_utterance", None) or getattr(state, "user_text", "")
     ).strip()
     hits = getattr(state, "citations", None) or []
-    history = (getattr(state, "history", None) or [])[-6:]  # last ~3 turns
+    history = getattr(state, "history", None) or []  # already safe text
+
+    stored = _stored_answer(hits, lang)
+    if stored:
+        answer_source.labels("stored").inc()
+        state.reply = stored
+        return state
 
     qa = _compose_from_hits(hits)
+    fallback = qa["a"] or state.answer or "Sorry, I couldn’t generate an answer."
+
+    if state.short_on_time(GENERATOR_MIN_SECONDS):
+        state.degrade("skip_translation" if qa["a"] else "skip_llm")
+        state.reply = fallback
+        return state
 
     if qa["a"]:
         # STRICT translate/rewrite of the FAQ answer into the user's language
@@ -51,20 +101,34 @@ def generator_node(state: GraphState) -> GraphState:
             "Respond ONLY in the target language, 1–2 sentences."
         )
 
-    msgs = [{"role": "system", "content": SYSTEM}]
-    # add short history (already safe text)
-    for m in history:
-        if m.get("role") in ("user", "assistant") and m.get("content"):
-            msgs.append({"role": m["role"], "content": m["content"]})
-    msgs.append({"role": "user", "content": prompt})
+    # translating a given answer needs no conversation context
+    if qa["a"]:
+        msgs = build_messages(SYSTEM, prompt, kind="translate")
+    else:
+        msgs = build_messages(SYSTEM, prompt, history, kind="fallback")
 
+    parts: List[str] = []
     try:
-        out = chat(msgs)
+        if getattr(state, "stream", False):
+            # forward tokens to /chat/stream as they arrive; keep the full text too
+            write = get_stream_writer()
+            async for tok in astream_chat(msgs):
+                parts.append(tok)
+                write({"token": tok})
+            out = "".join(parts)
+        else:
+            out = await achat(msgs)
         # Always set the outward reply to the localized text
         state.reply = (out or "").strip() or getattr(state, "reply", "")
+        answer_source.labels("llm").inc()
+        if ANSWER_CACHE_ON and hits and out:
+            await _remember(state, user, lang, hits)
+    except DeadlineExceeded:
+        # ran out of budget mid-call (the client raises this for timeouts
+        # under a deadline): keep what was streamed, else English
+        state.degrade("llm_deadline")
+        state.reply = "".join(parts).strip() or fallback
     except Exception:
-        # Keep prior reply if LLM fails
-        state.reply = (
-            getattr(state, "reply", "") or "Sorry, I couldn’t generate an answer."
-        )
+        # tokens already streamed were shown to the user; keep them as the reply
+        state.reply = "".join(parts).strip() or getattr(state, "reply", "") or fallback
     return state
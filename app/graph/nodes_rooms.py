@@ -1,12 +1,65 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
 from pydantic import ValidationError
+from .cities import canonical_city
 from .state import GraphState
 from ..repositories.rooms_repo import RoomsRepo
 from ..utils.schemas import RoomsQuery  # your existing schema
 
 repo = RoomsRepo()
 
+# recent search results, served only when the request deadline leaves no time
+# for a query (or the query times out) and no older than ROOMS_CACHE_TTL_SECONDS;
+# with time to spare every search goes to Postgres and refreshes the entry
+ROOMS_CACHE_TTL_SECONDS = float(os.getenv("ROOMS_CACHE_TTL_SECONDS", "60"))
+ROOMS_CACHE_SIZE = int(os.getenv("ROOMS_CACHE_SIZE", "512"))
+ROOMS_MIN_SECONDS = float(os.getenv("ROOMS_MIN_SECONDS", "0.5"))
+
+_cache: "OrderedDict[tuple, Tuple[float, List[dict]]]" = OrderedDict()
+
 
-def rooms_node(state: GraphState) -> GraphState:
+def _cached(key: tuple) -> Optional[List[dict]]:
+    hit = _cache.get(key)
+    if hit is None or time.monotonic() - hit[0] > ROOMS_CACHE_TTL_SECONDS:
+        return None
+    _cache.move_to_end(key)
+    return hit[1]
+
+
+async def _search(state: GraphState, **kw) -> Optional[List[dict]]:
+    """repo.search bounded by the request deadline; cached results when short."""
+    key = (kw["city"].casefold(), kw["max_price"], kw["occupancy"], kw["topk"])
+    if state.short_on_time(ROOMS_MIN_SECONDS):
+        cached = _cached(key)
+        if cached is not None:
+            state.degrade("rooms_cached")
+            return cached
+    left = state.time_left()
+    # a gazetteer city is the stored spelling; anything else (gazetteer off,
+    # not loaded or no match) keeps the case-insensitive substring match
+    exact = canonical_city(kw["city"]) == kw["city"]
+    try:
+        # SQLAlchemy sessions are sync; keep them off the event loop. wait_for
+        # cannot stop that thread, so the query also gets a statement timeout
+        results = await asyncio.wait_for(
+            asyncio.to_thread(repo.search, **kw, exact_city=exact, timeout=left),
+            left,
+        )
+    except asyncio.TimeoutError:
+        state.degrade("rooms_timeout")
+        return _cached(key)
+    _cache[key] = (time.monotonic(), results)
+    _cache.move_to_end(key)
+    while len(_cache) > ROOMS_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return results
+
+
+async def rooms_node(state: GraphState) -> GraphState:
     try:
         q = RoomsQuery(
             city=(state.city or "").strip(),
@@ -30,9 +83,13 @@ def rooms_node(state: GraphState) -> GraphState:
         state.answer = "Please tell me the city to search rooms."
         return state
 
-    results = repo.search(
-        city=q.city, max_price=q.budget, occupancy=q.occupancy, topk=5
+    results = await _search(
+        state, city=q.city, max_price=q.budget, occupancy=q.occupancy, topk=5
     )
+    if results is None:
+        state.answer = "Room search is taking longer than usual, please try again."
+        state.results = None
+        return state
     state.results = results
 
     if results:
@@ -43,8 +100,8 @@ def rooms_node(state: GraphState) -> GraphState:
         state.answer = "Here are some options:\n" + "\n".join(bullets)
     else:
         # nicer UX: suggest the cheapest available for the same occupancy
-        cheapest = repo.search(
-            city=q.city, max_price=None, occupancy=q.occupancy, topk=1
+        cheapest = await _search(
+            state, city=q.city, max_price=None, occupancy=q.occupancy, topk=1
         )
         if cheapest:
             c = cheapest[0]
@@ -1,47 +1,45 @@
-import re
-from .state import GraphState
-
-# --- intent keywords ---
-ROOMS_KW = re.compile(
-    r"\b(room|rooms|book|price|rate|option|deal|availability)\b", re.I
-)
-FAQ_KW = re.compile(
-    r"\b(check[- ]?in|policy|refund|breakfast|parking|wifi|faq|question)\b", re.I
-)
-
-# --- slot extractors ---
-CITY_RE = re.compile(
-    r"\b(?:in|at)\s+([A-Za-z][A-Za-z\s\-]+?)(?=\s+(?:under|below|max(?:imum)?|for|with|from|on|to|by)\b|[,.!?]|$)",
-    re.I,
+from .cities import aresolve_city
+from .extract import extract
+from .intents import (
+    INTENT_CENTROIDS_ON,
+    acentroids,
+    aquery_vec,
+    classify,
+    intent_routes,
 )
-PRICE_RE = re.compile(r"\b(?:under|below|max(?:imum)?)\s+(\d+(?:\.\d+)?)\b", re.I)
-OCC_RE = re.compile(r"\bfor\s+(\d+)\s*(?:people|guests)?\b", re.I)
+from .state import GraphState
 
 
-def router_node(state: GraphState) -> GraphState:
+async def router_node(state: GraphState) -> GraphState:
     text = (state.user_text or "").strip()
 
-    # 1) classify coarse intent
-    if ROOMS_KW.search(text):
-        state.intent = "rooms"
-    elif FAQ_KW.search(text):
-        state.intent = "faq"
-    else:
-        state.intent = "unknown"
-
-    # 2) extract slots from THIS utterance (keep prior values if absent)
-    if m := CITY_RE.search(text):
-        state.city = m.group(1).strip(" ,.")
-    if m := PRICE_RE.search(text):
+    # one pass over the message: keyword intent + slots (graph/extract.py)
+    ex = extract(text, state.lang)
+
+    # 1) classify coarse intent: keywords first, then nearest intent centroid
+    source = "keyword"
+    state.intent = ex.intent
+    if state.intent != "rooms" and INTENT_CENTROIDS_ON and text:
+        # FAQ turns need the vector anyway (answer cache, retriever)
         try:
-            state.budget = float(m.group(1))
-        except ValueError:
-            pass
-    if m := OCC_RE.search(text):
+            vec = await aquery_vec(state)
+            if state.intent == "unknown" and vec is not None:
+                state.intent, _ = classify(vec, await acentroids())
+                source = "centroid"
+        except Exception as e:
+            print(f"[router] embedding unavailable, keywords only: {e}")
+
+    # 2) slots from THIS utterance (keep prior values if absent)
+    for slot in ("city", "budget", "occupancy", "check_in", "check_out"):
+        value = getattr(ex, slot)
+        if value is not None:
+            setattr(state, slot, value)
+    if ex.city:
+        # canonical hotels.city name ("Roma" -> "Rome"), else keep as typed
         try:
-            state.occupancy = int(m.group(1))
-        except ValueError:
-            pass
+            state.city = await aresolve_city(ex.city) or ex.city
+        except Exception as e:
+            print(f"[router] city gazetteer unavailable: {e}")
 
     # normalize once here so downstream nodes get consistent values
     state.normalize()
@@ -51,5 +49,7 @@ def router_node(state: GraphState) -> GraphState:
         state.city or state.budget or state.occupancy
     ):
         state.intent = "rooms"
+        source = "context"
 
+    intent_routes.labels(source, state.intent).inc()
     return state
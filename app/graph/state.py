@@ -1,6 +1,11 @@
-from pydantic import BaseModel
+import time
+
+from pydantic import BaseModel, Field
 from typing import Optional, List, Literal, Dict, Any
 
+from ..utils.deadline import current as current_deadline, degradations
+from .cities import canonical_city
+
 
 def _norm_city(x: Optional[str]) -> Optional[str]:
     if not x:
@@ -8,7 +13,9 @@ def _norm_city(x: Optional[str]) -> Optional[str]:
     x = x.strip()
     if not x:
         return None
-    return x.title()  # Qdrant string-match is case-sensitive
+    # SQL and Qdrant filters are exact matches on the hotels.city spelling;
+    # title-case is the best guess for cities the gazetteer does not know
+    return canonical_city(x) or x.title()
 
 
 class GraphState(BaseModel):
@@ -21,9 +28,21 @@ class GraphState(BaseModel):
     # Raw text for routing only (optional; use carefully)
     user_text_raw: Optional[str] = None
 
+    # Embedding of user_text, computed once per turn (graph/intents.py) and
+    # shared by the router, the answer cache and the FAQ retriever
+    query_vec: Optional[List[float]] = None
+
     # short chat memory: [{"role":"user"/"assistant", "content":"..."}]
     history: Optional[List[Dict[str, str]]] = None
 
+    # Emit LLM tokens through the graph's custom stream (/chat/stream)
+    stream: bool = False
+
+    # Request deadline (time.monotonic(), see utils/deadline.py) and the cheaper
+    # paths nodes took to meet it
+    deadline_at: Optional[float] = Field(default_factory=current_deadline)
+    degraded: List[str] = Field(default_factory=list)
+
     # High-level intent for routing
     intent: Optional[Literal["rooms", "faq", "unknown"]] = None
 
@@ -39,6 +58,22 @@ class GraphState(BaseModel):
     answer: Optional[str] = None
     results: Optional[list] = None
     citations: Optional[List[Dict[str, Any]]] = None
+    # reply served from the semantic answer cache (faq -> END, no generator)
+    cached: bool = False
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the request deadline (None = no deadline)."""
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at - time.monotonic()
+
+    def short_on_time(self, need: float) -> bool:
+        left = self.time_left()
+        return left is not None and left < need
+
+    def degrade(self, kind: str) -> None:
+        self.degraded.append(kind)
+        degradations.labels(kind).inc()
 
     def normalize(self) -> None:
         """Normalize slot values so downstream nodes are consistent."""
@@ -0,0 +1,274 @@
+# app/llm/client.py
+"""
+Async client for the Ollama (OpenAI-compatible) chat API.
+
+- one pooled httpx.AsyncClient per process (HTTP/2 when `h2` is installed)
+- at most LLM_MAX_CONCURRENCY requests in flight; the rest wait in line
+  (llm_queue_wait_seconds)
+- jittered retries on connection errors only - never after the server has
+  started answering, so a request is not generated twice
+- the whole call, and every read of a stream, is bounded by the request
+  deadline (app/utils/deadline.py) with asyncio.timeout_at; running out -
+  including an httpx timeout under a deadline - raises DeadlineExceeded.
+  httpx timeouts only cap single operations at LLM_TIMEOUT
+- `keep_alive` asks Ollama to keep the model resident between requests
+
+Pass `transport=` (e.g. httpx.MockTransport) to run against a fake server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from prometheus_client import Counter, Histogram
+
+from ..utils.deadline import DeadlineExceeded, remaining
+
+try:
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://ollama:11434/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3.1:8b")
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "512"))
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.2"))
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")  # "" = server default
+
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time an LLM request waited for a concurrency slot",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LLM_REQUESTS = Counter("llm_requests_total", "LLM requests by outcome", ["outcome"])
+LLM_RETRIES_TOTAL = Counter(
+    "llm_retries_total", "LLM requests retried after a connection error"
+)
+
+# failures where nothing reached the model, so a retry cannot duplicate work
+_RETRYABLE = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class LLMClient:
+    def __init__(
+        self,
+        base_url: str = LLM_BASE_URL,
+        model: str = LLM_MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        retries: int = LLM_RETRIES,
+        timeout: float = LLM_TIMEOUT,
+        keep_alive: str = LLM_KEEP_ALIVE,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.retries = max(0, retries)
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    # --- plumbing ---
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # pooled connections and the semaphore belong to one event loop
+            self._loop, self._http = loop, None
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=_HTTP2 and self.transport is None,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self.transport,
+            )
+        return self._http
+
+    def _timeout(self) -> httpx.Timeout:
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded("no time left for the LLM call")
+        total = self.timeout if left is None else min(self.timeout, left)
+        return httpx.Timeout(total, connect=min(LLM_CONNECT_TIMEOUT, total))
+
+    @staticmethod
+    def _deadline_at() -> Optional[float]:
+        """Event-loop time of the request deadline (None = no deadline)."""
+        left = remaining()
+        return None if left is None else asyncio.get_running_loop().time() + left
+
+    @staticmethod
+    def _expired(e: Exception) -> Exception:
+        """DeadlineExceeded for timeouts under a deadline, else `e` unchanged."""
+        if isinstance(e, DeadlineExceeded) or remaining() is None:
+            return e
+        return DeadlineExceeded(f"LLM call ran past the request deadline ({e!r})")
+
+    def payload(
+        self, messages: List[Dict[str, str]], model: Optional[str], stream: bool
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": LLM_MAX_TOKENS,
+            "temperature": LLM_TEMPERATURE,
+        }
+        if stream:
+            body["stream"] = True
+        if self.keep_alive:
+            body["keep_alive"] = self.keep_alive
+        return body
+
+    async def _backoff(self, attempt: int) -> None:
+        delay = LLM_RETRY_BACKOFF * (2**attempt) * random.uniform(0.5, 1.5)
+        left = remaining()
+        if left is not None and left <= delay:
+            raise DeadlineExceeded("no time left to retry the LLM call")
+        LLM_RETRIES_TOTAL.inc()
+        await asyncio.sleep(delay)
+
+    async def _acquire(self) -> None:
+        t0 = time.perf_counter()
+        left = remaining()
+        try:
+            await asyncio.wait_for(self._sem.acquire(), left)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("timed out waiting for an LLM slot") from None
+        finally:
+            LLM_QUEUE_WAIT.observe(time.perf_counter() - t0)
+
+    # --- API ---
+    async def chat(
+        self, messages: List[Dict[str, str]], model: Optional[str] = None
+    ) -> str:
+        http = self._client()
+        body = self.payload(messages, model, stream=False)
+        await self._acquire()
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    timeout = self._timeout()
+                    async with asyncio.timeout_at(self._deadline_at()):
+                        r = await http.post(
+                            "/chat/completions", json=body, timeout=timeout
+                        )
+                    r.raise_for_status()
+                    LLM_REQUESTS.labels("ok").inc()
+                    return (r.json()["choices"][0]["message"]["content"] or "").strip()
+                except _RETRYABLE:
+                    if attempt == self.retries:
+                        raise
+                    await self._backoff(attempt)
+                except (TimeoutError, httpx.TimeoutException) as e:
+                    raise self._expired(e) from e
+        except DeadlineExceeded:
+            LLM_REQUESTS.labels("deadline").inc()
+            raise
+        except Exception:
+            LLM_REQUESTS.labels("error").inc()
+            raise
+        finally:
+            self._sem.release()
+
+    async def stream(
+        self, messages: List[Dict[str, str]], model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield content deltas from an OpenAI-style SSE stream."""
+        http = self._client()
+        body = self.payload(messages, model, stream=True)
+        await self._acquire()
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    req = http.build_request(
+                        "POST", "/chat/completions", json=body, timeout=self._timeout()
+                    )
+                    at = self._deadline_at()
+                    async with asyncio.timeout_at(at):
+                        r = await http.send(req, stream=True)
+                    try:
+                        r.raise_for_status()
+                        lines = r.aiter_lines()
+                        while True:
+                            # bound each read, never the yield: the consumer's
+                            # own awaits must not be cancelled by our deadline
+                            async with asyncio.timeout_at(at):
+                                line = await anext(lines, None)
+                            tok = None if line is None else _delta(line)
+                            if tok is None:
+                                break
+                            if tok:
+                                yield tok
+                    finally:
+                        await r.aclose()
+                    LLM_REQUESTS.labels("ok").inc()
+                    return
+                except _RETRYABLE:
+                    # raised before the first byte, so nothing was yielded yet
+                    if attempt == self.retries:
+                        raise
+                    await self._backoff(attempt)
+                except (TimeoutError, httpx.TimeoutException) as e:
+                    raise self._expired(e) from e
+        except DeadlineExceeded:
+            LLM_REQUESTS.labels("deadline").inc()
+            raise
+        except Exception:
+            LLM_REQUESTS.labels("error").inc()
+            raise
+        finally:
+            self._sem.release()
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+def _delta(line: str) -> Optional[str]:
+    """Content of one SSE line ("" to skip), None at [DONE]."""
+    if not line.startswith("data:"):
+        return ""
+    data = line[len("data:") :].strip()
+    if data == "[DONE]":
+        return None
+    try:
+        delta = json.loads(data)["choices"][0].get("delta") or {}
+    except (ValueError, KeyError, IndexError):
+        return ""
+    return delta.get("content") or ""
+
+
+_CLIENT: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = LLMClient()
+    return _CLIENT
+
+
+def set_llm_client(client: Optional[LLMClient]) -> None:
+    """Swap the process-wide client (tests, local fake servers)."""
+    global _CLIENT
+    _CLIENT = client
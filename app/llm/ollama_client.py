@@ -1,22 +1,43 @@
 from __future__ import annotations
-import os
 import requests
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
 
-BASE = os.getenv("LLM_BASE_URL", "http://ollama:11434/v1")
-MODEL = os.getenv("LLM_MODEL", "llama3.1:8b")
-MAX_TOK = int(os.getenv("LLM_MAX_TOKENS", "512"))
-TEMP = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+from .client import (
+    LLM_BASE_URL as BASE,
+    LLM_MODEL as MODEL,
+    LLM_TIMEOUT,
+    get_llm_client,
+)
+from ..utils.deadline import DeadlineExceeded, remaining
+
+# keep-alive connection pool for the sync path (scripts)
+_session = requests.Session()
 
 
 def chat(messages: List[Dict[str, str]], model: str | None = None) -> str:
-    payload = {
-        "model": model or MODEL,
-        "messages": messages,
-        "max_tokens": MAX_TOK,
-        "temperature": TEMP,
-    }
-    r = requests.post(f"{BASE}/chat/completions", json=payload, timeout=30)
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("no time left for the LLM call")
+    r = _session.post(
+        f"{BASE}/chat/completions",
+        json=get_llm_client().payload(messages, model or MODEL, stream=False),
+        timeout=LLM_TIMEOUT if left is None else min(LLM_TIMEOUT, left),
+    )
     r.raise_for_status()
-    data = r.json()
-    return (data["choices"][0]["message"]["content"] or "").strip()
+    return (r.json()["choices"][0]["message"]["content"] or "").strip()
+
+
+async def achat(messages: List[Dict[str, str]], model: str | None = None) -> str:
+    return await get_llm_client().chat(messages, model)
+
+
+async def astream_chat(
+    messages: List[Dict[str, str]], model: str | None = None
+) -> AsyncIterator[str]:
+    """Yield content deltas from an OpenAI-style SSE stream (`stream: true`)."""
+    async for tok in get_llm_client().stream(messages, model):
+        yield tok
+
+
+async def aclose() -> None:
+    await get_llm_client().aclose()
@@ -0,0 +1,96 @@
+# app/llm/prompt.py
+"""
+Token-budgeted chat prompts.
+
+The system prompt always goes first and unchanged, so Ollama can reuse its
+KV cache for that prefix across requests. History is added newest-first
+until PROMPT_TOKEN_BUDGET is spent; long turns are cut to
+PROMPT_HISTORY_MSG_TOKENS. Translation prompts carry no history at all.
+
+Tokens are counted with the model's tokenizer when LLM_TOKENIZER names a
+Hugging Face tokenizer (and `transformers` is installed), else estimated at
+~4 characters per token.
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from prometheus_client import Histogram
+
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "")
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1024"))
+PROMPT_HISTORY_MSG_TOKENS = int(os.getenv("PROMPT_HISTORY_MSG_TOKENS", "120"))
+
+PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt size sent to the LLM (tokens)",
+    ["kind"],
+    buckets=(32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+
+Message = Dict[str, str]
+# "system" in history = rolling summary of older turns (utils/memory.py)
+_HISTORY_ROLES = ("system", "user", "assistant")
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    if not LLM_TOKENIZER:
+        return None
+    try:
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(LLM_TOKENIZER)
+    except Exception as e:
+        print(f"[prompt] tokenizer {LLM_TOKENIZER} unavailable, estimating: {e}")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    tok = _tokenizer()
+    if tok is None:
+        return (len(text) + 3) // 4
+    return len(tok.encode(text, add_special_tokens=False))
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    n = count_tokens(text)
+    if n <= max_tokens:
+        return text
+    # proportional cut; good enough for history context
+    keep = max(1, len(text) * max_tokens // n)
+    return text[:keep].rstrip() + "…"
+
+
+def build_messages(
+    system: str,
+    prompt: str,
+    history: Optional[List[Message]] = None,
+    kind: str = "chat",
+    budget: int = PROMPT_TOKEN_BUDGET,
+) -> List[Message]:
+    """[system] + as much recent history as fits `budget` + [user prompt]."""
+    used = count_tokens(system) + count_tokens(prompt)
+    turns: List[Message] = []
+    for m in reversed(history or []):
+        role = m.get("role")
+        if role not in _HISTORY_ROLES or not m.get("content"):
+            continue
+        content = m["content"]
+        if role != "system":  # the summary is already size-bounded
+            content = _clip(content, PROMPT_HISTORY_MSG_TOKENS)
+        cost = count_tokens(content)
+        if used + cost > budget:
+            break
+        used += cost
+        turns.append({"role": role, "content": content})
+    PROMPT_TOKENS.labels(kind).observe(used)
+    return (
+        [{"role": "system", "content": system}]
+        + turns[::-1]
+        + [{"role": "user", "content": prompt}]
+    )
@@ -5,7 +5,7 @@ from typing import Optional
 class Hotel(SQLModel, table=True):
     hotel_id: int | None = Field(default=None, primary_key=True)
     name: str
-    city: str
+    city: str = Field(index=True)
     country: str
     stars: Optional[int] = None
     lat: Optional[float] = None
@@ -0,0 +1,161 @@
+# app/rag/answer_cache.py
+"""
+Semantic cache of generated FAQ replies.
+
+Keyed on (lang, city) plus the query embedding: a new question whose vector
+is within ANSWER_CACHE_THRESHOLD cosine of a cached one gets that reply and
+its citations back, skipping retrieval and the LLM. Entries expire after
+ANSWER_CACHE_TTL_SECONDS, the least recently used are evicted beyond
+ANSWER_CACHE_SIZE (expired ones first), and everything is dropped when the
+"faq" data version moves (reindex). Lookups only consider unexpired rows.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from prometheus_client import Counter
+
+ANSWER_CACHE_ON = os.getenv("ANSWER_CACHE", "on") == "on"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))
+
+answer_cache_lookups = Counter(
+    "answer_cache_lookups_total", "Semantic answer cache lookups", ["result"]
+)
+
+Bucket = Tuple[str, str]  # (lang, city)
+
+
+@dataclass
+class _Entry:
+    bucket: Bucket
+    vec: np.ndarray
+    reply: str
+    citations: List[Dict[str, Any]]
+    expires: float
+
+
+class AnswerCache:
+    def __init__(self, size: int = ANSWER_CACHE_SIZE) -> None:
+        self.size = max(0, size)
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Bucket, List[int]] = {}
+        # stacked vectors + expiry times per bucket, rebuilt lazily after a change
+        self._matrix: Dict[Bucket, Tuple[List[int], np.ndarray, np.ndarray]] = {}
+        self._next_id = 0
+
+    @staticmethod
+    def bucket(lang: Optional[str], city: Optional[str]) -> Bucket:
+        return ((lang or "").strip().lower(), (city or "").strip().casefold())
+
+    @staticmethod
+    def _unit(vec: List[float]) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32)
+        n = float(np.linalg.norm(v))
+        return v / n if n else v
+
+    def _sync_version(self, version: str) -> None:
+        if self.version != version:
+            self.clear()
+            self.version = version
+
+    def _drop(self, eid: int) -> None:
+        e = self._entries.pop(eid, None)
+        if e is None:
+            return
+        ids = self._buckets.get(e.bucket, [])
+        if eid in ids:
+            ids.remove(eid)
+        self._matrix.pop(e.bucket, None)
+
+    def _sweep(self, ids: List[int], now: float) -> None:
+        for eid in [i for i in ids if self._entries[i].expires <= now]:
+            self._drop(eid)
+
+    def _rows(self, bucket: Bucket) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        cached = self._matrix.get(bucket)
+        if cached is None:
+            # rebuilding anyway: drop the bucket's expired rows first
+            self._sweep(list(self._buckets.get(bucket, [])), time.monotonic())
+            ids = list(self._buckets.get(bucket, []))
+            mat = (
+                np.stack([self._entries[i].vec for i in ids])
+                if ids
+                else np.zeros((0, 0), dtype=np.float32)
+            )
+            expires = np.array([self._entries[i].expires for i in ids])
+            cached = self._matrix[bucket] = (ids, mat, expires)
+        return cached
+
+    def get(
+        self, vec: List[float], lang: Optional[str], city: Optional[str], version: str
+    ) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """(reply, citations) of the closest unexpired question, if close enough."""
+        self._sync_version(version)
+        b = self.bucket(lang, city)
+        ids, mat, expires = self._rows(b)
+        if not ids:
+            answer_cache_lookups.labels("miss").inc()
+            return None
+        now = time.monotonic()
+        sims = mat @ self._unit(vec)
+        live = expires > now
+        j = int(np.argmax(np.where(live, sims, -np.inf)))
+        if not live[j] or sims[j] < ANSWER_CACHE_THRESHOLD:
+            close = bool(np.any(sims[~live] >= ANSWER_CACHE_THRESHOLD))
+            answer_cache_lookups.labels("expired" if close else "miss").inc()
+            if not live.all():
+                self._sweep(ids, now)
+            return None
+        e = self._entries[ids[j]]
+        self._entries.move_to_end(ids[j])
+        answer_cache_lookups.labels("hit").inc()
+        return e.reply, e.citations
+
+    def put(
+        self,
+        vec: List[float],
+        lang: Optional[str],
+        city: Optional[str],
+        version: str,
+        reply: str,
+        citations: List[Dict[str, Any]],
+    ) -> None:
+        if not self.size or not reply:
+            return
+        self._sync_version(version)
+        b = self.bucket(lang, city)
+        eid, self._next_id = self._next_id, self._next_id + 1
+        self._entries[eid] = _Entry(
+            b,
+            self._unit(vec),
+            reply,
+            citations,
+            time.monotonic() + ANSWER_CACHE_TTL_SECONDS,
+        )
+        self._buckets.setdefault(b, []).append(eid)
+        self._matrix.pop(b, None)
+        if len(self._entries) > self.size:
+            self._sweep(list(self._entries), time.monotonic())
+        while len(self._entries) > self.size:
+            self._drop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._buckets.clear()
+        self._matrix.clear()
+
+
+_CACHE = AnswerCache()
+
+
+def get_answer_cache() -> AnswerCache:
+    return _CACHE
@@ -0,0 +1,107 @@
+import os
+import json
+import shutil
+import time
+import argparse
+
+import numpy as np
+
+from .embed import embed_texts, model_name
+from .index_faqs import load_jsonl
+from .lexical import build_lexical_index
+from .local_index import FAQ_LOCAL_DIR
+from ..utils.data_version import bump_version
+
+BATCH = 256
+# older versions kept next to the live one (a worker may still be reading it)
+KEEP_VERSIONS = 2
+
+
+def publish(src: str, out_dir: str) -> str:
+    """
+    Move the finished index dir `src` to `<out_dir>.<ns timestamp>` and point the
+    `out_dir` symlink at it with one atomic os.replace, so `out_dir` always
+    resolves to a complete index. Returns the versioned path.
+    """
+    out_dir = out_dir.rstrip("/\\")
+    parent, base = os.path.split(os.path.abspath(out_dir))
+    target = f"{out_dir}.{time.time_ns()}"
+    os.replace(src, target)
+    if os.path.isdir(out_dir) and not os.path.islink(out_dir):
+        # pre-symlink layout: move the old dir aside once (brief gap, first run only)
+        os.replace(out_dir, f"{out_dir}.legacy")
+    link = f"{out_dir}.link-tmp"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(target), link)  # relative, next to out_dir
+    os.replace(link, out_dir)
+
+    versions = sorted(
+        (
+            n
+            for n in os.listdir(parent)
+            if n.startswith(base + ".") and n[len(base) + 1 :].isdigit()
+        ),
+        key=lambda n: int(n[len(base) + 1 :]),
+    )
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(parent, old), ignore_errors=True)
+    shutil.rmtree(f"{out_dir}.legacy", ignore_errors=True)
+    return target
+
+
+def build_local_index(
+    path: str = "data/faqs.jsonl", out_dir: str = FAQ_LOCAL_DIR, dtype: str = "float32"
+) -> int:
+    rows = list(load_jsonl(path))
+    if not rows:
+        print("No rows in", path)
+        return 0
+
+    qs = [r["question"].strip() for r in rows]
+    vecs = []
+    for i in range(0, len(qs), BATCH):
+        vecs.extend(embed_texts(qs[i : i + BATCH]))
+        print(f" • Embedded {min(i + BATCH, len(qs))}/{len(qs)}")
+    mat = np.asarray(vecs, dtype=np.float32)
+    mat /= np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+
+    payload = {
+        "id": [r.get("id") for r in rows],
+        "question": [r["question"] for r in rows],
+        "answer": [r["answer"] for r in rows],
+        "category": [r.get("category") for r in rows],
+        "city": [r.get("city") or r.get("location") for r in rows],
+        "lang": [r.get("lang", "en") for r in rows],
+    }
+    meta = {
+        "model": model_name(),
+        "dim": int(mat.shape[1]),
+        "dtype": dtype,
+        "count": int(mat.shape[0]),
+    }
+
+    # write a complete versioned dir, then switch the out_dir symlink to it
+    tmp = out_dir.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "vectors.npy"), mat.astype(dtype))
+    with open(os.path.join(tmp, "payload.json"), "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    publish(tmp, out_dir)
+
+    print(f"Wrote {meta['count']} x {meta['dim']} ({dtype}) → {out_dir}")
+    build_lexical_index(rows)
+    bump_version("faq")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build the FAQ_BACKEND=LOCAL index")
+    ap.add_argument("--input", default=os.getenv("FAQ_JSONL", "data/faqs.jsonl"))
+    ap.add_argument("--out", default=FAQ_LOCAL_DIR)
+    ap.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    args = ap.parse_args()
+    build_local_index(args.input, args.out, args.dtype)
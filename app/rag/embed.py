@@ -1,21 +1,85 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from sentence_transformers import SentenceTransformer
 
+from .embed_cache import get_cache, normalize
+from ..utils.batching import MicroBatcher
+
 _model = None
 
+# Model forward passes are CPU-bound and torch already uses several threads,
+# so keep a small dedicated pool instead of flooding the default executor.
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "1"))
+_executor = ThreadPoolExecutor(max_workers=MODEL_WORKERS, thread_name_prefix="model")
+
+
+def model_name() -> str:
+    return os.getenv(
+        "EMBED_MODEL",
+        "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
+    )
+
 
 def get_embedder():
     global _model
     if _model is None:
-        _model = SentenceTransformer(
-            os.getenv(
-                "EMBED_MODEL",
-                "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
-            )
-        )
+        _model = SentenceTransformer(model_name())
     return _model
 
 
+def embed_dim() -> int:
+    """Vector length of the configured model (no forward pass needed)."""
+    model = get_embedder()
+    dim = model.get_sentence_embedding_dimension()
+    return dim or len(model.encode(["_dim_probe_"])[0])
+
+
 def embed_texts(texts: list[str]) -> list[list[float]]:
     model = get_embedder()
     return model.encode(texts, normalize_embeddings=True).tolist()
+
+
+async def run_in_model_executor(fn, *args):
+    """Run a CPU-bound model call off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, fn, *args)
+
+
+async def aembed_texts(texts: list[str]) -> list[list[float]]:
+    return await run_in_model_executor(embed_texts, texts)
+
+
+# Queries from concurrent requests are coalesced into one encode() call.
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "4"))
+
+_batcher = MicroBatcher(
+    "embed",
+    embed_texts,
+    max_items=EMBED_BATCH_MAX,
+    max_wait_ms=EMBED_BATCH_WAIT_MS,
+    run=run_in_model_executor,
+)
+
+
+def embed_query(text: str) -> list[float]:
+    """Embed one query through the LRU/Redis cache."""
+    text = normalize(text)
+    cache = get_cache(model_name())
+    vec = cache.get(text)
+    if vec is None:
+        vec = embed_texts([text])[0]
+        cache.put(text, vec)
+    return vec
+
+
+async def aembed_query(text: str) -> list[float]:
+    """Embed one query: cache first, else batched with whatever else is in flight."""
+    text = normalize(text)
+    cache = get_cache(model_name())
+    vec = await cache.aget(text)
+    if vec is None:
+        vec = await _batcher.submit(text)
+        await cache.aput(text, vec)
+    return vec
@@ -0,0 +1,167 @@
+# app/rag/embed_cache.py
+"""
+Two-tier cache for query embeddings.
+
+  tier 1: bounded in-process LRU (per worker)
+  tier 2: Redis, float16 bytes, shared by all workers
+
+Keys include a hash of the model name, so changing EMBED_MODEL starts a fresh
+keyspace and old vectors simply age out.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+from prometheus_client import Counter
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+EMBED_CACHE_TTL_SECONDS = int(os.getenv("EMBED_CACHE_TTL_SECONDS", "86400"))
+EMBED_CACHE_REDIS = os.getenv("EMBED_CACHE_REDIS", "on") == "on"
+
+cache_hits = Counter("embed_cache_hits_total", "Embedding cache hits", ["tier"])
+cache_misses = Counter("embed_cache_misses_total", "Embedding cache misses")
+cache_evictions = Counter(
+    "embed_cache_evictions_total", "Embeddings evicted from the in-process LRU"
+)
+
+_WS = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Whitespace/Unicode-normalized text; this is what gets embedded."""
+    return _WS.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, size: int = EMBED_CACHE_SIZE) -> None:
+        self.model_name = model_name
+        self.size = max(0, size)
+        self.tag = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:12]
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._redis: "redis.Redis | None" = None
+        self._aredis: "aioredis.Redis | None" = None
+
+    # --- keys / encoding ---
+    def key(self, text: str) -> str:
+        # exactly the string that is embedded: the model is cased, so
+        # "Check-in" and "check-in" are different vectors
+        digest = hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+        return f"chatbi:emb:{self.tag}:{digest}"
+
+    @staticmethod
+    def _encode(vec: List[float]) -> bytes:
+        return np.asarray(vec, dtype=np.float16).tobytes()
+
+    @staticmethod
+    def _decode(raw: bytes) -> List[float]:
+        return np.frombuffer(raw, dtype=np.float16).astype(np.float32).tolist()
+
+    # --- tier 1 ---
+    def _local_get(self, key: str) -> Optional[List[float]]:
+        vec = self._lru.get(key)
+        if vec is not None:
+            self._lru.move_to_end(key)
+            cache_hits.labels("local").inc()
+        return vec
+
+    def _local_put(self, key: str, vec: List[float]) -> None:
+        if not self.size:
+            return
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.size:
+            self._lru.popitem(last=False)
+            cache_evictions.inc()
+
+    # --- tier 2 clients (raw bytes, so no decode_responses) ---
+    def _r(self) -> "redis.Redis":
+        if self._redis is None:
+            self._redis = redis.from_url(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0")
+            )
+        return self._redis
+
+    def _ar(self) -> "aioredis.Redis":
+        if self._aredis is None:
+            self._aredis = aioredis.from_url(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0")
+            )
+        return self._aredis
+
+    def _remote_hit(self, key: str, raw: Optional[bytes]) -> Optional[List[float]]:
+        if not raw:
+            cache_misses.inc()
+            return None
+        vec = self._decode(raw)
+        cache_hits.labels("redis").inc()
+        self._local_put(key, vec)
+        return vec
+
+    # --- public API ---
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        vec = self._local_get(key)
+        if vec is not None or not EMBED_CACHE_REDIS:
+            if vec is None:
+                cache_misses.inc()
+            return vec
+        try:
+            raw = self._r().get(key)
+        except Exception:
+            raw = None
+        return self._remote_hit(key, raw)
+
+    async def aget(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        vec = self._local_get(key)
+        if vec is not None or not EMBED_CACHE_REDIS:
+            if vec is None:
+                cache_misses.inc()
+            return vec
+        try:
+            raw = await self._ar().get(key)
+        except Exception:
+            raw = None
+        return self._remote_hit(key, raw)
+
+    def put(self, text: str, vec: List[float]) -> None:
+        key = self.key(text)
+        self._local_put(key, vec)
+        if EMBED_CACHE_REDIS:
+            try:
+                self._r().set(key, self._encode(vec), ex=EMBED_CACHE_TTL_SECONDS)
+            except Exception:
+                pass
+
+    async def aput(self, text: str, vec: List[float]) -> None:
+        key = self.key(text)
+        self._local_put(key, vec)
+        if EMBED_CACHE_REDIS:
+            try:
+                await self._ar().set(
+                    key, self._encode(vec), ex=EMBED_CACHE_TTL_SECONDS
+                )
+            except Exception:
+                pass
+
+    def clear_local(self) -> None:
+        self._lru.clear()
+
+
+_CACHE: Optional[EmbeddingCache] = None
+
+
+def get_cache(model_name: str) -> EmbeddingCache:
+    """Cache for `model_name`; a different model gets a fresh cache."""
+    global _CACHE
+    if _CACHE is None or _CACHE.model_name != model_name:
+        _CACHE = EmbeddingCache(model_name)
+    return _CACHE
@@ -5,6 +5,8 @@ from qdrant_client import QdrantClient
 from qdrant_client.http.models import Distance, VectorParams, PointStruct
 from tenacity import retry, stop_after_attempt, wait_fixed
 from .embed import embed_texts
+from .lexical import build_lexical_index
+from ..utils.data_version import bump_version
 
 COLL = "faqs_v1"
 BATCH = 200
@@ -29,7 +31,7 @@ def ensure_collection(c: QdrantClient, dim: int):
 
 
 def load_jsonl(path: str):
-    with open(path, "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8-sig") as f:
         for line in f:
             s = line.strip()
             if s:
@@ -71,6 +73,8 @@ def run_index(path="data/faqs.jsonl"):
         print(f" • Upserting {len(pts)} [{i}:{j})")
         upsert_batch(c, pts)
     print("Done.")
+    build_lexical_index(rows)
+    bump_version("faq")  # running workers re-resolve the collection
     return len(rows)
 
 
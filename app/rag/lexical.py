@@ -0,0 +1,252 @@
+# app/rag/lexical.py
+"""
+BM25 index over FAQ question + answer text.
+
+Built at index time (index_faqs / build_local_index / reindex_faqs, or
+`python -m app.rag.lexical`) into FAQ_LEXICAL_PATH: a vocabulary, postings as
+(doc id, term frequency) arrays per token id, and the payload columns. At
+query time scoring is a few NumPy adds over the postings of the query terms.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FAQ_LEXICAL_PATH = os.getenv("FAQ_LEXICAL_PATH", "data/faq_lexical.json")
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# lexical top-1 must beat #2 by this factor (and cover every query term)
+# before the dense search is skipped
+LEXICAL_SHORTCUT_RATIO = float(os.getenv("LEXICAL_SHORTCUT_RATIO", "1.5"))
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+PAYLOAD_FIELDS = ("id", "question", "answer", "category", "city", "lang")
+
+
+@lru_cache(maxsize=8192)
+def tokenize(text: str) -> Tuple[str, ...]:
+    return tuple(_TOKEN.findall((text or "").casefold()))
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        postings: List[Tuple[np.ndarray, np.ndarray]],
+        doc_len: np.ndarray,
+        q_terms: List[frozenset],
+        payload: Dict[str, List[Any]],
+    ) -> None:
+        self.vocab = vocab
+        self.postings = postings
+        self.doc_len = doc_len
+        self.count = int(len(doc_len))
+        self.avgdl = float(doc_len.mean()) if self.count else 0.0
+        self.q_terms = q_terms  # token ids in each doc's question
+        self.payload = payload
+        n = max(1, self.count)
+        self.idf = np.array(
+            [math.log(1 + (n - len(d) + 0.5) / (len(d) + 0.5)) for d, _ in postings],
+            dtype=np.float32,
+        )
+        self._norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / max(self.avgdl, 1e-9))
+        self.masks: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in ("city", "lang", "category"):
+            by_value: Dict[str, np.ndarray] = {}
+            for i, v in enumerate(payload.get(field) or []):
+                if v is None:
+                    continue
+                by_value.setdefault(v, np.zeros(self.count, dtype=bool))[i] = True
+            self.masks[field] = by_value
+
+    # --- build / persist ---
+    @classmethod
+    def build(cls, rows: Iterable[Dict[str, Any]]) -> "LexicalIndex":
+        vocab: Dict[str, int] = {}
+        docs: List[List[int]] = []
+        q_terms: List[frozenset] = []
+        payload: Dict[str, List[Any]] = {f: [] for f in PAYLOAD_FIELDS}
+        for r in rows:
+            q_ids = [
+                vocab.setdefault(t, len(vocab))
+                for t in tokenize(r.get("question") or "")
+            ]
+            a_ids = [
+                vocab.setdefault(t, len(vocab)) for t in tokenize(r.get("answer") or "")
+            ]
+            docs.append(q_ids + a_ids)
+            q_terms.append(frozenset(q_ids))
+            for f in PAYLOAD_FIELDS:
+                payload[f].append(r.get(f))
+            payload["city"][-1] = r.get("city") or r.get("location")
+            payload["lang"][-1] = r.get("lang", "en")
+
+        plists: List[List[Tuple[int, int]]] = [[] for _ in vocab]
+        for doc_id, ids in enumerate(docs):
+            for tid, tf in Counter(ids).items():
+                plists[tid].append((doc_id, tf))
+        postings = [
+            (
+                np.array([d for d, _ in pl], dtype=np.int32),
+                np.array([tf for _, tf in pl], dtype=np.float32),
+            )
+            for pl in plists
+        ]
+        doc_len = np.array([len(ids) for ids in docs], dtype=np.float32)
+        return cls(vocab, postings, doc_len, q_terms, payload)
+
+    def save(self, path: str = FAQ_LEXICAL_PATH) -> None:
+        data = {
+            "vocab": sorted(self.vocab, key=self.vocab.get),
+            "postings": [
+                [d.tolist(), tf.astype(int).tolist()] for d, tf in self.postings
+            ],
+            "doc_len": self.doc_len.astype(int).tolist(),
+            "q_terms": [sorted(q) for q in self.q_terms],
+            "payload": self.payload,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = FAQ_LEXICAL_PATH) -> "LexicalIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        vocab = {t: i for i, t in enumerate(data["vocab"])}
+        postings = [
+            (np.array(d, dtype=np.int32), np.array(tf, dtype=np.float32))
+            for d, tf in data["postings"]
+        ]
+        return cls(
+            vocab,
+            postings,
+            np.array(data["doc_len"], dtype=np.float32),
+            [frozenset(q) for q in data["q_terms"]],
+            data["payload"],
+        )
+
+    # --- query ---
+    def row(self, i: int) -> Dict[str, Any]:
+        return {k: col[i] for k, col in self.payload.items()}
+
+    def _mask(self, city, lang, category) -> Optional[np.ndarray]:
+        mask = None
+        for field, value in (("city", city), ("lang", lang), ("category", category)):
+            if not value:
+                continue
+            m = self.masks[field].get(value)
+            if m is None:
+                return np.zeros(self.count, dtype=bool)
+            mask = m if mask is None else (mask & m)
+        return mask
+
+    def _scores(self, term_ids: List[int]) -> np.ndarray:
+        scores = np.zeros(self.count, dtype=np.float32)
+        for tid in term_ids:
+            docs, tf = self.postings[tid]
+            scores[docs] += self.idf[tid] * tf * (BM25_K1 + 1) / (tf + self._norm[docs])
+        return scores
+
+    def search(
+        self,
+        query: str,
+        topk: int = 5,
+        city: Optional[str] = None,
+        lang: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Tuple[int, float]]:
+        """BM25 top-k as [(doc index, score)], best first; only docs with a match."""
+        term_ids = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not term_ids or not self.count:
+            return []
+        scores = self._scores(term_ids)
+        mask = self._mask(city, lang, category)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        k = min(topk, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def confident(self, query: str, ranked: List[Tuple[int, float]]) -> bool:
+        """Top hit's question contains every query term and clearly beats #2."""
+        if not ranked:
+            return False
+        q_ids = {self.vocab.get(t, -1) for t in tokenize(query)}
+        if -1 in q_ids or not q_ids <= self.q_terms[ranked[0][0]]:
+            return False
+        if len(ranked) == 1:
+            return True
+        return ranked[0][1] >= LEXICAL_SHORTCUT_RATIO * ranked[1][1]
+
+
+def rrf(*rankings: List[str], k: int = 60) -> List[str]:
+    """Reciprocal-rank fusion of several ranked key lists."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+_INDEX: Optional[LexicalIndex] = None
+_INDEX_VERSION: Optional[str] = None
+_LOCK = threading.Lock()
+
+
+def get_lexical_index(version: str = "0") -> Optional[LexicalIndex]:
+    """Process-wide index (None if not built); reloaded on "faq" version change."""
+    global _INDEX, _INDEX_VERSION
+    if _INDEX_VERSION == version:
+        return _INDEX
+    with _LOCK:
+        if _INDEX_VERSION != version:
+            try:
+                idx = LexicalIndex.load(FAQ_LEXICAL_PATH)
+            except FileNotFoundError:
+                idx = None
+            except (OSError, ValueError, KeyError) as e:
+                # e.g. read mid-rewrite: keep the old index, retry next call
+                print(f"[lexical] could not load {FAQ_LEXICAL_PATH}: {e}")
+                return _INDEX
+            # readers checking the version see the new index with it
+            _INDEX, _INDEX_VERSION = idx, version
+    return _INDEX
+
+
+async def aget_lexical_index(version: str = "0") -> Optional[LexicalIndex]:
+    """get_lexical_index for the event loop; a reload from disk runs in a thread."""
+    if _INDEX_VERSION == version:
+        return _INDEX
+    return await asyncio.to_thread(get_lexical_index, version)
+
+
+def build_lexical_index(
+    rows: List[Dict[str, Any]], path: str = FAQ_LEXICAL_PATH
+) -> None:
+    LexicalIndex.build(rows).save(path)
+    print(f"Wrote BM25 index for {len(rows)} FAQs → {path}")
+
+
+if __name__ == "__main__":
+    from .index_faqs import load_jsonl
+
+    ap = argparse.ArgumentParser(description="Build the FAQ BM25 index")
+    ap.add_argument("--input", default=os.getenv("FAQ_JSONL", "data/faqs.jsonl"))
+    ap.add_argument("--out", default=FAQ_LEXICAL_PATH)
+    args = ap.parse_args()
+    build_lexical_index(list(load_jsonl(args.input)), args.out)
@@ -0,0 +1,128 @@
+# app/rag/local_index.py
+"""
+In-process FAQ vector index (FAQ_BACKEND=LOCAL).
+
+Artifacts (written by app/rag/build_local_index.py) in FAQ_LOCAL_DIR:
+  vectors.npy   (N, dim) float32/float16, L2-normalized, opened with mmap so
+                every worker shares the same page-cache pages
+  payload.json  columnar payload: {"id": [...], "question": [...], ...}
+  meta.json     {"model", "dim", "dtype", "count"}
+
+FAQ_LOCAL_DIR is a symlink to a versioned directory that the builder swaps
+atomically; `load` resolves it once, so all three files come from the same
+version.
+
+Filters on city/lang/category are precomputed boolean masks per value.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+FAQ_LOCAL_DIR = os.getenv("FAQ_LOCAL_DIR", "data/faq_local")
+FILTER_FIELDS = ("city", "lang", "category")
+# rows scored per block; bounds the float32 temp for float16 matrices
+_BLOCK = 4096
+
+
+class LocalIndex:
+    def __init__(self, vectors: np.ndarray, payload: Dict[str, List[Any]], meta: dict):
+        self.vectors = vectors
+        self.payload = payload
+        self.meta = meta
+        self.count = int(vectors.shape[0])
+        self.masks: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in FILTER_FIELDS:
+            col = payload.get(field) or [None] * self.count
+            by_value: Dict[str, np.ndarray] = {}
+            for i, v in enumerate(col):
+                if v is None:
+                    continue
+                m = by_value.get(v)
+                if m is None:
+                    m = by_value[v] = np.zeros(self.count, dtype=bool)
+                m[i] = True
+            self.masks[field] = by_value
+
+    @classmethod
+    def load(cls, path: str = FAQ_LOCAL_DIR) -> "LocalIndex":
+        path = os.path.realpath(path)
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(path, "payload.json"), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(vectors, payload, meta)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {k: col[i] for k, col in self.payload.items()}
+
+    def _mask(
+        self, city: Optional[str], lang: Optional[str], category: Optional[str]
+    ) -> Optional[np.ndarray]:
+        mask = None
+        for field, value in (("city", city), ("lang", lang), ("category", category)):
+            if not value:
+                continue
+            m = self.masks[field].get(value)
+            if m is None:
+                return np.zeros(self.count, dtype=bool)
+            mask = m if mask is None else (mask & m)
+        return mask
+
+    def _scores(self, q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        if self.vectors.dtype == np.float32 and rows is None:
+            return self.vectors @ q
+        n = self.count if rows is None else len(rows)
+        out = np.empty(n, dtype=np.float32)
+        for s in range(0, n, _BLOCK):
+            e = min(s + _BLOCK, n)
+            block = self.vectors[s:e] if rows is None else self.vectors[rows[s:e]]
+            out[s:e] = block.astype(np.float32, copy=False) @ q
+        return out
+
+    def search(
+        self,
+        vec: List[float],
+        topk: int = 5,
+        city: Optional[str] = None,
+        lang: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Cosine top-k as [(payload, score)], best first."""
+        q = np.asarray(vec, dtype=np.float32)
+        mask = self._mask(city, lang, category)
+        rows = None if mask is None else np.flatnonzero(mask)
+        if rows is not None and not len(rows):
+            return []
+        scores = self._scores(q, rows)
+        k = min(topk, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        ids = top if rows is None else rows[top]
+        return [(self.row(int(i)), float(scores[j])) for i, j in zip(ids, top)]
+
+
+_INDEX: Optional[LocalIndex] = None
+_INDEX_VERSION: Optional[str] = None
+
+
+def get_local_index(version: str = "0") -> LocalIndex:
+    """Process-wide index; reloaded when the "faq" data version moves."""
+    global _INDEX, _INDEX_VERSION
+    if _INDEX is None or _INDEX_VERSION != version:
+        _INDEX = LocalIndex.load(FAQ_LOCAL_DIR)
+        _INDEX_VERSION = version
+    return _INDEX
+
+
+async def aget_local_index(version: str = "0") -> LocalIndex:
+    """get_local_index for the event loop; a reload from disk runs in a thread."""
+    if _INDEX is not None and _INDEX_VERSION == version:
+        return _INDEX
+    return await asyncio.to_thread(get_local_index, version)
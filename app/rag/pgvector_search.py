@@ -0,0 +1,99 @@
+# app/rag/pgvector_search.py
+"""
+pgvector search over the tables written by app/scripts/reindex_faqs.py
+(FAQ_BACKEND=PGVECTOR): `faqs` (payload) + `faqs_vec` (embedding, ivfflat).
+
+All filter tiers of a query go out as ONE statement (a LATERAL subquery per
+tier), through the app's SQLAlchemy pool. The ANN knobs are set with
+set_config(..., is_local => true), so they last for that transaction only and
+never touch pooled connections used elsewhere (bookings, rooms).
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from ..db import engine
+
+# ANN knobs, applied per search transaction (SET LOCAL semantics)
+PGVECTOR_PROBES = int(os.getenv("PGVECTOR_PROBES", "10"))  # ivfflat
+PGVECTOR_EF_SEARCH = int(os.getenv("PGVECTOR_EF_SEARCH", "40"))  # hnsw
+
+_TUNE_ANN = text(
+    "SELECT set_config('ivfflat.probes', :probes, true), "
+    "set_config('hnsw.ef_search', :ef, true)"
+)
+
+_PAYLOAD = ("id", "hotel_id", "city", "lang", "question", "answer")
+
+
+def _vector_literal(vec: List[float]) -> str:
+    return "[" + ",".join(f"{x:.7g}" for x in vec) + "]"
+
+
+def _tiers_sql(n: int, category: Optional[str]) -> str:
+    values = ", ".join(
+        f"({i}, CAST(:city{i} AS TEXT), CAST(:lang{i} AS TEXT))" for i in range(n)
+    )
+    cat = "AND f.tags ? :category" if category else ""
+    return f"""
+        SELECT t.tier, h.*
+          FROM (VALUES {values}) AS t(tier, city, lang)
+         CROSS JOIN LATERAL (
+                SELECT f.id, f.hotel_id, f.city, f.lang, f.question, f.answer,
+                       -- NULL (not an error) on tables from before the
+                       -- translations column (pretranslate_faqs.py adds it)
+                       to_jsonb(f) -> 'translations' AS translations,
+                       1 - (v.embedding <=> CAST(:q AS vector)) AS score
+                  FROM faqs_vec v
+                  JOIN faqs f ON f.id = v.id
+                 WHERE (t.city IS NULL OR f.city = t.city)
+                   AND (t.lang IS NULL OR f.lang = t.lang)
+                   {cat}
+                 ORDER BY v.embedding <=> CAST(:q AS vector)
+                 LIMIT :k
+         ) AS h
+         ORDER BY t.tier, h.score DESC
+    """
+
+
+def search_tiers(
+    vec: List[float],
+    tiers: List[Dict[str, Optional[str]]],
+    topk: int = 5,
+    category: Optional[str] = None,
+) -> List[List[Tuple[Dict[str, Any], float]]]:
+    """Per tier (in order): [(payload, score)], best first."""
+    if not tiers:
+        return []
+    params: Dict[str, Any] = {"q": _vector_literal(vec), "k": topk}
+    for i, t in enumerate(tiers):
+        params[f"city{i}"] = t.get("city")
+        params[f"lang{i}"] = t.get("lang")
+    if category:
+        params["category"] = category
+
+    out: List[List[Tuple[Dict[str, Any], float]]] = [[] for _ in tiers]
+    with engine.begin() as conn:
+        conn.execute(
+            _TUNE_ANN, {"probes": str(PGVECTOR_PROBES), "ef": str(PGVECTOR_EF_SEARCH)}
+        )
+        rows = conn.execute(text(_tiers_sql(len(tiers), category)), params).mappings()
+        for r in rows:
+            payload = {k: r[k] for k in _PAYLOAD}
+            # {"answer_it": ...} written by scripts/pretranslate_faqs.py
+            payload.update(r["translations"] or {})
+            out[r["tier"]].append((payload, float(r["score"])))
+    return out
+
+
+def search(
+    vec: List[float],
+    topk: int = 5,
+    city: Optional[str] = None,
+    lang: Optional[str] = None,
+    category: Optional[str] = None,
+) -> List[Tuple[Dict[str, Any], float]]:
+    return search_tiers(vec, [{"city": city, "lang": lang}], topk, category)[0]
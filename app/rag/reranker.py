@@ -1,5 +1,16 @@
 # app/rag/reranker.py
-from typing import List, Dict, Tuple
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+
+from prometheus_client import Counter
+
+from .embed import run_in_model_executor
+from .lexical import tokenize
+from ..utils.batching import MicroBatcher
 
 # Try to use a real cross-encoder. If not available, use a cheap lexical score.
 try:
@@ -11,16 +22,132 @@ try:
 except Exception:
     _CROSS = None
 
+# dense top-1 beating #2 by this much (cosine) is trusted without the cross-encoder
+RERANK_MARGIN = float(os.getenv("RERANK_MARGIN", "0.15"))
+# retrievers fetch topk * RERANK_OVERSAMPLE candidates when the cross-encoder is on
+RERANK_OVERSAMPLE = max(1, int(os.getenv("RERANK_OVERSAMPLE", "3")))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "8192"))
+RERANK_BATCH_MAX = int(os.getenv("RERANK_BATCH_MAX", "64"))
+RERANK_BATCH_WAIT_MS = float(os.getenv("RERANK_BATCH_WAIT_MS", "4"))
+
+rerank_runs = Counter(
+    "rerank_runs_total",
+    "Rerank calls by path (cross = cross-encoder ran)",
+    ["path"],  # cross | cached | margin | cheap
+)
+rerank_pairs = Counter("rerank_pairs_scored_total", "Pairs scored by the cross-encoder")
+
+# (query, doc key) -> cross-encoder score; written from executor threads
+_SCORES: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+_SCORES_LOCK = threading.Lock()
+
+
+def candidates(topk: int) -> int:
+    """How many hits a retriever should fetch for a final `topk`."""
+    return topk * RERANK_OVERSAMPLE if _CROSS else topk
+
 
 def _cheap_score(q: str, text: str) -> float:
     """Very simple overlap score if model not installed."""
-    q_tokens = set(q.lower().split())
-    d_tokens = set(text.lower().split())
+    q_tokens = set(tokenize(q))
+    d_tokens = set(tokenize(text))
     if not q_tokens:
         return 0.0
     return len(q_tokens & d_tokens) / (len(q_tokens) + 1e-6)
 
 
+def _text(d: Dict) -> str:
+    return f"{d.get('question','')} {d.get('answer','')}"
+
+
+def _doc_key(d: Dict) -> str:
+    # digest of the scored text, so a reindex that edits an answer misses the cache
+    return hashlib.sha1(_text(d).encode("utf-8")).hexdigest()
+
+
+def _clear_winner(docs: List[Dict]) -> bool:
+    """A pure dense list whose top hit is far enough ahead of #2."""
+    if len(docs) < 2:
+        return bool(docs)
+    colls = {(d.get("meta") or {}).get("collection") for d in docs}
+    if len(colls) != 1 or "lexical" in colls:
+        # BM25 or fused lists: scores are not cosine-comparable, and the
+        # fused order is not the score order
+        return False
+    return float(docs[0]["score"]) - float(docs[1]["score"]) >= RERANK_MARGIN
+
+
+def _cached(query: str, docs: List[Dict]) -> List[Optional[float]]:
+    with _SCORES_LOCK:
+        out = []
+        for d in docs:
+            k = (query, _doc_key(d))
+            s = _SCORES.get(k)
+            if s is not None:
+                _SCORES.move_to_end(k)
+            out.append(s)
+        return out
+
+
+def _remember(query: str, docs: List[Dict], scores: List[float]) -> None:
+    if not RERANK_CACHE_SIZE:
+        return
+    with _SCORES_LOCK:
+        for d, s in zip(docs, scores):
+            _SCORES[(query, _doc_key(d))] = s
+        while len(_SCORES) > RERANK_CACHE_SIZE:
+            _SCORES.popitem(last=False)
+
+
+def _predict(pairs: List[Tuple[str, str]]) -> List[float]:
+    rerank_pairs.inc(len(pairs))
+    return [float(s) for s in _CROSS.predict(pairs)]
+
+
+_batcher = MicroBatcher(
+    "rerank",
+    _predict,
+    max_items=RERANK_BATCH_MAX,
+    max_wait_ms=RERANK_BATCH_WAIT_MS,
+    run=run_in_model_executor,
+)
+
+
+def _plan(query: str, docs: List[Dict], topk: int):
+    """
+    Cheap paths first. Returns (final docs, None) when no model call is needed,
+    else (None, (cached scores, docs still to score)).
+    """
+    if not docs:
+        return [], None
+    if len(docs) == 1 or _clear_winner(docs):
+        rerank_runs.labels("margin").inc()
+        return docs[: max(1, topk)], None
+    if not _CROSS:
+        rerank_runs.labels("cheap").inc()
+        scored = [(_cheap_score(query, _text(d)), d) for d in docs]
+        return _top(scored, topk), None
+    cached = _cached(query, docs)
+    missing = [d for d, s in zip(docs, cached) if s is None]
+    if not missing:
+        rerank_runs.labels("cached").inc()
+        return _top(list(zip(cached, docs)), topk), None
+    rerank_runs.labels("cross").inc()
+    return None, (cached, missing)
+
+
+def _merge(query, docs, cached, missing, fresh, topk) -> List[Dict]:
+    _remember(query, missing, fresh)
+    it = iter(fresh)
+    scores = [s if s is not None else next(it) for s in cached]
+    return _top(list(zip(scores, docs)), topk)
+
+
+def _top(scored: List[Tuple[float, Dict]], topk: int) -> List[Dict]:
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [d for _, d in scored[: max(1, topk)]]
+
+
 def rerank(query: str, docs: List[Dict], topk: int = 5) -> List[Dict]:
     """
     Re-rank retrieved docs by relevance to `query`.
@@ -31,17 +158,19 @@ def rerank(query: str, docs: List[Dict], topk: int = 5) -> List[Dict]:
     returns:
       Top-k docs sorted by new score (desc).
     """
-    if not docs:
-        return []
-
-    pairs = [(query, f"{d.get('question','')} {d.get('answer','')}") for d in docs]
+    done, todo = _plan(query, docs, topk)
+    if todo is None:
+        return done
+    cached, missing = todo
+    fresh = _predict([(query, _text(d)) for d in missing])
+    return _merge(query, docs, cached, missing, fresh, topk)
 
-    if _CROSS:
-        # Higher score = better
-        scores = _CROSS.predict(pairs)
-        scored: List[Tuple[float, Dict]] = list(zip(scores, docs))
-    else:
-        scored = [(_cheap_score(query, text), d) for (_, text), d in zip(pairs, docs)]
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [d for _, d in scored[: max(1, topk)]]
+async def arerank(query: str, docs: List[Dict], topk: int = 5) -> List[Dict]:
+    """`rerank` for the event loop: pairs from concurrent requests share one predict."""
+    done, todo = _plan(query, docs, topk)
+    if todo is None:
+        return done
+    cached, missing = todo
+    fresh = await asyncio.gather(*(_batcher.submit((query, _text(d))) for d in missing))
+    return _merge(query, docs, cached, missing, list(fresh), topk)
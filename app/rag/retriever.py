@@ -1,12 +1,19 @@
 # app/rag/retriever.py
 from __future__ import annotations
+import asyncio
 import os
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple
 
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
-from .embed import embed_texts
-from .reranker import rerank
+from prometheus_client import Counter
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, QueryRequest
+from .embed import aembed_query, embed_dim, embed_query
+from .lexical import aget_lexical_index, get_lexical_index, rrf
+from .local_index import aget_local_index, get_local_index
+from .reranker import arerank, candidates, rerank
+from ..utils.data_version import aget_version, get_version
 
 CANDIDATES = [
     os.getenv("FAQ_COLLECTION") or "",  # prefer explicit if set
@@ -14,19 +21,58 @@ CANDIDATES = [
     "faqs",
 ]
 
+# QDRANT (default), LOCAL (in-process mmap index, see local_index.py) or
+# PGVECTOR (tables written by scripts/reindex_faqs.py, see pgvector_search.py)
+BACKEND = os.getenv("FAQ_BACKEND", "QDRANT").upper()
+if BACKEND == "PGVECTOR":
+    from . import pgvector_search
+
+# fuse BM25 (lexical.py, if built) with dense hits via reciprocal-rank fusion
+HYBRID_ON = os.getenv("FAQ_HYBRID", "on") == "on"
+
+lexical_shortcuts = Counter(
+    "faq_lexical_shortcut_total", "FAQ lookups answered by BM25 without dense search"
+)
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://qdrant:6333")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "on") == "on"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "30"))
+# collection/dim resolution is re-checked after this long even without a reindex
+RESOLVE_TTL_SECONDS = float(os.getenv("FAQ_RESOLVE_TTL_SECONDS", "600"))
+
+_CLIENT: Optional[QdrantClient] = None
+_ACLIENT: Optional[AsyncQdrantClient] = None
+# {"coll": str, "version": str, "at": monotonic seconds}
+_RESOLVED: Dict[str, Any] = {}
+
 
 def _client() -> QdrantClient:
-    return QdrantClient(
-        url=os.getenv("QDRANT_URL", "http://qdrant:6333"),
-        prefer_grpc=False,
-        timeout=30.0,
-    )
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = QdrantClient(
+            url=QDRANT_URL,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_port=QDRANT_GRPC_PORT,
+            timeout=QDRANT_TIMEOUT,
+        )
+    return _CLIENT
+
+
+def _aclient() -> AsyncQdrantClient:
+    global _ACLIENT
+    if _ACLIENT is None:
+        _ACLIENT = AsyncQdrantClient(
+            url=QDRANT_URL,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_port=QDRANT_GRPC_PORT,
+            timeout=QDRANT_TIMEOUT,
+        )
+    return _ACLIENT
 
 
 def _embed_dim() -> int:
-    # embed a tiny probe to get vector length used by the app
-    v = embed_texts(["_dim_probe_"])[0]
-    return len(v)
+    return embed_dim()
 
 
 def _collection_dim(cli: QdrantClient, name: str) -> Optional[int]:
@@ -39,6 +85,16 @@ def _collection_dim(cli: QdrantClient, name: str) -> Optional[int]:
         return None
 
 
+async def _acollection_dim(cli: AsyncQdrantClient, name: str) -> Optional[int]:
+    try:
+        if not await cli.collection_exists(name):
+            return None
+        info = await cli.get_collection(name)
+        return info.config.params.vectors.size  # type: ignore[attr-defined]
+    except Exception:
+        return None
+
+
 def _choose_collection(cli: QdrantClient, wanted_dim: int) -> Optional[str]:
     seen = set()
     for name in CANDIDATES:
@@ -63,6 +119,87 @@ def _choose_collection(cli: QdrantClient, wanted_dim: int) -> Optional[str]:
     return None
 
 
+async def _achoose_collection(cli: AsyncQdrantClient, wanted_dim: int) -> Optional[str]:
+    seen = set()
+    for name in CANDIDATES:
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        dim = await _acollection_dim(cli, name)
+        if dim == wanted_dim:
+            return name
+    for name in CANDIDATES:
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        try:
+            if await cli.collection_exists(name):
+                cnt = (await cli.count(name, exact=True)).count
+                if cnt and cnt > 0:
+                    return name
+        except Exception:
+            pass
+    return None
+
+
+def _fresh(version: str) -> bool:
+    return (
+        bool(_RESOLVED)
+        and _RESOLVED["version"] == version
+        and time.monotonic() - _RESOLVED["at"] < RESOLVE_TTL_SECONDS
+    )
+
+
+def resolve_collection() -> str:
+    """Collection to search; resolved once, refreshed on reindex ("faq" version) or TTL."""
+    version = get_version("faq")
+    if not _fresh(version):
+        coll = _choose_collection(_client(), _embed_dim()) or "faqs_v1"
+        _RESOLVED.update(coll=coll, version=version, at=time.monotonic())
+    return _RESOLVED["coll"]
+
+
+async def aresolve_collection() -> str:
+    version = await aget_version("faq")
+    if not _fresh(version):
+        coll = await _achoose_collection(_aclient(), _embed_dim()) or "faqs_v1"
+        _RESOLVED.update(coll=coll, version=version, at=time.monotonic())
+    return _RESOLVED["coll"]
+
+
+def warm_up() -> None:
+    """Load the embedder and resolve the collection before the first request."""
+    try:
+        if BACKEND == "LOCAL":
+            idx = get_local_index(get_version("faq"))
+            embed_dim()
+            print(f"[retriever] using local index ({idx.count} FAQs)")
+            return
+        if BACKEND == "PGVECTOR":
+            embed_dim()
+            print("[retriever] using pgvector (faqs/faqs_vec)")
+            return
+        print(f"[retriever] using collection {resolve_collection()}")
+    except Exception as e:
+        print(f"[retriever] warm-up failed: {e}")
+
+
+async def aclose() -> None:
+    global _CLIENT, _ACLIENT
+    if _ACLIENT is not None:
+        await _ACLIENT.close()
+        _ACLIENT = None
+    if _CLIENT is not None:
+        _CLIENT.close()
+        _CLIENT = None
+
+
+def _norm_lang(lang: Optional[str]) -> Optional[str]:
+    if not lang:
+        return None
+    return str(lang).strip().lower() or None
+
+
 def _build_filter(
     city: Optional[str], category: Optional[str], lang: Optional[str]
 ) -> Optional[Filter]:
@@ -73,13 +210,135 @@ def _build_filter(
             must.append(FieldCondition(key="city", match=MatchValue(value=city)))
     if category:
         must.append(FieldCondition(key="category", match=MatchValue(value=category)))
-    if lang:
-        lang_norm = str(lang).strip().lower()
-        if lang_norm:
-            must.append(FieldCondition(key="lang", match=MatchValue(value=lang_norm)))
+    lang_norm = _norm_lang(lang)
+    if lang_norm:
+        must.append(FieldCondition(key="lang", match=MatchValue(value=lang_norm)))
     return Filter(must=must) if must else None
 
 
+def _direct_tiers(
+    vec: List[float],
+    tiers: List[Dict[str, Any]],
+    topk: int,
+    category: Optional[str],
+    version: str,
+) -> List[List[Dict[str, Any]]]:
+    """Hits per tier from the LOCAL or PGVECTOR backend."""
+    if BACKEND != "PGVECTOR":
+        return _local_tiers(get_local_index(version), vec, tiers, topk, category)
+    res = pgvector_search.search_tiers(vec, tiers, topk, category)
+    return [[_payload_hit(p, score, "pgvector") for p, score in tier] for tier in res]
+
+
+def _local_tiers(
+    idx, vec: List[float], tiers: List[Dict[str, Any]], topk: int, category
+) -> List[List[Dict[str, Any]]]:
+    res = [
+        idx.search(vec, topk, city=t["city"], lang=t["lang"], category=category)
+        for t in tiers
+    ]
+    return [[_payload_hit(p, score, "local") for p, score in tier] for tier in res]
+
+
+def _dense_tiers(
+    vec: List[float],
+    tiers: List[Dict[str, Any]],
+    topk: int,
+    category: Optional[str],
+    version: str,
+) -> List[List[Dict[str, Any]]]:
+    if BACKEND != "QDRANT":
+        return _direct_tiers(vec, tiers, topk, category, version)
+    coll = resolve_collection()
+    try:
+        responses = _client().query_batch_points(
+            collection_name=coll, requests=_tier_requests(vec, tiers, topk, category)
+        )
+    except Exception as e:
+        print(f"[retriever] batch search failed in {coll}: {e}")
+        return [[] for _ in tiers]
+    return [_to_hits(resp.points, coll) for resp in responses]
+
+
+async def _adense_tiers(
+    vec: List[float],
+    tiers: List[Dict[str, Any]],
+    topk: int,
+    category: Optional[str],
+    version: str,
+) -> List[List[Dict[str, Any]]]:
+    if BACKEND == "PGVECTOR":
+        # sync SQLAlchemy pool; keep it off the event loop
+        return await asyncio.to_thread(
+            _direct_tiers, vec, tiers, topk, category, version
+        )
+    if BACKEND == "LOCAL":
+        # the (re)load reads from disk; the search itself is a short matmul
+        idx = await aget_local_index(version)
+        return _local_tiers(idx, vec, tiers, topk, category)
+    coll = await aresolve_collection()
+    try:
+        responses = await _aclient().query_batch_points(
+            collection_name=coll, requests=_tier_requests(vec, tiers, topk, category)
+        )
+    except Exception as e:
+        print(f"[retriever] batch search failed in {coll}: {e}")
+        return [[] for _ in tiers]
+    return [_to_hits(resp.points, coll) for resp in responses]
+
+
+def _lexical_tiers(
+    query: str,
+    tiers: List[Dict[str, Any]],
+    topk: int,
+    category: Optional[str],
+    lex,
+) -> Tuple[List[List[Dict[str, Any]]], bool]:
+    """BM25 hits per tier from `lex`, and whether tier 0 has a confident exact hit."""
+    if lex is None:
+        return [[] for _ in tiers], False
+    per_tier, confident = [], False
+    for i, t in enumerate(tiers):
+        ranked = lex.search(
+            query, topk, city=t["city"], lang=t["lang"], category=category
+        )
+        if i == 0:
+            confident = lex.confident(query, ranked)
+        per_tier.append([_payload_hit(lex.row(d), sc, "lexical") for d, sc in ranked])
+    return per_tier, confident
+
+
+def _hit_key(h: Dict[str, Any]) -> str:
+    doc_id = (h.get("meta") or {}).get("id")
+    return f"id:{doc_id}" if doc_id is not None else f"q:{h.get('question')}"
+
+
+def _fuse(dense: List[Dict[str, Any]], lexical: List[Dict[str, Any]]):
+    """Reciprocal-rank fusion of dense and BM25 hits (dense payload wins on ties)."""
+    if not lexical or not dense:
+        return dense or lexical
+    by_key = {_hit_key(h): h for h in lexical}
+    by_key.update({_hit_key(h): h for h in dense})
+    order = rrf([_hit_key(h) for h in dense], [_hit_key(h) for h in lexical])
+    return [by_key[k] for k in order]
+
+
+def _pick(
+    dense: List[List[Dict[str, Any]]], lexical: List[List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Fused hits of the first tier where either side found something."""
+    for d, lx in zip(dense, lexical):
+        if d or lx:
+            return _fuse(d, lx)
+    return []
+
+
+def _prepare_tiers(tiers: List[Dict[str, Optional[str]]]) -> List[Dict[str, Any]]:
+    return [
+        {"city": t["city"], "lang": _norm_lang(t["lang"])} for t in _dedupe_tiers(tiers)
+    ]
+
+
 def retrieve(
     query: str,
     topk: int = 5,
@@ -87,40 +346,126 @@ def retrieve(
     category: Optional[str] = None,
     lang: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    if not query or not query.strip():
-        return []
+    return retrieve_tiered(query, [{"city": city, "lang": lang}], topk, category)
+
+
+async def aretrieve(
+    query: str,
+    topk: int = 5,
+    city: Optional[str] = None,
+    category: Optional[str] = None,
+    lang: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Async twin of `retrieve`: network I/O awaits, model calls run in the executor."""
+    return await aretrieve_tiered(query, [{"city": city, "lang": lang}], topk, category)
 
-    cli = _client()
-    want = _embed_dim()
-    coll = _choose_collection(cli, want) or "faqs_v1"
 
-    vec = embed_texts([query.strip()])[0]
-    qfilter = _build_filter(city, category, lang)
+def _dedupe_tiers(tiers: List[Dict[str, Optional[str]]]) -> List[Dict[str, Any]]:
+    out, seen = [], set()
+    for t in tiers:
+        key = (t.get("city") or None, t.get("lang") or None)
+        if key not in seen:
+            seen.add(key)
+            out.append({"city": key[0], "lang": key[1]})
+    return out
 
-    try:
-        res = cli.search(
-            collection_name=coll, query_vector=vec, limit=topk, query_filter=qfilter
+
+def _tier_requests(
+    vec: List[float], tiers: List[Dict[str, Any]], topk: int, category: Optional[str]
+) -> List[QueryRequest]:
+    return [
+        QueryRequest(
+            query=vec,
+            filter=_build_filter(t["city"], category, t["lang"]),
+            limit=topk,
+            with_payload=True,
         )
-    except Exception as e:
-        print(f"[retriever] search failed in {coll}: {e}")
+        for t in tiers
+    ]
+
+
+def retrieve_tiered(
+    query: str,
+    tiers: List[Dict[str, Optional[str]]],
+    topk: int = 5,
+    category: Optional[str] = None,
+    use_rerank: bool = True,
+    vec: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search several filter relaxations (e.g. city+lang -> lang -> none) in ONE
+    batched request with one query vector; fuse with BM25 (if built), rerank
+    and return the first non-empty tier. A confident exact BM25 hit in the
+    first tier skips the dense search entirely. `use_rerank=False` returns the
+    fused order as-is (callers short on time). Pass `vec` when the query is
+    already embedded (GraphState.query_vec).
+    """
+    if not query or not query.strip() or not tiers:
         return []
 
-    hits: List[Dict[str, Any]] = []
+    tiers = _prepare_tiers(tiers)
+    version = get_version("faq")
+    n = candidates(topk) if use_rerank else topk  # the reranker cuts back to topk
+    lex = get_lexical_index(version) if HYBRID_ON else None
+    lexical, confident = _lexical_tiers(query, tiers, n, category, lex)
+    if confident:
+        lexical_shortcuts.inc()
+        hits = lexical[0]
+    else:
+        vec = vec or embed_query(query)
+        hits = _pick(_dense_tiers(vec, tiers, n, category, version), lexical)
+    return rerank(query, hits, topk=topk) if use_rerank else hits[:topk]
+
+
+async def aretrieve_tiered(
+    query: str,
+    tiers: List[Dict[str, Optional[str]]],
+    topk: int = 5,
+    category: Optional[str] = None,
+    use_rerank: bool = True,
+    vec: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    if not query or not query.strip() or not tiers:
+        return []
+
+    tiers = _prepare_tiers(tiers)
+    version = await aget_version("faq")
+    n = candidates(topk) if use_rerank else topk
+    lex = await aget_lexical_index(version) if HYBRID_ON else None
+    lexical, confident = _lexical_tiers(query, tiers, n, category, lex)
+    if confident:
+        lexical_shortcuts.inc()
+        hits = lexical[0]
+    else:
+        vec = vec or await aembed_query(query)
+        hits = _pick(await _adense_tiers(vec, tiers, n, category, version), lexical)
+    return await arerank(query, hits, topk) if use_rerank else hits[:topk]
+
+
+def _payload_hit(payload: Dict[str, Any], score: float, coll: str) -> Dict[str, Any]:
+    hit = {
+        "question": payload.get("question"),
+        "answer": payload.get("answer"),
+        "score": float(score),
+        "meta": {
+            "id": payload.get("id"),
+            "category": payload.get("category"),
+            "city": payload.get("city"),
+            "lang": payload.get("lang"),
+            "collection": coll,
+        },
+    }
+    # pre-translated answers (scripts/pretranslate_faqs.py)
+    hit.update((k, v) for k, v in payload.items() if k.startswith("answer_") and v)
+    return hit
+
+
+def _to_hits(res, coll: str) -> List[Dict[str, Any]]:
+    hits = []
     for p in res:
         payload = p.payload or {}
-        hits.append(
-            {
-                "question": payload.get("question"),
-                "answer": payload.get("answer"),
-                "score": float(p.score),
-                "meta": {
-                    "id": payload.get("id"),
-                    "category": payload.get("category"),
-                    "city": payload.get("city"),
-                    "lang": payload.get("lang"),
-                    "collection": coll,
-                },
-            }
-        )
-
-    return rerank(query, hits, topk=topk)
+        if payload.get("id") is None:
+            # older reindex_faqs.py collections keep the FAQ id in the point id
+            payload = {**payload, "id": p.id}
+        hits.append(_payload_hit(payload, p.score, coll))
+    return hits
@@ -1,6 +1,6 @@
 from typing import List, Optional
 from sqlmodel import select
-from sqlalchemy import cast, Numeric, func, String
+from sqlalchemy import cast, Numeric, func, String, text
 from ..db import get_session
 from ..models import RoomRate, Hotel
 
@@ -12,8 +12,16 @@ class RoomsRepo:
         max_price: Optional[float] = None,
         occupancy: Optional[int] = None,
         topk: int = 5,
+        timeout: Optional[float] = None,
+        exact_city: bool = False,
     ) -> List[dict]:
         with get_session() as session:
+            if timeout is not None and session.bind.dialect.name == "postgresql":
+                # the caller stops waiting at its deadline; make Postgres stop too
+                session.execute(
+                    text("SELECT set_config('statement_timeout', :ms, true)"),
+                    {"ms": str(max(1, int(timeout * 1000)))},
+                )
             # Safe for NUMERIC or TEXT columns:
             # cast -> strip -> nullif -> cast back to NUMERIC
             price_expr = cast(
@@ -26,11 +34,14 @@ class RoomsRepo:
                 Numeric,
             )
 
-            q = (
-                select(RoomRate, Hotel, price_expr.label("price_num"))
-                .join(Hotel, Hotel.hotel_id == RoomRate.hotel_id)
-                .where(Hotel.city.ilike(f"%{city}%"))
+            q = select(RoomRate, Hotel, price_expr.label("price_num")).join(
+                Hotel, Hotel.hotel_id == RoomRate.hotel_id
             )
+            if exact_city:
+                # canonical hotels.city value (graph/cities.py): indexed equality
+                q = q.where(Hotel.city == city)
+            else:
+                q = q.where(Hotel.city.ilike(f"%{city}%"))
             if max_price is not None:
                 q = q.where(price_expr <= max_price)
             if occupancy is not None:
@@ -0,0 +1,112 @@
+# scripts/bench_faq_backends.py
+"""
+Latency + recall@k of the FAQ backends against exact (brute-force) search.
+
+    python -m app.scripts.bench_faq_backends --input data/faqs.jsonl \
+        --queries 200 --topk 5 --backends qdrant,pgvector,local
+
+Ground truth is exact cosine top-k over the embedded corpus questions; each
+backend is timed on the search call only (query vectors are precomputed).
+Queries are corpus questions, lower-cased and with the last word dropped, so
+they are close to - but not identical to - indexed text.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from app.rag.embed import embed_texts
+from app.rag.index_faqs import load_jsonl
+from app.scripts.bench_utils import pct
+
+
+def _perturb(q: str) -> str:
+    words = q.lower().rstrip("?").split()
+    return " ".join(words[:-1] if len(words) > 3 else words)
+
+
+def _qdrant(topk: int) -> Callable[[List[float]], List[str]]:
+    from app.rag import retriever
+
+    coll = retriever.resolve_collection()
+    cli = retriever._client()
+
+    def run(vec):
+        res = cli.query_points(collection_name=coll, query=vec, limit=topk).points
+        # reindex_faqs.py keeps the FAQ id in the point id, not the payload
+        return [str((p.payload or {}).get("id", p.id)) for p in res]
+
+    return run
+
+
+def _pgvector(topk: int) -> Callable[[List[float]], List[str]]:
+    from app.rag import pgvector_search
+
+    def run(vec):
+        return [str(p["id"]) for p, _ in pgvector_search.search(vec, topk)]
+
+    return run
+
+
+def _local(topk: int) -> Callable[[List[float]], List[str]]:
+    from app.rag.local_index import LocalIndex
+
+    idx = LocalIndex.load()
+
+    def run(vec):
+        return [str(p["id"]) for p, _ in idx.search(vec, topk)]
+
+    return run
+
+
+BACKENDS = {"qdrant": _qdrant, "pgvector": _pgvector, "local": _local}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark FAQ retrieval backends")
+    ap.add_argument("--input", default=os.getenv("FAQ_JSONL", "data/faqs.jsonl"))
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--topk", type=int, default=5)
+    ap.add_argument("--backends", default="qdrant,pgvector,local")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    docs = list(load_jsonl(args.input))
+    ids = [str(d.get("id")) for d in docs]
+    print(f"[bench] embedding {len(docs)} corpus questions for ground truth…")
+    corpus = np.asarray(embed_texts([d["question"] for d in docs]), dtype=np.float32)
+
+    random.seed(args.seed)
+    sample = random.sample(docs, min(args.queries, len(docs)))
+    qvecs = embed_texts([_perturb(d["question"]) for d in sample])
+    truth = []
+    for v in qvecs:
+        scores = corpus @ np.asarray(v, dtype=np.float32)
+        truth.append({ids[i] for i in np.argsort(-scores)[: args.topk]})
+
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'recall@k':>9}")
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            run = BACKENDS[name](args.topk)
+            run(qvecs[0])  # warm connection / page cache
+        except Exception as e:
+            print(f"{name:<10} skipped: {e}")
+            continue
+        lat, rec = [], []
+        for v, gt in zip(qvecs, truth):
+            t0 = time.perf_counter()
+            got = run(v)
+            lat.append((time.perf_counter() - t0) * 1000)
+            rec.append(len(gt & set(got)) / max(1, len(gt)))
+        print(
+            f"{name:<10} {pct(lat, .5):8.2f} {pct(lat, .95):8.2f} "
+            f"{statistics.mean(lat):8.2f} {statistics.mean(rec):9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# scripts/bench_lang.py
+"""
+Accuracy + latency of language detection (app/utils/lang.py) vs langdetect.
+
+    python -m app.scripts.bench_lang --input data/faqs.jsonl --repeat 5
+
+Labelled samples are the built-in short guest messages below plus, with
+--input, every FAQ question (en) and its pre-translated answers
+(`answer_<lang>`, see app/scripts/pretranslate_faqs.py). Latency is per call
+on a cold cache (first pass) and a warm one.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, List, Tuple
+
+from app.rag.index_faqs import load_jsonl
+from app.utils import lang as lang_mod
+
+SAMPLES: List[Tuple[str, str]] = [
+    ("en", "Is breakfast included?"),
+    ("en", "Do you have parking?"),
+    ("en", "What time is check-in?"),
+    ("en", "Can I bring my dog?"),
+    ("en", "Rooms in Rome under 150 for 2 people"),
+    ("en", "Is there a pool at the hotel?"),
+    ("en", "How far is the hotel from the station?"),
+    ("it", "La colazione è inclusa?"),
+    ("it", "Avete il parcheggio?"),
+    ("it", "A che ora è il check-in?"),
+    ("it", "Posso portare il mio cane?"),
+    ("it", "Camere a Roma sotto 150 per 2 persone"),
+    ("it", "C'è una piscina?"),
+    ("it", "Quanto costa una camera doppia?"),
+    ("fr", "Le petit-déjeuner est-il inclus ?"),
+    ("fr", "Avez-vous un parking ?"),
+    ("fr", "À quelle heure est l'enregistrement ?"),
+    ("fr", "Puis-je amener mon chien ?"),
+    ("fr", "Chambres à Paris pour 2 personnes"),
+    ("fr", "Y a-t-il une piscine ?"),
+    ("fr", "Combien coûte une chambre double ?"),
+    ("es", "¿El desayuno está incluido?"),
+    ("es", "¿Tienen aparcamiento?"),
+    ("es", "¿A qué hora es el check-in?"),
+    ("es", "¿Puedo llevar a mi perro?"),
+    ("es", "Habitaciones en Madrid para 2 personas"),
+    ("es", "¿Hay piscina en el hotel?"),
+    ("es", "¿Cuánto cuesta una habitación doble?"),
+    ("de", "Ist das Frühstück inklusive?"),
+    ("de", "Haben Sie einen Parkplatz?"),
+    ("de", "Wann ist der Check-in?"),
+    ("de", "Kann ich meinen Hund mitbringen?"),
+    ("de", "Zimmer in Berlin für 2 Personen"),
+    ("de", "Gibt es einen Pool?"),
+    ("de", "Wie viel kostet ein Doppelzimmer?"),
+    ("ar", "هل الإفطار مشمول؟"),
+    ("ru", "Завтрак включен?"),
+    ("zh", "含早餐吗？"),
+    ("ja", "朝食は含まれていますか？"),
+]
+
+
+def load_samples(path: str) -> List[Tuple[str, str]]:
+    out = list(SAMPLES)
+    if not path or not os.path.exists(path):
+        return out
+    for d in load_jsonl(path):
+        if d.get("question"):
+            out.append(("en", d["question"]))
+        for k, v in d.items():
+            if k.startswith("answer_") and v:
+                out.append((k[len("answer_") :], v))
+    return out
+
+
+def _langdetect(text: str) -> str:
+    return lang_mod._langdetect(lang_mod.normalize(text)) or "en"
+
+
+def _clear() -> None:
+    lang_mod._heuristic.cache_clear()
+    lang_mod._langdetect.cache_clear()
+
+
+def run(name: str, fn: Callable[[str], str], samples, repeat: int) -> None:
+    _clear()
+    fn("warm up")  # langdetect loads its profiles here
+    _clear()
+    cold, warm, hits = [], [], 0
+    for i in range(repeat):
+        for want, text in samples:
+            t0 = time.perf_counter()
+            got = fn(text)
+            (cold if i == 0 else warm).append((time.perf_counter() - t0) * 1e6)
+            hits += i == 0 and got == want
+    print(
+        f"{name:<12} {hits / len(samples):9.3f} {statistics.mean(cold):10.1f} "
+        f"{statistics.mean(warm or cold):10.1f}"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark language detection")
+    ap.add_argument("--input", default=os.getenv("FAQ_JSONL", "data/faqs.jsonl"))
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    samples = load_samples(args.input)
+    print(f"[bench] {len(samples)} labelled samples")
+    print(f"{'detector':<12} {'accuracy':>9} {'cold µs':>10} {'warm µs':>10}")
+    run("detect_lang", lang_mod.detect_lang, samples, args.repeat)
+    run("langdetect", _langdetect, samples, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
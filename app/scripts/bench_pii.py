@@ -0,0 +1,67 @@
+# scripts/bench_pii.py
+"""
+Worst-case latency of the PII scanner (app/utils/pii.py).
+
+    python -m app.scripts.bench_pii --size 10000 --repeat 20 --max-ms 20
+
+Runs `redact` on adversarial inputs (long digit runs, separator runs, a long
+local part with no domain, a 10KB chat message with real PII) and exits
+non-zero if any p95 exceeds --max-ms, so it can guard CI against patterns
+that start backtracking again.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Dict
+
+from app.scripts.bench_utils import pct
+from app.utils.pii import redact
+
+
+def cases(size: int) -> Dict[str, str]:
+    msg = "Hi, I'd like a double room in Paris for 2 nights. "
+    pii = "Mail me at jane.doe@example.com or call 06 1234 5678, card 4111 1111 1111 1111. "
+    return {
+        "digit_run": "1" * size,
+        "spaced_digits": "1 " * (size // 2),
+        "dashed_digits": "1-" * (size // 2),
+        "separator_runs": "1 - " * (size // 4),
+        "digits_then_letter": "4" * (size - 1) + "x",
+        "local_part_no_domain": "a" * (size - 1) + "@",
+        "at_signs": "a@" * (size // 2),
+        "dotted_domain": "a@" + "b." * (size // 2),
+        "chat_message": (msg * 4 + pii) * (size // (len(msg) * 4 + len(pii)) + 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the PII scanner")
+    ap.add_argument("--size", type=int, default=10_000, help="input length (chars)")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--max-ms", type=float, default=20.0, help="p95 budget per case")
+    args = ap.parse_args()
+
+    print(f"{'case':<22} {'chars':>7} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    slow = []
+    for name, text in cases(args.size).items():
+        lat = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            redact(text)
+            lat.append((time.perf_counter() - t0) * 1000)
+        p95 = pct(lat, 0.95)
+        print(
+            f"{name:<22} {len(text):7d} {pct(lat, .5):8.2f} {p95:8.2f} "
+            f"{statistics.mean(lat):8.2f}"
+        )
+        if p95 > args.max_ms:
+            slow.append(name)
+    if slow:
+        print(f"[bench] over {args.max_ms} ms: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# scripts/bench_router.py
+"""
+Per-message cost of the router's intent/slot extraction (app/graph/extract.py),
+with the previous five-regex chain as a reference point.
+
+    python -m app.scripts.bench_router --repeat 200
+
+The two do not do the same work: the chain only read the English intent,
+city, budget and guests, while the extractor also reads dates and the other
+languages' keyword tables. It is slower on ordinary messages (about 2x on
+questions, 3x on requests with dates and guests); what it buys is the
+"adversarial" row, "in a in a ... 1", where the old lazy CITY_RE rescans to
+the end from every "in" (quadratic). The "10KB" rows repeat the corpus into
+long inputs.
+"""
+
+import argparse
+import re
+import statistics
+import time
+from typing import Callable, List, Tuple
+
+from app.graph.extract import automaton, extract
+
+CORPUS: List[Tuple[str, str]] = [
+    ("en", "show rooms in Paris under 120 for 2"),
+    ("en", "Do you have a double room in Rome from 12/05 to 15/05?"),
+    ("en", "What time is check-in?"),
+    ("en", "Is breakfast included?"),
+    ("en", "I need a room in New York for 3 people, check-in May 12th"),
+    ("en", "cheapest option in Milan below 90 please"),
+    ("en", "what's your refund policy"),
+    ("en", "hi"),
+    ("it", "Camere a Roma sotto 150 per 2 persone dal 3 al 5 maggio"),
+    ("it", "Quali sono gli orari di check-in?"),
+    ("it", "avete il parcheggio?"),
+    ("fr", "Une chambre à Paris pour 2 personnes du 12 au 14 juin"),
+    ("fr", "Le petit-déjeuner est-il inclus ?"),
+    ("es", "Habitación en Madrid para 2 personas del 3 al 5 de mayo"),
+    ("es", "¿Cuál es la política de cancelación?"),
+    ("de", "Zimmer in Berlin für 2 Personen vom 12. bis 14. Juni unter 150"),
+    ("de", "Gibt es einen Parkplatz?"),
+]
+
+# the router before the single-pass extractor
+LEGACY = [
+    re.compile(r"\b(room|rooms|book|price|rate|option|deal|availability)\b", re.I),
+    re.compile(
+        r"\b(check[- ]?in|policy|refund|breakfast|parking|wifi|faq|question)\b", re.I
+    ),
+    re.compile(
+        r"\b(?:in|at)\s+([A-Za-z][A-Za-z\s\-]+?)(?=\s+(?:under|below|max(?:imum)?"
+        r"|for|with|from|on|to|by)\b|[,.!?]|$)",
+        re.I,
+    ),
+    re.compile(r"\b(?:under|below|max(?:imum)?)\s+(\d+(?:\.\d+)?)\b", re.I),
+    re.compile(r"\bfor\s+(\d+)\s*(?:people|guests)?\b", re.I),
+]
+
+
+def legacy(text: str, lang: str) -> None:
+    for rx in LEGACY:
+        rx.search(text)
+
+
+def single_pass(text: str, lang: str) -> None:
+    extract(text, lang)
+
+
+def _long(text: str) -> str:
+    # no punctuation, so the old city pattern scans to the end from every "in"
+    words = re.sub(r"[^\w\s]", "", text)
+    return " ".join([words] * (10_000 // (len(words) + 1) + 1))[:10_000]
+
+
+def run(name: str, fn: Callable[[str, str], None], rows, repeat: int) -> None:
+    per_msg = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for lang, text in rows:
+            fn(text, lang)
+        per_msg.append((time.perf_counter() - t0) * 1e6 / len(rows))
+    print(f"{name:<22} {statistics.median(per_msg):10.1f} {min(per_msg):10.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark router extraction")
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    for lang in {lang for lang, _ in CORPUS}:
+        automaton(("en",) if lang == "en" else ("en", lang))  # built once per process
+    long_rows = [(lang, _long(text)) for lang, text in CORPUS if " in " in text]
+
+    print(
+        f"{'extractor / corpus':<22} {'median µs':>10} {'best µs':>10}  (per message)"
+    )
+    run("legacy / short", legacy, CORPUS, args.repeat)
+    run("single-pass / short", single_pass, CORPUS, args.repeat)
+    run("legacy / 10KB", legacy, long_rows, max(1, args.repeat // 20))
+    run("single-pass / 10KB", single_pass, long_rows, max(1, args.repeat // 20))
+    adversarial = [("en", "in a " * 2000 + "1")]
+    run("legacy / adversarial", legacy, adversarial, 1)
+    run("single-pass / advers.", single_pass, adversarial, 1)
+
+
+if __name__ == "__main__":
+    main()
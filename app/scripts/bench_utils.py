@@ -0,0 +1,10 @@
+# scripts/bench_utils.py
+"""Helpers shared by the bench_* scripts."""
+
+from typing import List
+
+
+def pct(xs: List[float], p: float) -> float:
+    """Nearest-rank percentile, p in [0, 1]."""
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p * (len(xs) - 1))))]
@@ -11,6 +11,8 @@ from qdrant_client.http.models import Distance, VectorParams, PointStruct
 # - expected: embed_texts(List[str]) -> List[List[float]]
 # - located at app/rag/embed.py
 from app.rag.embed import embed_texts
+from app.rag.lexical import build_lexical_index
+from app.utils.data_version import bump_version
 
 
 def load_jsonl(path: str) -> List[Dict]:
@@ -98,6 +100,8 @@ def main():
     # Count
     cnt = client.count(coll, exact=True).count
     print(f"[index] done. collection={coll} count={cnt}")
+    build_lexical_index(docs)
+    bump_version("faq")
 
 
 if __name__ == "__main__":
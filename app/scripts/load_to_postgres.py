@@ -4,6 +4,8 @@ import json
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 
+from app.utils.data_version import bump_version
+
 load_dotenv()
 pg = (
     f"postgresql://{os.getenv('POSTGRES_USER','chatbi')}:"
@@ -156,6 +158,7 @@ def load_policies(path):
 
 if __name__ == "__main__":
     load_hotels("data/chatbi_hotels.csv")
+    bump_version("hotels")  # running workers rebuild their city gazetteer
     load_rates("data/room_rates.csv")
     load_policies("data/policy.csv")
     print("Loaded hotels, rates, policies.")
@@ -0,0 +1,261 @@
+# scripts/pretranslate_faqs.py
+"""
+Pre-generate localized FAQ answers so generator_node can skip the LLM.
+
+    python -m app.scripts.pretranslate_faqs --langs it,fr,es,de [--concurrency 4]
+
+1. Translates every (FAQ, language) pair missing from the checkpoint with
+   Ollama, at most --concurrency requests in flight. Each result is appended to
+   the checkpoint JSONL as soon as it arrives, so an interrupted run resumes
+   where it stopped. Pairs whose English answer changed are translated again.
+2. Writes all checkpointed translations into the active backend as
+   `answer_<lang>`: Qdrant payload (batched set_payload), pgvector `faqs.translations`
+   (JSONB), or the LOCAL / BM25 payload columns; then bumps the "faq" version.
+
+Re-run it after every reindex: step 1 is then a no-op and step 2 restores the
+payload fields the reindex overwrote.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from app.llm.ollama_client import achat, aclose
+from app.rag.index_faqs import load_jsonl
+from app.utils.data_version import bump_version
+
+BACKEND = os.getenv("FAQ_BACKEND", "QDRANT").upper()
+FAQ_JSONL = os.getenv("FAQ_JSONL", "data/faqs.jsonl")
+PRETRANSLATE_LANGS = os.getenv("PRETRANSLATE_LANGS", "it,fr,es,de")
+CHECKPOINT = os.getenv("PRETRANSLATE_CHECKPOINT", "data/faq_translations.jsonl")
+# set_payload operations per Qdrant batch_update_points request
+PAYLOAD_BATCH = int(os.getenv("PRETRANSLATE_PAYLOAD_BATCH", "256"))
+
+SYSTEM = (
+    "You are a professional translator for hotel FAQs. Keep facts, numbers and "
+    "times unchanged. Respond with the translation only."
+)
+
+# {(faq id, lang): {"src": sha1 of the English answer, "text": translation}}
+Done = Dict[Tuple[str, str], Dict[str, str]]
+
+
+def _src_hash(answer: str) -> str:
+    return hashlib.sha1((answer or "").encode("utf-8")).hexdigest()[:16]
+
+
+def load_checkpoint(path: str) -> Done:
+    done: Done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            done[(str(r["id"]), r["lang"])] = {"src": r["src"], "text": r["text"]}
+    return done
+
+
+async def translate_missing(
+    rows: List[Dict[str, Any]],
+    langs: List[str],
+    done: Done,
+    path: str,
+    concurrency: int,
+) -> int:
+    todo = [
+        (r, lang)
+        for r in rows
+        for lang in langs
+        if lang != (r.get("lang") or "en")
+        and (done.get((str(r["id"]), lang)) or {}).get("src") != _src_hash(r["answer"])
+    ]
+    print(f"[pretranslate] {len(todo)} translations to generate")
+    sem = asyncio.Semaphore(max(1, concurrency))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    ok = 0
+
+    with open(path, "a", encoding="utf-8") as out:
+
+        async def one(r: Dict[str, Any], lang: str) -> None:
+            nonlocal ok
+            msgs = [
+                {"role": "system", "content": SYSTEM},
+                {
+                    "role": "user",
+                    "content": f"Target language: {lang}\n\n{r['answer']}",
+                },
+            ]
+            async with sem:
+                try:
+                    text = (await achat(msgs)).strip()
+                except Exception as e:
+                    print(f"[pretranslate] {r['id']}/{lang} failed: {e}")
+                    return
+            if not text:
+                return
+            rec = {"id": str(r["id"]), "lang": lang, "src": _src_hash(r["answer"])}
+            done[(rec["id"], lang)] = {"src": rec["src"], "text": text}
+            out.write(json.dumps({**rec, "text": text}, ensure_ascii=False) + "\n")
+            out.flush()
+            ok += 1
+            if ok % 50 == 0:
+                print(f"[pretranslate] {ok}/{len(todo)}")
+
+        await asyncio.gather(*(one(r, lang) for r, lang in todo))
+    return ok
+
+
+def _by_id(rows: List[Dict[str, Any]], done: Done) -> Dict[str, Dict[str, str]]:
+    """{faq id: {"answer_it": ..., ...}} for translations of the current answers."""
+    current = {str(r["id"]): _src_hash(r["answer"]) for r in rows}
+    out: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for (fid, lang), t in done.items():
+        if current.get(fid) == t["src"]:
+            out[fid][f"answer_{lang}"] = t["text"]
+    return out
+
+
+# ---------------- writers ----------------
+def write_qdrant(trans: Dict[str, Dict[str, str]], collection: str = "") -> None:
+    from qdrant_client.http.models import SetPayload, SetPayloadOperation
+
+    from app.rag import retriever
+
+    cli = retriever._client()
+    coll = collection or retriever.resolve_collection()
+    # index_faqs uses sequential point ids with the FAQ id in the payload,
+    # reindex_faqs uses the FAQ id as point id
+    points: Dict[str, Any] = {}
+    offset = None
+    while True:
+        batch, offset = cli.scroll(
+            coll, limit=1000, offset=offset, with_payload=["id"], with_vectors=False
+        )
+        for p in batch:
+            points[str((p.payload or {}).get("id", p.id))] = p.id
+        if offset is None:
+            break
+    ops = [
+        SetPayloadOperation(
+            set_payload=SetPayload(payload=fields, points=[points[fid]])
+        )
+        for fid, fields in trans.items()
+        if fid in points
+    ]
+    # one request per chunk; waiting on the last one means every earlier
+    # update is applied too (updates are applied in order)
+    for i in range(0, len(ops), PAYLOAD_BATCH):
+        cli.batch_update_points(
+            coll,
+            update_operations=ops[i : i + PAYLOAD_BATCH],
+            wait=i + PAYLOAD_BATCH >= len(ops),
+        )
+    print(f"[QDRANT] translations set on {len(ops)} points in '{coll}'")
+
+
+def write_pgvector(trans: Dict[str, Dict[str, str]]) -> None:
+    from sqlalchemy import text
+
+    from app.db import engine
+
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "ALTER TABLE faqs ADD COLUMN IF NOT EXISTS "
+                "translations JSONB NOT NULL DEFAULT '{}'::jsonb"
+            )
+        )
+        conn.execute(
+            text(
+                "UPDATE faqs SET translations = translations || CAST(:t AS JSONB) "
+                "WHERE id = :id"
+            ),
+            [
+                {"id": fid, "t": json.dumps(fields, ensure_ascii=False)}
+                for fid, fields in trans.items()
+            ],
+        )
+    print(f"[PGVECTOR] translations set on {len(trans)} rows")
+
+
+def _patch_columns(payload: Dict[str, List[Any]], trans: Dict[str, Dict[str, str]]):
+    ids = [str(i) for i in payload.get("id") or []]
+    for field in sorted({k for fields in trans.values() for k in fields}):
+        payload[field] = [trans.get(i, {}).get(field) for i in ids]
+
+
+def write_columnar(trans: Dict[str, Dict[str, str]]) -> None:
+    """LOCAL payload.json and the BM25 index share the columnar payload layout."""
+    from app.rag.lexical import FAQ_LEXICAL_PATH
+    from app.rag.local_index import FAQ_LOCAL_DIR
+
+    targets = [(os.path.join(FAQ_LOCAL_DIR, "payload.json"), None)]
+    targets += [(FAQ_LEXICAL_PATH, "payload")]
+    for path, key in targets:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        _patch_columns(data[key] if key else data, trans)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        print(f"[pretranslate] translations written to {path}")
+
+
+async def amain(args) -> None:
+    rows = []
+    for r in load_jsonl(args.input):
+        if r.get("id") is None:
+            # translations are keyed by FAQ id; without one there is nowhere
+            # to write them back
+            print(f"[pretranslate] skipping FAQ without id: {r.get('question')!r}")
+        elif r.get("answer"):
+            rows.append(r)
+    langs = [x.strip().lower() for x in args.langs.split(",") if x.strip()]
+    done = load_checkpoint(args.checkpoint)
+    try:
+        n = await translate_missing(
+            rows, langs, done, args.checkpoint, args.concurrency
+        )
+    finally:
+        await aclose()
+    print(f"[pretranslate] generated {n}; checkpoint {args.checkpoint}")
+
+    trans = _by_id(rows, done)
+    if args.dry_run:
+        return
+    # the BM25 index serves lexical hits for every backend
+    write_columnar(trans)
+    if BACKEND == "QDRANT":
+        write_qdrant(trans, args.collection)
+    elif BACKEND == "PGVECTOR":
+        write_pgvector(trans)
+    elif BACKEND != "LOCAL":
+        print("Set FAQ_BACKEND=QDRANT, PGVECTOR or LOCAL", file=sys.stderr)
+        sys.exit(2)
+    bump_version("faq")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pre-translate FAQ answers")
+    ap.add_argument("--input", default=FAQ_JSONL)
+    ap.add_argument("--langs", default=PRETRANSLATE_LANGS)
+    ap.add_argument("--checkpoint", default=CHECKPOINT)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--collection", default=os.getenv("FAQ_COLLECTION", ""))
+    ap.add_argument("--dry-run", action="store_true", help="translate only")
+    asyncio.run(amain(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import asyncio
+
 from app.graph.router import router_node
 from app.graph.state import GraphState
 
@@ -5,9 +7,10 @@ for msg in [
     "show rooms in Paris",
     "find rooms under 120",
     "show rooms in Paris under 120 for 2",
+    "Quali sono gli orari di check-in?",
 ]:
     s = GraphState(user_text=msg)
-    router_node(s)
+    asyncio.run(router_node(s))
     print(
         msg,
         "→",
@@ -6,6 +6,8 @@ from typing import List, Dict, Any
 
 # --- Embeddings (uses your multilingual model default) ---
 from app.rag.embed import embed_texts
+from app.rag.lexical import build_lexical_index
+from app.utils.data_version import bump_version
 
 # --- Choose backend: QDRANT or PGVECTOR ---
 BACKEND = os.getenv("FAQ_BACKEND", "QDRANT").upper()
@@ -60,6 +62,7 @@ def upsert_qdrant(items: List[Dict[str, Any]]):
                     id=it["id"],
                     vector=v,
                     payload={
+                        "id": it["id"],
                         "hotel_id": it.get("hotel_id"),
                         "city": it.get("city"),
                         "lang": it.get("lang", "en"),
@@ -103,6 +106,9 @@ def upsert_pgvector(items: List[Dict[str, Any]]):
         tags JSONB
     );
 
+    -- answer_<lang> fields, filled by scripts/pretranslate_faqs.py
+    ALTER TABLE faqs ADD COLUMN IF NOT EXISTS translations JSONB NOT NULL DEFAULT '{{}}'::jsonb;
+
     -- vector table for embeddings
     CREATE TABLE IF NOT EXISTS faqs_vec (
         id TEXT PRIMARY KEY REFERENCES faqs(id) ON DELETE CASCADE,
@@ -193,6 +199,9 @@ def main():
     else:
         print("Set FAQ_BACKEND=QDRANT or PGVECTOR", file=sys.stderr)
         sys.exit(2)
+    if not DRY:
+        build_lexical_index(items)
+        bump_version("faq")
 
 
 if __name__ == "__main__":
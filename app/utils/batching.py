@@ -0,0 +1,100 @@
+# app/utils/batching.py
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from prometheus_client import Histogram
+
+BATCH_SIZE = Histogram(
+    "microbatch_size",
+    "Items per micro-batch",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+BATCH_WAIT = Histogram(
+    "microbatch_wait_seconds",
+    "Time an item waited in the queue before its batch ran",
+    ["batcher"],
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1),
+)
+
+
+class MicroBatcher:
+    """
+    Collect items submitted by concurrent coroutines for up to `max_wait_ms`
+    (or until `max_items`), run `fn(items)` once and fan the results back out.
+
+    `fn` takes a list and returns a list of the same length, in order.
+    `run` decides where `fn` executes (default: a worker thread).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[List[Any]], List[Any]],
+        max_items: int = 32,
+        max_wait_ms: float = 4.0,
+        run: Optional[Callable[..., Awaitable[Any]]] = None,
+    ) -> None:
+        self.name = name
+        self.fn = fn
+        self.max_items = max(1, max_items)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.run = run or asyncio.to_thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # queues/futures are bound to a loop (tests, asyncio.run in scripts)
+            self._loop, self._queue, self._task = loop, asyncio.Queue(), None
+        fut = loop.create_future()
+        self._queue.put_nowait((item, fut, time.perf_counter()))
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._drain())
+        return await fut
+
+    async def _drain(self) -> None:
+        # exits once the queue is empty; the next submit() starts a new drain
+        q = self._queue
+        while not q.empty():
+            batch = [q.get_nowait()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_items:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(q.get(), left))
+                except asyncio.TimeoutError:
+                    break
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch: list) -> None:
+        now = time.perf_counter()
+        BATCH_SIZE.labels(self.name).observe(len(batch))
+        for _, _, queued_at in batch:
+            BATCH_WAIT.labels(self.name).observe(now - queued_at)
+        error: BaseException = RuntimeError(f"{self.name}: batch did not complete")
+        try:
+            results = list(await self.run(self.fn, [item for item, _, _ in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"{self.name}: fn returned {len(results)} results "
+                    f"for {len(batch)} items"
+                )
+            for (_, fut, _), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
+        except Exception as e:
+            error = e
+        finally:
+            # never leave a caller waiting: failed or cancelled batches fail
+            # every future that has no result yet
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(error)
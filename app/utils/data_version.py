@@ -0,0 +1,84 @@
+# app/utils/data_version.py
+"""
+Shared data-version counters (e.g. "faq" bumps on every reindex).
+
+Workers cache things derived from indexed data; they poll the counter at most
+every VERSION_POLL_SECONDS and drop their caches when it moves.
+"""
+import os
+import time
+from typing import Dict, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+VERSION_POLL_SECONDS = float(os.getenv("VERSION_POLL_SECONDS", "5"))
+
+_sync: "redis.Redis | None" = None
+_async: "aioredis.Redis | None" = None
+_seen: Dict[str, Tuple[float, str]] = {}  # name -> (checked_at, version)
+
+
+def _url() -> str:
+    return os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def version_key(name: str) -> str:
+    return f"chatbi:version:{name}"
+
+
+def _client() -> "redis.Redis":
+    global _sync
+    if _sync is None:
+        _sync = redis.from_url(_url(), decode_responses=True)
+    return _sync
+
+
+def _aclient() -> "aioredis.Redis":
+    global _async
+    if _async is None:
+        _async = aioredis.from_url(_url(), decode_responses=True)
+    return _async
+
+
+def _cached(name: str) -> "str | None":
+    hit = _seen.get(name)
+    if hit and time.monotonic() - hit[0] < VERSION_POLL_SECONDS:
+        return hit[1]
+    return None
+
+
+def get_version(name: str) -> str:
+    """Current version of `name` ("0" if never bumped or Redis is down)."""
+    v = _cached(name)
+    if v is not None:
+        return v
+    try:
+        v = _client().get(version_key(name)) or "0"
+    except Exception:
+        v = _seen.get(name, (0.0, "0"))[1]
+    _seen[name] = (time.monotonic(), v)
+    return v
+
+
+async def aget_version(name: str) -> str:
+    v = _cached(name)
+    if v is not None:
+        return v
+    try:
+        v = await _aclient().get(version_key(name)) or "0"
+    except Exception:
+        v = _seen.get(name, (0.0, "0"))[1]
+    _seen[name] = (time.monotonic(), v)
+    return v
+
+
+def bump_version(name: str) -> int:
+    """Called by data loaders after a successful write; returns the new version."""
+    try:
+        v = int(_client().incr(version_key(name)))
+    except Exception as e:
+        print(f"[data_version] could not bump {name}: {e}")
+        return 0
+    _seen.pop(name, None)
+    return v
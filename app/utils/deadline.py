@@ -0,0 +1,87 @@
+# app/utils/deadline.py
+"""
+Per-request deadline carried in a ContextVar.
+
+The API sets it once per incoming request (REQUEST_DEADLINE_SECONDS); anything
+awaited on behalf of that request - graph nodes, the LLM client - reads the
+remaining budget instead of using its own fixed timeout. Tasks created inside
+the request inherit it automatically.
+"""
+
+import math
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from prometheus_client import Counter
+
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "25"))
+# floor for client-requested budgets (X-Request-Timeout)
+REQUEST_DEADLINE_MIN_SECONDS = float(os.getenv("REQUEST_DEADLINE_MIN_SECONDS", "0.5"))
+
+# absolute time.monotonic() value, or None = no deadline
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+degradations = Counter(
+    "chat_degradations_total",
+    "Cheaper paths taken because the request deadline was close",
+    ["kind"],
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline(seconds: Optional[float] = REQUEST_DEADLINE_SECONDS) -> Iterator[None]:
+    """Run the block under a deadline `seconds` from now (never extends an outer one)."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def budget(
+    requested: Optional[str], default: float = REQUEST_DEADLINE_SECONDS
+) -> float:
+    """
+    Seconds for a request that asked for `requested` (a header value): never
+    longer than `default`, never shorter than REQUEST_DEADLINE_MIN_SECONDS.
+    Malformed, NaN and infinite values are ignored, so a client cannot use
+    0, a negative number or "nan" to run without a deadline.
+    """
+    try:
+        asked = float(requested)
+    except (TypeError, ValueError):
+        return default
+    if not math.isfinite(asked):
+        return default
+    asked = max(asked, REQUEST_DEADLINE_MIN_SECONDS)
+    return asked if not default or default <= 0 else min(default, asked)
+
+
+def current() -> Optional[float]:
+    """Absolute deadline (time.monotonic()) of the running request, if any."""
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left (may be <= 0), or None without a deadline."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
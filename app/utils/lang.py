@@ -1,18 +1,193 @@
 # app/utils/lang.py
-from langdetect import detect, DetectorFactory
+"""
+Language detection for incoming messages.
 
-# make results reproducible
-DetectorFactory.seed = 0
+Most messages are short hotel questions, where langdetect is slow (profiles
+load on first use) and often wrong. Detection therefore goes:
 
+1. script: text mostly in a non-Latin script (Arabic, Cyrillic, CJK, ...)
+2. stopwords: Latin text scored against small per-language tables of function
+   words, hotel vocabulary and telltale letters (ñ, ß, ç, ...) for the FAQ
+   languages (en, it, fr, es, de); used when one language clearly wins
+3. sticky: otherwise keep the session's language (the "lang" slot), unless
+   the message is long enough to be worth a real detection
+4. langdetect, loaded lazily, for long texts the tables do not settle
+5. the default
 
-def detect_lang(text: str, default: str = "en") -> str:
+Results are cached per normalized text (LANG_CACHE_SIZE).
+"""
+
+import asyncio
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import Counter
+
+LANG_CACHE_SIZE = int(os.getenv("LANG_CACHE_SIZE", "4096"))
+# below this many characters an undecided text keeps the sticky/default lang
+LANG_LANGDETECT_MIN_CHARS = int(os.getenv("LANG_LANGDETECT_MIN_CHARS", "25"))
+LANG_MAX_CHARS = 300  # enough to decide; keeps cache keys small
+
+lang_detect_total = Counter(
+    "lang_detect_total", "Language detections by deciding path", ["path"]
+)
+
+# first word of a Unicode character name -> language for non-Latin scripts
+_SCRIPTS = {
+    "ARABIC": "ar",
+    "CYRILLIC": "ru",
+    "GREEK": "el",
+    "HEBREW": "he",
+    "HIRAGANA": "ja",
+    "KATAKANA": "ja",
+    "HANGUL": "ko",
+    "CJK": "zh",
+    "THAI": "th",
+    "DEVANAGARI": "hi",
+}
+
+_WORDS: Dict[str, str] = {
+    "en": (
+        "the and is are you your my what where when how can could do does have "
+        "has there any for with to of it this please thanks thank hello hi would "
+        "room rooms breakfast parking pool pets check included available near"
+    ),
+    "it": (
+        "il lo gli della delle del dei che è sono per con non una come dove "
+        "quando posso c' ci avete quanto costa vorrei grazie ciao buongiorno "
+        "anche mi dell' all' nell' camera camere colazione parcheggio "
+        "prenotazione animali disponibile vicino"
+    ),
+    "fr": (
+        "le les des est et une je vous nous pour avec pas que qui dans sur quel "
+        "quelle combien où puis avez merci bonjour au aux du y d' j' qu' n' "
+        "chambre chambres déjeuner réservation animaux piscine disponible près"
+    ),
+    "es": (
+        "el los las es y una yo usted para con no que qué cómo dónde cuándo "
+        "cuánto puedo hay tienen gracias hola del al por está están mi "
+        "habitación habitaciones desayuno reserva mascotas aparcamiento "
+        "estacionamiento disponible cerca"
+    ),
+    "de": (
+        "der die das und ist ein eine ich sie wir für mit nicht wie wo wann was "
+        "kann gibt es haben danke hallo im auf zu den dem bitte zimmer frühstück "
+        "parkplatz buchung haustiere schwimmbad verfügbar nähe"
+    ),
+}
+STOPWORDS: Dict[str, frozenset] = {k: frozenset(v.split()) for k, v in _WORDS.items()}
+LETTERS: Dict[str, str] = {
+    "es": "ñ¿¡áíóú",
+    "fr": "çêâîôûëïœé",
+    "it": "ìò",
+    "de": "äöüß",
+}
+
+_TOKEN = re.compile(r"[^\W\d_]+'?")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    t = unicodedata.normalize("NFC", (text or "").strip().lower())
+    t = _SPACE.sub(" ", t)
+    return t[:LANG_MAX_CHARS].replace("’", "'")
+
+
+def _script(text: str) -> Optional[str]:
+    """Language of the dominant non-Latin script, if letters are mostly one."""
+    counts: Dict[str, int] = {}
+    letters = 0
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        letters += 1
+        if ch < "ɐ":  # Latin incl. extensions
+            continue
+        name = unicodedata.name(ch, "")
+        lang = _SCRIPTS.get(name.split(" ", 1)[0])
+        if lang:
+            counts[lang] = counts.get(lang, 0) + 1
+    if not counts:
+        return None
+    lang, n = max(counts.items(), key=lambda kv: kv[1])
+    if "ja" in counts and lang == "zh":
+        lang = "ja"  # Japanese mixes kanji with kana
+    return lang if n * 2 > letters else None
+
+
+def _stopwords(text: str) -> Optional[str]:
+    """Clear winner of the stopword/letter tables, else None."""
+    tokens = _TOKEN.findall(text)
+    scores = {}
+    for lang, words in STOPWORDS.items():
+        s = sum(1 for t in tokens if t in words or t.rstrip("'") in words)
+        s += sum(1 for ch in LETTERS.get(lang, "") if ch in text)
+        scores[lang] = s
+    ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+    (best, top), (_, second) = ranked[0], ranked[1]
+    return best if top >= 1 and top > second else None
+
+
+@lru_cache(maxsize=LANG_CACHE_SIZE)
+def _heuristic(norm: str) -> Tuple[Optional[str], str]:
+    """(lang or None, path) from the cheap detectors."""
+    lang = _script(norm)
+    if lang:
+        return lang, "script"
+    lang = _stopwords(norm)
+    if lang:
+        return lang, "stopwords"
+    return None, ""
+
+
+@lru_cache(maxsize=LANG_CACHE_SIZE)
+def _langdetect(norm: str) -> Optional[str]:
+    try:
+        from langdetect import DetectorFactory, detect
+
+        DetectorFactory.seed = 0  # reproducible results
+        return (detect(norm) or "").split("-")[0].lower() or None
+    except Exception:
+        return None
+
+
+def _decide(
+    norm: str, default: str, sticky: Optional[str]
+) -> Tuple[Optional[str], str]:
+    lang, path = _heuristic(norm)
+    if lang:
+        return lang, path
+    if len(norm) >= LANG_LANGDETECT_MIN_CHARS:
+        return None, "langdetect"
+    if sticky:
+        return sticky, "sticky"
+    return default, "default"
+
+
+def detect_lang(text: str, default: str = "en", sticky: Optional[str] = None) -> str:
     """
     Detect the language of a given text.
     Returns an ISO 639-1 code like 'en', 'es', 'fr'.
-    Falls back to 'en' if detection fails.
+    `sticky` (the session's language) wins over `default` when undecided.
     """
-    try:
-        code = (detect(text or "") or default).split("-")[0].lower()
-        return code or default
-    except Exception:
-        return default
+    norm = normalize(text)
+    lang, path = _decide(norm, default, sticky)
+    if lang is None:
+        lang = _langdetect(norm) or sticky or default
+    lang_detect_total.labels(path).inc()
+    return lang
+
+
+async def adetect_lang(
+    text: str, default: str = "en", sticky: Optional[str] = None
+) -> str:
+    """detect_lang() that only leaves the event loop for langdetect."""
+    norm = normalize(text)
+    lang, path = _decide(norm, default, sticky)
+    if lang is None:
+        lang = await asyncio.to_thread(_langdetect, norm) or sticky or default
+    lang_detect_total.labels(path).inc()
+    return lang
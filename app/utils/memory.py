@@ -1,24 +1,55 @@
 # app/utils/memory.py
 import os
+import re
 import json
-from typing import Any, Dict, List
+import asyncio
+import contextvars
+from typing import Any, Dict, List, Optional, Tuple
 import redis
+import redis.asyncio as aioredis
 
 # --- Slot memory (structured fields) ---
 TTL_SECONDS = int(os.getenv("SLOT_TTL_SECONDS", "7200"))  # 2h default
 
 
+_pool: "redis.ConnectionPool | None" = None
+
+
 def _client() -> "redis.Redis":
-    return redis.from_url(
-        os.getenv("REDIS_URL", "redis://localhost:6379/0"),
-        decode_responses=True,
-    )
+    # one connection pool per process; clients are cheap views onto it
+    global _pool
+    if _pool is None:
+        _pool = redis.ConnectionPool.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            decode_responses=True,
+        )
+    return redis.Redis(connection_pool=_pool)
+
+
+_aredis: "aioredis.Redis | None" = None
+
+
+def _aclient() -> "aioredis.Redis":
+    # one client per process: redis.asyncio keeps its own connection pool
+    global _aredis
+    if _aredis is None:
+        _aredis = aioredis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            decode_responses=True,
+        )
+    return _aredis
 
 
 def session_key(session_id: str) -> str:
+    # legacy JSON blob; merged into the hash on first load, then deleted
     return f"chatbi:slots:{session_id}"
 
 
+def slots_key(session_id: str) -> str:
+    # Redis HASH, one JSON-encoded value per slot, so updates are partial HSETs
+    return f"chatbi:hslots:{session_id}"
+
+
 DEFAULT_SLOTS: Dict[str, Any] = {
     "city": None,
     "budget": None,
@@ -30,10 +61,7 @@ DEFAULT_SLOTS: Dict[str, Any] = {
 }
 
 
-def get_slots(session_id: str) -> Dict[str, Any]:
-    r = _client()
-    k = session_key(session_id)
-    data = r.get(k)
+def _parse_slots(data: str | None) -> Dict[str, Any]:
     if not data:
         return DEFAULT_SLOTS.copy()
     try:
@@ -43,20 +71,193 @@ def get_slots(session_id: str) -> Dict[str, Any]:
     # ensure keys exist
     out = DEFAULT_SLOTS.copy()
     out.update({k2: v for k2, v in slots.items() if k2 in out})
-    # refresh TTL
-    r.expire(k, TTL_SECONDS)
     return out
 
 
+def _parse_hash(fields: Dict[str, str], legacy: str | None = None) -> Dict[str, Any]:
+    # hash fields win over the legacy blob they were written after
+    out = _parse_slots(legacy)
+    for k2, v in fields.items():
+        if k2 in out:
+            try:
+                out[k2] = json.loads(v)
+            except Exception:
+                pass
+    return out
+
+
+def _slot_updates(updates: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        k2: json.dumps(v)
+        for k2, v in updates.items()
+        if k2 in DEFAULT_SLOTS and v is not None
+    }
+
+
+def _queue_migrate(p, session_id: str, legacy: str | None) -> bool:
+    """
+    Commands moving the legacy JSON slots into the hash: HSETNX per slot, so
+    fields a newer turn already wrote are kept, then the legacy key goes.
+    """
+    if not legacy:
+        return False
+    hk = slots_key(session_id)
+    for k2, v in _slot_updates(_parse_slots(legacy)).items():
+        p.hsetnx(hk, k2, v)
+    p.expire(hk, TTL_SECONDS)
+    p.delete(session_key(session_id))
+    return True
+
+
+def _queue_load(p, session_id: str) -> None:
+    """Commands for a full session load: slots (+ legacy), history, TTL refresh."""
+    hk, hist = slots_key(session_id), history_key(session_id)
+    p.hgetall(hk)
+    p.get(session_key(session_id))
+    p.lrange(hist, 0, -1)
+    p.get(summary_key(session_id))
+    p.expire(hk, TTL_SECONDS)
+    p.expire(hist, HIST_TTL_SECONDS)
+    p.expire(summary_key(session_id), HIST_TTL_SECONDS)
+
+
+def _queue_save(
+    p, session_id: str, slots: Dict[str, Any], messages: List[Dict[str, str]]
+) -> Optional[int]:
+    """
+    Commands for a full turn save: partial slot update + history append.
+    Returns the pipeline position of the LPUSH (its result is the list length).
+    """
+    hk, hist = slots_key(session_id), history_key(session_id)
+    fields = _slot_updates(slots)
+    if fields:
+        p.hset(hk, mapping=fields)
+    p.expire(hk, TTL_SECONDS)
+    items = [
+        json.dumps(m)
+        for m in messages
+        if m.get("content") and m.get("role") in ("user", "assistant")
+    ]
+    if not items:
+        return None
+    pos = len(p)
+    p.lpush(hist, *items)  # last item ends up newest (head)
+    p.ltrim(hist, 0, HIST_MAX_TURNS * 2 - 1)
+    p.expire(hist, HIST_TTL_SECONDS)
+    return pos
+
+
+def _loaded(res: list) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    return _parse_hash(res[0], res[1]), _with_summary(res[3], res[2])
+
+
+def load_session(
+    session_id: str, r: "redis.Redis | None" = None
+) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    """(slots, history) in one round trip; one more to migrate legacy slots."""
+    r = r or _client()
+    p = r.pipeline(transaction=False)
+    _queue_load(p, session_id)
+    res = p.execute()
+    p = r.pipeline(transaction=True)
+    if _queue_migrate(p, session_id, res[1]):
+        p.execute()
+    return _loaded(res)
+
+
+async def aload_session(
+    session_id: str, r: "aioredis.Redis | None" = None
+) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    r = r or _aclient()
+    p = r.pipeline(transaction=False)
+    _queue_load(p, session_id)
+    res = await p.execute()
+    p = r.pipeline(transaction=True)
+    if _queue_migrate(p, session_id, res[1]):
+        await p.execute()
+    return _loaded(res)
+
+
+def save_turn(
+    session_id: str,
+    slots: Dict[str, Any],
+    messages: List[Dict[str, str]],
+    r: "redis.Redis | None" = None,
+) -> None:
+    """Slot updates + new history messages (oldest first) in one round trip."""
+    p = (r or _client()).pipeline(transaction=True)
+    _queue_save(p, session_id, slots, messages)
+    p.execute()
+
+
+async def asave_turn(
+    session_id: str,
+    slots: Dict[str, Any],
+    messages: List[Dict[str, str]],
+    r: "aioredis.Redis | None" = None,
+) -> None:
+    await asave_turns({session_id: (slots, messages)}, r)
+
+
+async def asave_turns(
+    turns: Dict[str, Tuple[Dict[str, Any], List[Dict[str, str]]]],
+    r: "aioredis.Redis | None" = None,
+    marks: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    {session: (slot updates, messages)} for many sessions in one round trip.
+    `marks` {session: id} are stored in the same MULTI (see `aget_marks`).
+    """
+    r = r or _aclient()
+    p = r.pipeline(transaction=True)
+    positions = {
+        session_id: _queue_save(p, session_id, slots, messages)
+        for session_id, (slots, messages) in turns.items()
+    }
+    for session_id, mark in (marks or {}).items():
+        p.set(mark_key(session_id), mark, ex=HIST_TTL_SECONDS)
+    res = await p.execute()
+    for session_id, pos in positions.items():
+        _maybe_compact(session_id, None if pos is None else res[pos], r)
+
+
+def mark_key(session_id: str) -> str:
+    # id of the last write-behind flush that landed (utils/write_behind.py)
+    return f"chatbi:flushed:{session_id}"
+
+
+async def aget_marks(
+    session_ids: List[str], r: "aioredis.Redis | None" = None
+) -> Dict[str, Optional[str]]:
+    """Marks of the last saves; tells whether a save whose reply was lost landed."""
+    p = (r or _aclient()).pipeline(transaction=False)
+    for session_id in session_ids:
+        p.get(mark_key(session_id))
+    return dict(zip(session_ids, await p.execute()))
+
+
+def get_slots(session_id: str) -> Dict[str, Any]:
+    return load_session(session_id)[0]
+
+
 def update_slots(session_id: str, **updates) -> Dict[str, Any]:
-    r = _client()
-    k = session_key(session_id)
-    cur = get_slots(session_id)
-    for k2, v in updates.items():
-        if k2 in cur and v is not None:
-            cur[k2] = v
-    r.set(k, json.dumps(cur), ex=TTL_SECONDS)
-    return cur
+    p = _client().pipeline(transaction=True)
+    _queue_save(p, session_id, updates, [])
+    p.hgetall(slots_key(session_id))
+    p.get(session_key(session_id))
+    return _parse_hash(*p.execute()[-2:])
+
+
+async def aget_slots(session_id: str) -> Dict[str, Any]:
+    return (await aload_session(session_id))[0]
+
+
+async def aupdate_slots(session_id: str, **updates) -> Dict[str, Any]:
+    p = _aclient().pipeline(transaction=True)
+    _queue_save(p, session_id, updates, [])
+    p.hgetall(slots_key(session_id))
+    p.get(session_key(session_id))
+    return _parse_hash(*(await p.execute())[-2:])
 
 
 # --- Chat history (unstructured short transcript) ---
@@ -72,37 +273,178 @@ def history_key(session_id: str) -> str:
 
 def get_history(session_id: str) -> List[Dict[str, str]]:
     """
-    Return history as a list of messages ordered oldest -> newest.
+    Return history as a list of messages ordered oldest -> newest, led by a
+    system message with the rolling summary of older turns (if any).
     """
-    r = _client()
-    k = history_key(session_id)
-    raw = r.lrange(k, 0, -1) or []
+    p = _client().pipeline(transaction=False)
+    _queue_history(p, session_id)
+    raw, summary, _, _ = p.execute()
+    return _with_summary(summary, raw)
+
+
+def _queue_history(p, session_id: str) -> None:
+    # read + refresh TTL in one round trip
+    k, sk = history_key(session_id), summary_key(session_id)
+    p.lrange(k, 0, -1).get(sk).expire(k, HIST_TTL_SECONDS)
+    p.expire(sk, HIST_TTL_SECONDS)
+
+
+def _parse_history(raw: List[str]) -> List[Dict[str, str]]:
     # We store newest-first; reverse to oldest-first for LLM context
     try:
-        msgs = [json.loads(x) for x in reversed(raw)]
+        return [json.loads(x) for x in reversed(raw)]
     except Exception:
-        msgs = []
-    # refresh TTL
-    if raw:
-        r.expire(k, HIST_TTL_SECONDS)
+        return []
+
+
+async def aget_history(session_id: str) -> List[Dict[str, str]]:
+    p = _aclient().pipeline(transaction=False)
+    _queue_history(p, session_id)
+    raw, summary, _, _ = await p.execute()
+    return _with_summary(summary, raw)
+
+
+# --- Rolling summary (optional) ---
+# Once the history list grows past HIST_SUMMARY_AFTER messages, all but the
+# newest HIST_KEEP_RECENT are folded into chatbi:summary:{sid} in the
+# background, so memory and prompt size stay flat in long sessions.
+HIST_SUMMARY_ON = os.getenv("HIST_SUMMARY", "off") == "on"
+HIST_SUMMARY_MODE = os.getenv("HIST_SUMMARY_MODE", "extractive")  # or "llm"
+HIST_SUMMARY_AFTER = int(os.getenv("HIST_SUMMARY_AFTER", "10"))
+HIST_KEEP_RECENT = int(os.getenv("HIST_KEEP_RECENT", "4"))
+HIST_SUMMARY_MAX_CHARS = int(os.getenv("HIST_SUMMARY_MAX_CHARS", "600"))
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_compacting: set = set()
+_tasks: set = set()
+
+
+def summary_key(session_id: str) -> str:
+    return f"chatbi:summary:{session_id}"
+
+
+def _with_summary(summary: str | None, raw: List[str] | None) -> List[Dict[str, str]]:
+    msgs = _parse_history(raw or [])
+    if summary:
+        return [{"role": "system", "content": SUMMARY_PREFIX + summary}] + msgs
     return msgs
 
 
+def _clip_front(text: str, limit: int) -> str:
+    # keep the newest lines
+    if len(text) <= limit:
+        return text
+    return text[-limit:].split("\n", 1)[-1]
+
+
+def _extractive(summary: str, msgs: List[Dict[str, str]]) -> str:
+    lines = [summary] if summary else []
+    for m in msgs:
+        first = _SENTENCE_END.split(m["content"].strip(), 1)[0]
+        lines.append(f"{m['role']}: {first[:160]}")
+    return _clip_front("\n".join(lines), HIST_SUMMARY_MAX_CHARS)
+
+
+async def _summarize(summary: str, msgs: List[Dict[str, str]]) -> str:
+    if HIST_SUMMARY_MODE != "llm":
+        return _extractive(summary, msgs)
+    from ..llm.ollama_client import achat
+
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in msgs)
+    prompt = [
+        {
+            "role": "system",
+            "content": "Summarize this hotel-assistant conversation for the "
+            "assistant's memory in at most 80 words. Keep city, dates, budget, "
+            "guests and open questions.",
+        },
+        {
+            "role": "user",
+            "content": f"Previous summary:\n{summary or '-'}\n\nNew messages:\n{transcript}",
+        },
+    ]
+    try:
+        return _clip_front((await achat(prompt)).strip(), HIST_SUMMARY_MAX_CHARS)
+    except Exception as e:
+        print(f"[memory] LLM summary failed, using extractive: {e}")
+        return _extractive(summary, msgs)
+
+
+def _maybe_compact(
+    session_id: str, length: Optional[int], r: "aioredis.Redis | None" = None
+) -> None:
+    if not HIST_SUMMARY_ON or length is None or length <= HIST_SUMMARY_AFTER:
+        return
+    if session_id in _compacting:
+        return
+    _compacting.add(session_id)
+    # fresh context: the summary must not inherit the request deadline
+    task = asyncio.get_running_loop().create_task(
+        acompact(session_id, r), context=contextvars.Context()
+    )
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def _summarized_tail(cur: List[str], old: List[str]) -> int:
+    """
+    How many of the summarized messages `old` (newest-first) are still at the
+    tail of `cur`: turns pushed since then sit at the head, and the
+    HIST_MAX_TURNS trim may already have dropped the oldest of them.
+    """
+    for m in range(min(len(old), len(cur)), 0, -1):
+        if cur[-m:] == old[:m]:
+            return m
+    return 0
+
+
+async def acompact(session_id: str, r: "aioredis.Redis | None" = None) -> None:
+    """Fold all but the newest HIST_KEEP_RECENT messages into the summary."""
+    r = r or _aclient()
+    k, sk = history_key(session_id), summary_key(session_id)
+    try:
+        raw, summary = (
+            await r.pipeline(transaction=False).lrange(k, 0, -1).get(sk).execute()
+        )
+        old = (raw or [])[HIST_KEEP_RECENT:]  # newest-first: the tail is oldest
+        if not old:
+            return
+        new = await _summarize(summary or "", _parse_history(old))
+        # saves may have pushed and trimmed meanwhile: under WATCH, drop only
+        # what is left of the summarized tail, or retry if the list moves again
+        async with r.pipeline(transaction=True) as p:
+            for _ in range(3):
+                try:
+                    await p.watch(k, sk)
+                    if await p.get(sk) != summary:
+                        return  # compacted elsewhere; that summary wins
+                    m = _summarized_tail(await p.lrange(k, 0, -1), old)
+                    p.multi()
+                    p.set(sk, new, ex=HIST_TTL_SECONDS)
+                    if m:
+                        p.ltrim(k, 0, -m - 1)
+                    await p.execute()
+                    return
+                except redis.WatchError:
+                    continue
+        print(f"[memory] history of {session_id} kept changing, not compacted")
+    except Exception as e:
+        print(f"[memory] could not compact history for {session_id}: {e}")
+    finally:
+        _compacting.discard(session_id)
+
+
 def append_history(session_id: str, role: str, content: str) -> None:
     """
     Append a single turn to the history (newest-first).
     Trims list to ~2*HIST_MAX_TURNS messages (user+assistant per turn).
     """
-    if not content:
-        return
-    if role not in ("user", "assistant"):
-        return
-    r = _client()
-    k = history_key(session_id)
-    r.lpush(k, json.dumps({"role": role, "content": content}))
-    # keep last N*2 messages
-    r.ltrim(k, 0, HIST_MAX_TURNS * 2 - 1)
-    r.expire(k, HIST_TTL_SECONDS)
+    save_turn(session_id, {}, [{"role": role, "content": content}])
+
+
+async def aappend_history(session_id: str, role: str, content: str) -> None:
+    await asave_turn(session_id, {}, [{"role": role, "content": content}])
 
 
 def clear_history(session_id: str) -> None:
@@ -110,7 +452,7 @@ def clear_history(session_id: str) -> None:
     Remove the chat history for a given session.
     """
     r = _client()
-    r.delete(history_key(session_id))
+    r.delete(history_key(session_id), summary_key(session_id))
 
 
 def reset_session(session_id: str) -> None:
@@ -118,5 +460,10 @@ def reset_session(session_id: str) -> None:
     Clear both slots and history for a clean conversation.
     """
     r = _client()
-    r.delete(session_key(session_id))
-    r.delete(history_key(session_id))
+    r.delete(
+        slots_key(session_id),
+        session_key(session_id),
+        history_key(session_id),
+        summary_key(session_id),
+        mark_key(session_id),
+    )
@@ -1,38 +1,96 @@
 # app/utils/pii.py
+"""
+PII masking: emails, card numbers and phone numbers.
+
+All three patterns are alternatives of one compiled regex, so a message is
+scanned once and every span is replaced in the same pass (earlier kinds win
+when spans start at the same position). The patterns stay linear-time:
+CARD and PHONE only use bounded repeats with no nested lazy quantifiers, and
+EMAIL can only start at the beginning of a run, so long digit runs or 10KB
+messages do not backtrack (guarded by app/scripts/bench_pii.py).
+
+StreamScrubber applies the same scan to streamed replies chunk by chunk,
+holding back only a tail that could still turn into a match.
+"""
+
 import re
 
-EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+EMAIL = re.compile(
+    r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+)
+# 13-19 digits, optionally separated by up to 3 spaces/dashes ("4111 - 1111"),
+# not inside a longer word; each separator run is bounded and ends in a digit
+CARD = re.compile(r"(?<!\w)\d(?:[ -]{0,3}\d){12,18}(?!\w)")
 PHONE = re.compile(r"(?:\+?\d{1,3}[ -]?)?(?:\(?\d{2,4}\)?[ -]?)?\d{3,4}[ -]?\d{4}")
-CARD = re.compile(r"\b(?:\d[ -]*?){13,19}\b")
+
+PII = re.compile(
+    f"(?P<EMAIL>{EMAIL.pattern})|(?P<CARD>{CARD.pattern})|(?P<PHONE>{PHONE.pattern})"
+)
+
+
+def _mask(m: "re.Match[str]") -> str:
+    return f"[{m.lastgroup}]"
+
+
+def redact(text: str) -> tuple[str, bool]:
+    """
+    Return (redacted_text, pii_found).
+    """
+    if not text:
+        return text, False
+    t, n = PII.subn(_mask, text)
+    return t, n > 0
 
 
 def scrub_in(text: str) -> str:
     """Mask PII in user input before logging/processing."""
-    if not text:
-        return text
-    t = EMAIL.sub("[EMAIL]", text)
-    t = CARD.sub("[CARD]", t)
-    t = PHONE.sub("[PHONE]", t)
-    return t
+    return redact(text)[0]
 
 
 def scrub_out(text: str) -> str:
     """Double-check responses contain no raw PII."""
-    return scrub_in(text)
+    return redact(text)[0]
 
 
-def redact(text: str) -> tuple[str, bool]:
+# Positions after which no PII span can continue and no lookaround of the
+# patterns above sees across: a character no pattern can contain, or a space
+# that does not follow a digit, ")" or another separator (spaces only occur
+# inside card/phone spans as digit separators).
+_BOUNDARY = re.compile(r"[^\w.%+\-@() ]|(?<![\d) -]) ")
+
+
+class StreamScrubber:
     """
-    Return (redacted_text, pii_found).
+    Incremental scrub_out() for streamed text.
+
+    feed() returns the scrubbed text up to the last safe boundary and holds
+    back only the tail that could still be part of a PII span (a partial word,
+    email or digit run); flush() releases the rest. The concatenated output is
+    identical to scrub_out() of the concatenated input.
     """
-    if not text:
-        return text, False
 
-    pii_found = False
-    if EMAIL.search(text) or CARD.search(text) or PHONE.search(text):
-        pii_found = True
+    def __init__(self) -> None:
+        self.buf = ""
+        self._prev = ""  # last character already released (lookbehind context)
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        text = self._prev + self.buf + chunk
+        cut = 0
+        # the held-back tail has no boundary, so only new positions can add one
+        for m in _BOUNDARY.finditer(text, max(len(self._prev), len(text) - len(chunk))):
+            cut = m.end()
+        self.buf += chunk
+        cut -= len(self._prev)
+        if cut <= 0:
+            return ""
+        ready, self.buf = self.buf[:cut], self.buf[cut:]
+        self._prev = ready[-1]
+        return redact(ready)[0]
 
-    t = EMAIL.sub("[EMAIL]", text)
-    t = CARD.sub("[CARD]", t)
-    t = PHONE.sub("[PHONE]", t)
-    return t, pii_found
+    def flush(self) -> str:
+        rest, self.buf = self.buf, ""
+        if rest:
+            self._prev = rest[-1]
+        return redact(rest)[0]
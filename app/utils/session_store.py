@@ -0,0 +1,216 @@
+# app/utils/session_store.py
+"""
+Where session memory (slots + short history) lives.
+
+SESSION_STORE picks the backend:
+- redis      (default) the shared Redis from REDIS_URL, via utils/memory.py
+- memory     in-process TTL-aware LRU; single-node deployments and tests,
+             nothing survives a restart and workers do not share sessions
+- fakeredis  the Redis code path on `fakeredis` clients (optional dependency),
+             for tests that want the real pipelines without a server
+
+All backends return history oldest-first and cap it at HIST_MAX_TURNS turns.
+Rolling summaries (HIST_SUMMARY) are only kept by the Redis-based stores.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import memory
+from .memory import DEFAULT_SLOTS, HIST_MAX_TURNS, TTL_SECONDS
+
+SESSION_STORE = os.getenv("SESSION_STORE", "redis")
+SESSION_STORE_MAX_ENTRIES = int(os.getenv("SESSION_STORE_MAX_ENTRIES", "10000"))
+
+Slots = Dict[str, Any]
+Messages = List[Dict[str, str]]
+
+
+class SessionStore:
+    """Async session memory API used by /chat and the graph wrapper."""
+
+    name = "base"
+
+    async def aload(self, session_id: str) -> Tuple[Slots, Messages]:
+        """(slots, history oldest-first); refreshes the session TTL."""
+        raise NotImplementedError
+
+    async def asave_many(
+        self,
+        turns: Dict[str, Tuple[Slots, Messages]],
+        marks: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        {session: (slot updates, new messages oldest-first)}; None slots are kept.
+        `marks` {session: id} are recorded atomically with the writes.
+        """
+        raise NotImplementedError
+
+    async def amarks(self, session_ids: List[str]) -> Dict[str, Optional[str]]:
+        """Mark of the last save per session (None = unknown / none)."""
+        return dict.fromkeys(session_ids)
+
+    async def areset(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    async def asave(self, session_id: str, slots: Slots, messages: Messages) -> None:
+        await self.asave_many({session_id: (slots, messages)})
+
+    async def aget_slots(self, session_id: str) -> Slots:
+        return (await self.aload(session_id))[0]
+
+    async def aupdate_slots(self, session_id: str, **updates) -> Slots:
+        await self.asave(session_id, updates, [])
+        return await self.aget_slots(session_id)
+
+
+class RedisSessionStore(SessionStore):
+    name = "redis"
+
+    def __init__(self, aclient=None) -> None:
+        # None = the process-wide client from utils/memory.py
+        self.aclient = aclient
+
+    async def aload(self, session_id: str) -> Tuple[Slots, Messages]:
+        return await memory.aload_session(session_id, self.aclient)
+
+    async def asave_many(
+        self,
+        turns: Dict[str, Tuple[Slots, Messages]],
+        marks: Optional[Dict[str, str]] = None,
+    ) -> None:
+        await memory.asave_turns(turns, self.aclient, marks)
+
+    async def amarks(self, session_ids: List[str]) -> Dict[str, Optional[str]]:
+        return await memory.aget_marks(session_ids, self.aclient)
+
+    async def areset(self, session_id: str) -> None:
+        r = self.aclient or memory._aclient()
+        await r.delete(
+            memory.slots_key(session_id),
+            memory.session_key(session_id),
+            memory.history_key(session_id),
+            memory.summary_key(session_id),
+            memory.mark_key(session_id),
+        )
+
+
+class FakeRedisSessionStore(RedisSessionStore):
+    name = "fakeredis"
+
+    def __init__(self) -> None:
+        try:
+            from fakeredis import aioredis as fake_aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "SESSION_STORE=fakeredis needs `pip install fakeredis`"
+            ) from e
+        super().__init__(fake_aioredis.FakeRedis(decode_responses=True))
+
+
+class _Entry:
+    __slots__ = ("slots", "history", "expires")
+
+    def __init__(self) -> None:
+        self.slots: Slots = {}
+        self.history: Messages = []
+        self.expires = 0.0
+
+
+class MemorySessionStore(SessionStore):
+    """
+    OrderedDict LRU: at most `max_entries` sessions, each dropped `ttl` seconds
+    after its last load/save (sliding, like the Redis EXPIREs).
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        max_entries: int = SESSION_STORE_MAX_ENTRIES,
+        ttl: float = TTL_SECONDS,
+        clock=time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.clock = clock
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, session_id: str, create: bool) -> Optional[_Entry]:
+        now = self.clock()
+        e = self._data.get(session_id)
+        if e is not None and e.expires <= now:
+            del self._data[session_id]
+            e = None
+        if e is None:
+            if not create:
+                return None
+            e = self._data[session_id] = _Entry()
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        else:
+            self._data.move_to_end(session_id)
+        e.expires = now + self.ttl
+        return e
+
+    async def aload(self, session_id: str) -> Tuple[Slots, Messages]:
+        slots = DEFAULT_SLOTS.copy()
+        e = self._get(session_id, create=False)
+        if e is None:
+            return slots, []
+        slots.update(e.slots)
+        return slots, list(e.history)
+
+    async def asave_many(
+        self,
+        turns: Dict[str, Tuple[Slots, Messages]],
+        marks: Optional[Dict[str, str]] = None,
+    ) -> None:
+        # in-process: a save either happened or raised, marks are not needed
+        for session_id, (slots, messages) in turns.items():
+            e = self._get(session_id, create=True)
+            e.slots.update(
+                {k: v for k, v in slots.items() if k in DEFAULT_SLOTS and v is not None}
+            )
+            e.history.extend(
+                {"role": m["role"], "content": m["content"]}
+                for m in messages
+                if m.get("content") and m.get("role") in ("user", "assistant")
+            )
+            del e.history[: -HIST_MAX_TURNS * 2]
+
+    async def areset(self, session_id: str) -> None:
+        self._data.pop(session_id, None)
+
+
+_STORES = {
+    "redis": RedisSessionStore,
+    "memory": MemorySessionStore,
+    "fakeredis": FakeRedisSessionStore,
+}
+_STORE: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    global _STORE
+    if _STORE is None:
+        try:
+            _STORE = _STORES[SESSION_STORE]()
+        except KeyError:
+            raise ValueError(
+                f"SESSION_STORE={SESSION_STORE!r}; expected one of {sorted(_STORES)}"
+            ) from None
+    return _STORE
+
+
+def set_session_store(store: Optional[SessionStore]) -> None:
+    """Swap the process-wide store (tests)."""
+    global _STORE
+    _STORE = store
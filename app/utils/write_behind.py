@@ -0,0 +1,211 @@
+# app/utils/write_behind.py
+"""
+Write-behind persistence of chat turns.
+
+`/chat` hands the finished turn to `enqueue()` and returns; a per-worker
+flusher wakes up every WRITE_BEHIND_FLUSH_MS, coalesces everything queued
+per session (slot updates merged, messages appended in order) and writes all
+sessions in one store call (one Redis pipeline). Until a write lands, `aload()` overlays the
+queued/in-flight data on what the store returns, so the next turn of the same
+session on this worker still sees it.
+
+One flusher per worker and one batch at a time keeps per-session order.
+Sessions are expected to be sticky to a worker for the few ms a write waits.
+
+While the store is down, flushes back off exponentially (up to
+WRITE_BEHIND_BACKOFF_MAX_MS) and turns stay queued; only past
+WRITE_BEHIND_MAX_PENDING sessions are the oldest ones dropped. Each write
+carries a mark (worker token + turn counter) stored in the same MULTI, so
+after a failure whose reply was lost the flusher checks the marks first and
+does not append turns that already landed a second time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from .memory import HIST_MAX_TURNS
+from .session_store import get_session_store
+
+# opt-in: queued turns live in this worker until flushed, so a crash loses
+# them, and only this worker sees them before then (needs sticky sessions)
+WRITE_BEHIND_ON = os.getenv("WRITE_BEHIND", "off") == "on"
+WRITE_BEHIND_FLUSH_MS = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "50"))
+WRITE_BEHIND_BACKOFF_MAX_MS = float(os.getenv("WRITE_BEHIND_BACKOFF_MAX_MS", "5000"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+
+writes_total = Counter(
+    "session_write_behind_total", "Session flushes by outcome", ["outcome"]
+)
+flush_sessions = Histogram(
+    "session_write_behind_batch_sessions",
+    "Sessions written per flush",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+Slots = Dict[str, Any]
+Messages = List[Dict[str, str]]
+
+
+class _Pending:
+    __slots__ = ("slots", "messages", "mark")
+
+    def __init__(self) -> None:
+        self.slots: Slots = {}
+        self.messages: Messages = []
+        self.mark = ""  # of the newest turn in here
+
+    def add(self, slots: Slots, messages: Messages, mark: str) -> None:
+        self.slots.update({k: v for k, v in slots.items() if v is not None})
+        self.messages.extend(m for m in messages if m.get("content"))
+        # the store keeps no more than this anyway
+        del self.messages[: -HIST_MAX_TURNS * 2]
+        self.mark = mark
+
+
+class WriteBehind:
+    def __init__(
+        self,
+        flush_ms: float = WRITE_BEHIND_FLUSH_MS,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        backoff_max_ms: float = WRITE_BEHIND_BACKOFF_MAX_MS,
+    ) -> None:
+        self.interval = max(0.0, flush_ms) / 1000.0
+        self.max_pending = max(1, max_pending)
+        self.backoff_max = max(0.0, backoff_max_ms) / 1000.0
+        self._pending: Dict[str, _Pending] = {}
+        self._inflight: Dict[str, _Pending] = {}
+        # written but unconfirmed (the write raised); may or may not have landed
+        self._failed: Dict[str, _Pending] = {}
+        self._failures = 0
+        self._token = uuid.uuid4().hex[:12]
+        self._seq = itertools.count(1)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+
+    # --- producer side ---
+    def enqueue(self, session_id: str, slots: Slots, messages: Messages) -> None:
+        mark = f"{self._token}:{next(self._seq)}"
+        self._pending.setdefault(session_id, _Pending()).add(slots, messages, mark)
+        while len(self._pending) + len(self._failed) > self.max_pending:
+            # bounded while the store is down: the oldest session goes first
+            del self._pending[next(iter(self._pending))]
+            writes_total.labels("dropped").inc()
+        self._ensure_task()
+        self._wake.set()
+
+    async def aload(self, session_id: str) -> Tuple[Slots, Messages]:
+        """Stored state of the session plus whatever is still queued for it."""
+        slots, history = await get_session_store().aload(session_id)
+        for layer in (self._failed, self._inflight, self._pending):
+            p = layer.get(session_id)
+            if p is not None:
+                slots.update(p.slots)
+                history = history + p.messages
+        # a leading summary message (utils/memory.py) is not a turn; keep it
+        head = history[:1] if history and history[0]["role"] == "system" else []
+        return slots, head + history[len(head) :][-HIST_MAX_TURNS * 2 :]
+
+    # --- flusher ---
+    def _ensure_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._wake, self._task = loop, asyncio.Event(), None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    def _delay(self) -> float:
+        if not self._failures:
+            return self.interval
+        base = max(self.interval, 0.05)
+        return min(self.backoff_max, base * 2 ** min(self._failures, 16))
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if self._failures or not self._closing:
+                await asyncio.sleep(self._delay())  # coalesce / back off
+            await self.flush()
+            if self._closing and not (self._pending or self._failed):
+                return
+
+    async def flush(self) -> None:
+        store = get_session_store()
+        if self._failed and not await self._resolve_failed(store):
+            return
+        if not self._pending:
+            return
+        self._inflight, self._pending = self._pending, {}
+        batch = self._inflight
+        flush_sessions.observe(len(batch))
+        try:
+            await asyncio.shield(
+                store.asave_many(
+                    {sid: (p.slots, p.messages) for sid, p in batch.items()},
+                    {sid: p.mark for sid, p in batch.items()},
+                )
+            )
+            writes_total.labels("flushed").inc(len(batch))
+            self._failures = 0
+        except Exception as e:
+            print(f"[write_behind] flush of {len(batch)} sessions failed: {e}")
+            writes_total.labels("retried").inc(len(batch))
+            self._failed = batch
+            self._retry_later()
+        finally:
+            self._inflight = {}
+
+    async def _resolve_failed(self, store) -> bool:
+        """
+        Drop the sessions of the failed batch whose write did land (its mark
+        is stored) and put the rest back in front of newer turns.
+        """
+        try:
+            marks = await store.amarks(list(self._failed))
+        except Exception as e:
+            print(f"[write_behind] store still unavailable: {e}")
+            self._retry_later()
+            return False
+        for sid, old in self._failed.items():
+            if marks.get(sid) == old.mark:
+                writes_total.labels("flushed").inc()
+                continue
+            newer = self._pending.pop(sid, None)
+            if newer is not None:
+                old.add(newer.slots, newer.messages, newer.mark)
+            self._pending[sid] = old
+        self._failed = {}
+        return True
+
+    def _retry_later(self) -> None:
+        self._failures += 1
+        if self._wake is not None:
+            self._wake.set()
+
+    async def aclose(self) -> None:
+        """Flush everything still queued (shutdown)."""
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            self._wake.set()
+            try:
+                await asyncio.wait_for(self._task, 5.0)
+            except asyncio.TimeoutError:
+                left = len(self._pending) + len(self._failed)
+                print(f"[write_behind] {left} sessions not flushed")
+        self._closing = False
+
+
+_WRITER = WriteBehind()
+
+
+def get_writer() -> WriteBehind:
+    return _WRITER
@@ -0,0 +1,46 @@
+from app.rag import answer_cache
+from app.rag.answer_cache import AnswerCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _cache(monkeypatch, size=8, ttl=10.0):
+    clock = _Clock()
+    monkeypatch.setattr(answer_cache.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(answer_cache, "ANSWER_CACHE_TTL_SECONDS", ttl)
+    monkeypatch.setattr(answer_cache, "ANSWER_CACHE_THRESHOLD", 0.9)
+    return AnswerCache(size), clock
+
+
+def test_threshold_bucket_and_version(monkeypatch):
+    c, _ = _cache(monkeypatch)
+    c.put([1.0, 0.0], "en", "Rome", "v1", "Parking is free.", [])
+    assert c.get([0.99, 0.05], "EN", " rome", "v1") == ("Parking is free.", [])
+    assert c.get([0.6, 0.8], "en", "Rome", "v1") is None  # below threshold
+    assert c.get([1.0, 0.0], "it", "Rome", "v1") is None  # other bucket
+    assert c.get([1.0, 0.0], "en", "Rome", "v2") is None  # reindexed
+    assert not c._entries
+
+
+def test_expired_rows_are_skipped_and_swept(monkeypatch):
+    c, clock = _cache(monkeypatch, size=2)
+    c.put([1.0, 0.0], "en", None, "v", "old", [])
+    clock.now += 6
+    c.put([0.95, 0.31], "en", None, "v", "fresh", [])
+    clock.now += 6  # "old" expired, "fresh" has 4s left
+
+    # the closest row is expired; the next one is still above the threshold
+    assert c.get([1.0, 0.0], "en", None, "v") == ("fresh", [])
+    c.put([0.0, 1.0], "en", None, "v", "other", [])
+    assert c.get([1.0, 0.0], "en", None, "v") == ("fresh", [])  # the LRU kept it
+    assert sorted(e.reply for e in c._entries.values()) == ["fresh", "other"]
+
+    clock.now += 10
+    assert c.get([1.0, 0.0], "en", None, "v") is None
+    assert not c._entries
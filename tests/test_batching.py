@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from app.utils.batching import MicroBatcher
+
+
+def _inline(fn, items):
+    async def run():
+        return fn(items)
+
+    return run()
+
+
+def test_flushes_on_size_and_on_timeout():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [x * 2 for x in items]
+
+    async def run():
+        b = MicroBatcher("t", double, max_items=3, max_wait_ms=50, run=_inline)
+        full = await asyncio.gather(*(b.submit(i) for i in range(3)))
+        t0 = time.perf_counter()
+        alone = await b.submit(7)
+        return full, alone, time.perf_counter() - t0
+
+    full, alone, waited = asyncio.run(run())
+    assert full == [0, 2, 4] and alone == 14
+    assert calls == [[0, 1, 2], [7]]
+    assert 0.04 <= waited < 1.0  # the lone item waited for max_wait_ms
+
+
+def test_errors_and_short_results_fail_every_caller():
+    def boom(items):
+        raise ValueError("model down")
+
+    def short(items):
+        return items[:1]
+
+    async def run(fn):
+        b = MicroBatcher("t", fn, max_items=4, max_wait_ms=5, run=_inline)
+        return await asyncio.wait_for(
+            asyncio.gather(*(b.submit(i) for i in range(3)), return_exceptions=True),
+            1.0,
+        )
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(run(boom)))
+    out = asyncio.run(run(short))
+    assert all(isinstance(r, RuntimeError) for r in out)
+    assert "1 results for 3 items" in str(out[0])
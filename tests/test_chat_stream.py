@@ -0,0 +1,101 @@
+import asyncio
+
+import orjson
+from fastapi.testclient import TestClient
+
+from app.api import server
+from app.utils.session_store import MemorySessionStore, set_session_store
+
+
+class _Workflow:
+    """astream() of a graph run: custom token chunks, then the final values."""
+
+    def __init__(self, tokens, final):
+        self.tokens, self.final = tokens, final
+
+    async def astream(self, state, stream_mode=None):
+        for tok in self.tokens:
+            yield "custom", {"token": tok}
+        yield "values", self.final
+
+
+def _events(body: str):
+    out = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        out.append((event[len("event: ") :], orjson.loads(data[len("data: ") :])))
+    return out
+
+
+def _stream(monkeypatch, workflow, message):
+    store = MemorySessionStore()
+    set_session_store(store)
+    monkeypatch.setattr(server, "MEMORY_ON", True)
+    monkeypatch.setattr(server, "WRITE_BEHIND_ON", False)
+    monkeypatch.setattr(server, "workflow", workflow)
+    try:
+        r = TestClient(server.app).post(
+            "/chat/stream", json={"message": message}, headers={"X-Session-Id": "s1"}
+        )
+        assert r.status_code == 200
+        return _events(r.text), asyncio.run(store.aload("s1"))
+    finally:
+        set_session_store(None)
+
+
+def test_streamed_tokens_then_done_and_the_turn_is_saved(monkeypatch):
+    final = {"reply": "Breakfast is at 7.", "intent": "faq", "citations": ["f1"]}
+    events, (slots, history) = _stream(
+        monkeypatch, _Workflow(["Breakfast ", "is at 7."], final), "When is breakfast?"
+    )
+    # the PII scrubber may hold back a tail; the text and the order are kept
+    assert {e for e, _ in events[:-1]} == {"token"}
+    assert "".join(d["text"] for _, d in events[:-1]) == final["reply"]
+    assert events[-1] == ("done", {"intent": "faq", "results": [], "citations": ["f1"]})
+    assert [m["content"] for m in history] == ["When is breakfast?", final["reply"]]
+
+
+def test_whole_reply_as_message_and_slots_are_saved(monkeypatch):
+    final = {"reply": "2 rooms found.", "intent": "rooms", "city": "Rome"}
+    events, (slots, history) = _stream(
+        monkeypatch, _Workflow([], final), "rooms in Rome"
+    )
+    assert [e for e, _ in events] == ["message", "done"]
+    assert events[0][1] == {"text": "2 rooms found."}
+    assert slots["city"] == "Rome" and len(history) == 2
+
+
+def test_pii_is_blocked_and_not_saved(monkeypatch):
+    monkeypatch.setattr(server, "GUARDRAILS_ON", True)
+    events, (_, history) = _stream(
+        monkeypatch, _Workflow(["never"], {}), "my card is 4111 1111 1111 1111"
+    )
+    assert events == [
+        ("message", {"text": server.SAFETY_REPLY}),
+        ("done", {"intent": "safety_block", "results": {}, "citations": []}),
+    ]
+    assert history == []
+
+
+def test_turn_is_saved_when_the_client_hangs_up_on_done(monkeypatch):
+    store = MemorySessionStore()
+    set_session_store(store)
+    monkeypatch.setattr(server, "MEMORY_ON", True)
+    monkeypatch.setattr(server, "WRITE_BEHIND_ON", False)
+    monkeypatch.setattr(server, "workflow", _Workflow([], {"reply": "Hi!"}))
+    request = type("R", (), {"headers": {"X-Session-Id": "s1"}, "client": None})()
+
+    async def run():
+        resp = await server.chat_stream(server.ChatRequest(message="hello"), request)
+        body = resp.body_iterator
+        async for chunk in body:
+            if chunk.startswith("event: done"):
+                break
+        await body.aclose()  # what the server does on disconnect
+        return await store.aload("s1")
+
+    try:
+        _, history = asyncio.run(run())
+    finally:
+        set_session_store(None)
+    assert [m["content"] for m in history] == ["hello", "Hi!"]
@@ -0,0 +1,24 @@
+from app.graph.cities import Gazetteer
+
+CITIES = ["Rome", "Milano", "New York", "Paris", "Reggio nell'Emilia", "Parma"]
+
+
+def test_aliases_and_accents_resolve_to_hotel_spelling():
+    g = Gazetteer(CITIES)
+    assert g.resolve("Roma") == ("Rome", "exact")
+    assert g.resolve("rom") == ("Rome", "exact")
+    assert g.resolve("Milan") == ("Milano", "exact")  # the hotels table wins
+    assert g.resolve("nyc") == ("New York", "exact")
+    assert g.resolve("reggio nell emilia") == ("Reggio nell'Emilia", "exact")
+    assert g.resolve("Rome city centre") == ("Rome", "exact")
+
+
+def test_fuzzy_matches_and_misses():
+    g = Gazetteer(CITIES)
+    assert g.resolve("Roem") == ("Rome", "fuzzy")  # transposition
+    assert g.resolve("Nwe Yrok") == ("New York", "fuzzy")
+    assert g.resolve("Milano centrale") == ("Milano", "exact")
+    # "Parms" is one edit from both Paris and Parma
+    assert g.resolve("Parms") == (None, "miss")
+    assert g.resolve("Berlin") == (None, "miss")
+    assert g.resolve("Rim") == (None, "miss")  # short names need an exact hit
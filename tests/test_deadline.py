@@ -0,0 +1,11 @@
+from app.utils.deadline import REQUEST_DEADLINE_MIN_SECONDS, budget
+
+
+def test_client_budget_is_clamped_never_removed():
+    assert budget(None, 25) == 25
+    assert budget("5", 25) == 5
+    assert budget("60", 25) == 25  # never longer
+    for asked in ("0", "-3", "0.0001"):
+        assert budget(asked, 25) == REQUEST_DEADLINE_MIN_SECONDS
+    for asked in ("nan", "inf", "-inf", "soon"):
+        assert budget(asked, 25) == 25
@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.rag import embed_cache
+from app.rag.embed_cache import EmbeddingCache
+
+
+class _Redis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def _cache(monkeypatch, redis_on=True):
+    monkeypatch.setattr(embed_cache, "EMBED_CACHE_REDIS", redis_on)
+    c = EmbeddingCache("test-model", size=2)
+    c._redis = _Redis()
+    return c
+
+
+def test_local_and_redis_tiers(monkeypatch):
+    c = _cache(monkeypatch)
+    assert c.get("Is breakfast included?") is None
+    c.put("Is breakfast  included?", [0.5, -1.0])
+    assert c.get("Is breakfast included?") == [0.5, -1.0]  # local, same text
+
+    c.clear_local()
+    assert c.get("Is breakfast included?") == [0.5, -1.0]  # from Redis
+    assert c.get("is breakfast included?") is None  # different case, no hit
+
+
+def test_float16_round_trip_and_lru_bound(monkeypatch):
+    c = _cache(monkeypatch)
+    vec = np.random.default_rng(0).standard_normal(64).astype(np.float32).tolist()
+    c.put("q", vec)
+    c.clear_local()
+    back = c.get("q")
+    assert len(back) == 64 and np.allclose(back, vec, rtol=1e-3, atol=1e-3)
+
+    c = _cache(monkeypatch, redis_on=False)
+    for t in ("a", "b", "c"):
+        c.put(t, [1.0])
+    assert c.get("a") is None and c.get("c") == [1.0]
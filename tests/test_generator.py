@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+import httpx
+
+from app.graph import nodes_generator
+from app.graph.state import GraphState
+from app.llm.client import LLMClient, set_llm_client
+from app.utils.deadline import deadline
+
+HITS = [{"question": "Parking?", "answer": "Parking is free.", "meta": {"lang": "en"}}]
+
+
+def test_stream_timing_out_midway_keeps_the_streamed_tokens(monkeypatch):
+    async def body():
+        for t in ("Il parcheggio ", "è "):
+            yield f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n".encode()
+        await asyncio.sleep(5)  # the model stalls
+        yield b"data: [DONE]\n\n"
+
+    set_llm_client(
+        LLMClient(
+            transport=httpx.MockTransport(lambda r: httpx.Response(200, content=body()))
+        )
+    )
+    sent = []
+    monkeypatch.setattr(nodes_generator, "get_stream_writer", lambda: sent.append)
+    monkeypatch.setattr(nodes_generator, "GENERATOR_MIN_SECONDS", 0.0)
+
+    async def run():
+        with deadline(0.3):
+            state = GraphState(user_text="c'è parcheggio?", lang="it", stream=True)
+            state.citations = HITS
+            return await nodes_generator.generator_node(state)
+
+    try:
+        state = asyncio.run(run())
+    finally:
+        set_llm_client(None)
+    assert [s["token"] for s in sent] == ["Il parcheggio ", "è "]
+    assert state.reply == "Il parcheggio è"
+    assert state.degraded == ["llm_deadline"]
@@ -0,0 +1,158 @@
+import asyncio
+
+import numpy as np
+
+from app.graph import intents, nodes_faq, nodes_generator, router
+from app.graph.state import GraphState
+from app.rag import retriever
+
+AXES = {"rooms": [1.0, 0.0, 0.0], "faq": [0.0, 1.0, 0.0], "unknown": [0.0, 0.0, 1.0]}
+
+# what the stub embedder returns for each user question
+TEXTS = {
+    "c'è la piscina?": [0.1, 0.9, 0.1],
+    "Quali sono gli orari di check-in?": [0.0, 0.95, 0.05],
+    "qualcosa di vago": [0.3, 0.3, 0.3],
+}
+
+
+class _Embedder:
+    """Stub for rag/embed.py: example utterances sit on their intent's axis."""
+
+    def __init__(self):
+        self.queries = 0
+        self.axis = {
+            e: AXES[k] for k, exs in intents.INTENT_EXAMPLES.items() for e in exs
+        }
+
+    async def aembed_query(self, text):
+        self.queries += 1
+        return TEXTS[text]
+
+    async def aembed_texts(self, texts):
+        return [self.axis[t] for t in texts]
+
+
+def _setup(monkeypatch):
+    emb = _Embedder()
+    monkeypatch.setattr(intents, "aembed_query", emb.aembed_query)
+    monkeypatch.setattr(intents, "aembed_texts", emb.aembed_texts)
+    monkeypatch.setattr(intents, "_CENTROIDS", {})
+    monkeypatch.setattr(router, "INTENT_CENTROIDS_ON", True)
+    return emb
+
+
+def test_classify_picks_the_nearest_centroid(monkeypatch):
+    emb = _setup(monkeypatch)
+    centroids = asyncio.run(intents.acentroids())
+    labels, m = centroids
+    assert labels == ["rooms", "faq", "unknown"]
+    assert np.allclose(np.linalg.norm(m, axis=1), 1.0)
+
+    assert intents.classify([0.9, 0.1, 0.0], centroids)[0] == "rooms"
+    assert intents.classify([0.1, 0.9, 0.1], centroids)[0] == "faq"
+    assert intents.classify([0.0, 0.2, 0.8], centroids)[0] == "unknown"
+    assert emb.queries == 0
+
+
+def test_below_min_sim_stays_unknown(monkeypatch):
+    _setup(monkeypatch)
+    centroids = asyncio.run(intents.acentroids())
+    label, score = intents.classify([0.3, 0.4, 0.0], centroids)
+    assert (label, round(score, 2)) == ("faq", 0.4)
+
+    monkeypatch.setattr(intents, "INTENT_MIN_SIM", 0.5)
+    assert intents.classify([0.3, 0.4, 0.0], centroids) == ("unknown", score)
+
+
+def test_router_falls_back_to_the_centroids(monkeypatch):
+    emb = _setup(monkeypatch)
+
+    state = asyncio.run(
+        router.router_node(GraphState(user_text="c'è la piscina?", lang="it"))
+    )
+    assert state.intent == "faq"
+    assert state.query_vec == TEXTS["c'è la piscina?"]
+
+    state = asyncio.run(
+        router.router_node(GraphState(user_text="qualcosa di vago", lang="it"))
+    )
+    assert state.intent == "unknown"  # 0.3 to every centroid: below INTENT_MIN_SIM
+    assert emb.queries == 2
+
+
+def test_italian_check_in_question_routes_to_faq(monkeypatch):
+    _setup(monkeypatch)
+    text = "Quali sono gli orari di check-in?"
+    state = asyncio.run(router.router_node(GraphState(user_text=text, lang="it")))
+    assert state.intent == "faq"
+    assert state.query_vec == TEXTS[text]  # embedded for the FAQ path
+
+
+def test_centroids_off_routes_on_keywords_only(monkeypatch):
+    emb = _setup(monkeypatch)
+    monkeypatch.setattr(router, "INTENT_CENTROIDS_ON", False)
+
+    state = asyncio.run(
+        router.router_node(GraphState(user_text="c'è la piscina?", lang="it"))
+    )
+    assert state.intent == "unknown"
+    assert state.query_vec is None
+    assert emb.queries == 0
+    assert intents._CENTROIDS == {}
+
+
+class _Cache:
+    def __init__(self):
+        self.vecs = []
+
+    def get(self, vec, lang, city, version):
+        self.vecs.append(vec)
+        return None
+
+    def put(self, vec, lang, city, version, reply, hits):
+        self.vecs.append(vec)
+
+
+def test_one_embedding_per_turn(monkeypatch):
+    emb = _setup(monkeypatch)
+    cache, searched = _Cache(), []
+
+    async def embed_again(text):
+        raise AssertionError("query embedded twice")
+
+    async def version(name):
+        return "1"
+
+    async def dense(vec, tiers, n, category, version):
+        searched.append(vec)
+        hit = {"question": "q", "answer": "a", "score": 1.0, "meta": {"id": 1}}
+        return [[hit] for _ in tiers]
+
+    async def rerank(query, hits, topk):
+        return hits[:topk]
+
+    monkeypatch.setattr(retriever, "aembed_query", embed_again)
+    monkeypatch.setattr(nodes_generator, "aembed_query", embed_again)
+    monkeypatch.setattr(retriever, "HYBRID_ON", False)
+    monkeypatch.setattr(retriever, "aget_version", version)
+    monkeypatch.setattr(retriever, "_adense_tiers", dense)
+    monkeypatch.setattr(retriever, "arerank", rerank)
+    for mod in (nodes_faq, nodes_generator):
+        monkeypatch.setattr(mod, "get_answer_cache", lambda: cache)
+        monkeypatch.setattr(mod, "aget_version", version)
+    monkeypatch.setattr(nodes_faq, "ANSWER_CACHE_ON", True)
+
+    async def turn():
+        state = GraphState(user_text="c'è la piscina?", lang="it")
+        state = await router.router_node(state)
+        state = await nodes_faq.faq_node(state)
+        state.reply = "Sì."
+        await nodes_generator._remember(state, state.user_text, "it", state.citations)
+        return state
+
+    state = asyncio.run(turn())
+    assert state.intent == "faq" and state.answer == "a"
+    assert emb.queries == 1
+    vec = TEXTS["c'è la piscina?"]
+    assert searched == [vec] and cache.vecs == [vec, vec]
@@ -0,0 +1,23 @@
+from app.scripts.bench_lang import SAMPLES
+from app.utils import lang
+from app.utils.lang import detect_lang
+
+
+def test_accuracy_on_short_faq_language_messages():
+    wrong = [(want, text) for want, text in SAMPLES if detect_lang(text) != want]
+    assert len(wrong) <= len(SAMPLES) // 20, wrong
+
+
+def test_sticky_language_for_undecided_short_messages():
+    assert detect_lang("ok", sticky="it") == "it"
+    assert detect_lang("ok") == "en"
+    # a clear signal still switches language
+    assert detect_lang("Avez-vous un parking ?", sticky="it") == "fr"
+
+
+def test_results_are_cached_on_normalized_text():
+    lang._heuristic.cache_clear()
+    detect_lang("Is breakfast included?")
+    detect_lang("  is BREAKFAST   included? ")
+    info = lang._heuristic.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
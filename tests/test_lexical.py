@@ -0,0 +1,26 @@
+from app.rag import lexical
+
+ROWS = [
+    {"id": "1", "question": "Is breakfast included?", "answer": "Yes, 7-10."},
+    {"id": "2", "question": "Is there parking?", "answer": "Yes, 20 EUR."},
+]
+
+
+def test_a_broken_index_file_keeps_the_old_index_and_retries(tmp_path, monkeypatch):
+    path = tmp_path / "lexical.json"
+    monkeypatch.setattr(lexical, "FAQ_LEXICAL_PATH", str(path))
+    monkeypatch.setattr(lexical, "_INDEX", None)
+    monkeypatch.setattr(lexical, "_INDEX_VERSION", None)
+
+    assert lexical.get_lexical_index("1") is None  # not built yet
+    lexical.build_lexical_index(ROWS, str(path))
+    old = lexical.get_lexical_index("2")
+    assert old is not None and old.row(0)["id"] == "1"
+
+    path.write_text('{"vocab": ["brea')  # partial write after a version bump
+    assert lexical.get_lexical_index("3") is old
+    assert lexical._INDEX_VERSION == "2"  # not marked current: retried
+
+    lexical.build_lexical_index(ROWS[1:], str(path))
+    new = lexical.get_lexical_index("3")
+    assert new is not old and new.row(0)["id"] == "2"
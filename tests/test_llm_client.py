@@ -0,0 +1,117 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.llm.client import LLMClient
+from app.utils.deadline import DeadlineExceeded, deadline
+
+
+def _reply(text):
+    return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+
+
+def test_retries_connection_errors_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        if len(calls) < 3:
+            raise httpx.ConnectError("refused", request=request)
+        return _reply(" ciao ")
+
+    cli = LLMClient(retries=2, transport=httpx.MockTransport(handler))
+    out = asyncio.run(cli.chat([{"role": "user", "content": "hi"}]))
+    assert out == "ciao"
+    assert len(calls) == 3
+    assert calls[0]["keep_alive"] == cli.keep_alive
+
+
+def test_does_not_retry_server_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    cli = LLMClient(retries=2, transport=httpx.MockTransport(handler))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(cli.chat([{"role": "user", "content": "hi"}]))
+    assert len(calls) == 1
+
+
+def test_stream_yields_deltas():
+    body = "".join(
+        f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n"
+        for t in ("Bon", "jour")
+    )
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, text=body + "data: [DONE]\n\n")
+    )
+    cli = LLMClient(transport=transport)
+
+    async def collect():
+        return [t async for t in cli.stream([{"role": "user", "content": "hi"}])]
+
+    assert asyncio.run(collect()) == ["Bon", "jour"]
+
+
+def test_expired_deadline_skips_the_call():
+    calls = []
+    transport = httpx.MockTransport(lambda request: calls.append(1) or _reply("x"))
+    cli = LLMClient(transport=transport)
+
+    async def run():
+        with deadline(0.01):
+            await asyncio.sleep(0.02)
+            await cli.chat([{"role": "user", "content": "hi"}])
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert calls == []
+
+
+def _sse(*tokens):
+    return "".join(
+        f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n"
+        for t in tokens
+    ).encode()
+
+
+def test_slow_stream_stops_at_the_deadline():
+    async def body():
+        yield _sse("Bon")
+        await asyncio.sleep(5)  # the model stalls mid-answer
+        yield _sse("jour")
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    cli = LLMClient(transport=transport)
+    got = []
+
+    async def run():
+        with deadline(0.2):
+            async for tok in cli.stream([{"role": "user", "content": "hi"}]):
+                got.append(tok)
+
+    t0 = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert got == ["Bon"]
+    assert time.perf_counter() - t0 < 1.0
+
+
+def test_slow_reply_raises_deadline_exceeded():
+    async def handler(request):
+        await asyncio.sleep(5)
+        return _reply("late")
+
+    cli = LLMClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        with deadline(0.1):
+            await cli.chat([{"role": "user", "content": "hi"}])
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
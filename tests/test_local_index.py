@@ -0,0 +1,59 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+
+from app.rag import local_index
+from app.rag.build_local_index import publish
+from app.rag.local_index import LocalIndex
+
+PAYLOAD = {
+    "id": ["a", "b", "c"],
+    "question": ["parking?", "breakfast?", "wifi?"],
+    "city": ["Rome", "Rome", "Paris"],
+    "lang": ["en", "it", "en"],
+}
+
+
+def _write(path, dtype="float32"):
+    os.makedirs(path)
+    np.save(os.path.join(path, "vectors.npy"), np.eye(3, 4, dtype=dtype))
+    with open(os.path.join(path, "payload.json"), "w") as f:
+        json.dump(PAYLOAD, f)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"model": "m", "dim": 4, "dtype": dtype, "count": 3}, f)
+
+
+def test_search_filters_and_float16(tmp_path):
+    for dtype in ("float32", "float16"):
+        _write(str(tmp_path / dtype), dtype)
+        idx = LocalIndex.load(str(tmp_path / dtype))
+        hits = idx.search([0.1, 1.0, 0.0, 0.0], topk=2)
+        assert [p["id"] for p, _ in hits] == ["b", "a"]
+        assert hits[0][1] == np.float32(1.0)
+        hits = idx.search([0.1, 1.0, 0.0, 0.0], city="Rome", lang="en")
+        assert [p["id"] for p, _ in hits] == ["a"]
+        assert idx.search([1.0, 0, 0, 0], city="Berlin") == []
+
+
+def test_publish_swaps_a_symlink_and_keeps_recent_versions(tmp_path, monkeypatch):
+    out = str(tmp_path / "faq_local")
+    _write(out)  # pre-symlink layout
+    targets = []
+    for _ in range(3):
+        _write(out + ".tmp")
+        targets.append(publish(out + ".tmp", out))
+        assert os.path.islink(out)
+        assert os.path.realpath(out) == os.path.realpath(targets[-1])
+        assert LocalIndex.load(out).count == 3
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["faq_local"] + [os.path.basename(t) for t in targets[-2:]]
+    )
+
+    # the async getter reloads only when the version moves
+    monkeypatch.setattr(local_index, "FAQ_LOCAL_DIR", out)
+    monkeypatch.setattr(local_index, "_INDEX", None)
+    first = asyncio.run(local_index.aget_local_index("1"))
+    assert asyncio.run(local_index.aget_local_index("1")) is first
+    assert asyncio.run(local_index.aget_local_index("2")) is not first
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+from fakeredis import aioredis as fake_aioredis
+
+from app.utils import memory
+
+
+def test_legacy_slots_migrate_into_the_hash():
+    r = fake_aioredis.FakeRedis(decode_responses=True)
+
+    async def run():
+        legacy = json.dumps({"city": "Rome", "budget": 90})
+        await r.set(memory.session_key("s1"), legacy)
+        # a newer turn already wrote a partial update to the hash
+        await r.hset(memory.slots_key("s1"), mapping={"budget": json.dumps(150)})
+        slots, _ = await memory.aload_session("s1", r)
+        fields = await r.hgetall(memory.slots_key("s1"))
+        return slots, fields, await r.exists(memory.session_key("s1"))
+
+    slots, fields, legacy_left = asyncio.run(run())
+    assert slots["city"] == "Rome" and slots["budget"] == 150
+    assert not legacy_left
+    assert memory._parse_hash(fields) == slots
+
+
+def test_compaction_keeps_turns_saved_while_it_summarized(monkeypatch):
+    r = fake_aioredis.FakeRedis(decode_responses=True)
+    full = memory.HIST_MAX_TURNS * 2
+
+    async def summarize(summary, old):
+        # a turn lands meanwhile; the history cap trims two summarized messages
+        new = [{"role": "user", "content": "n0"}, {"role": "user", "content": "n1"}]
+        await memory.asave_turn("s1", {}, new, r)
+        return "summary"
+
+    monkeypatch.setattr(memory, "HIST_SUMMARY_ON", False)
+    monkeypatch.setattr(memory, "_summarize", summarize)
+
+    async def run():
+        msgs = [{"role": "user", "content": f"m{i}"} for i in range(full)]
+        await memory.asave_turn("s1", {}, msgs, r)
+        await memory.acompact("s1", r)
+        return (
+            await r.lrange(memory.history_key("s1"), 0, -1),
+            await r.get(memory.summary_key("s1")),
+        )
+
+    raw, summary = asyncio.run(run())
+    recent = [f"m{i}" for i in range(full - memory.HIST_KEEP_RECENT, full)]
+    assert [json.loads(x)["content"] for x in reversed(raw)] == recent + ["n0", "n1"]
+    assert summary == "summary"
+
+
+class _AppendAfterWatch:
+    """Client proxy: saves a turn right after compaction's watched read."""
+
+    def __init__(self, r, turn):
+        self.r, self.turn, self.reads = r, turn, 0
+
+    def pipeline(self, transaction=True):
+        p = self.r.pipeline(transaction=transaction)
+        return _WatchedPipeline(p, self) if transaction else p
+
+
+class _WatchedPipeline:
+    def __init__(self, p, proxy):
+        self.p, self.proxy = p, proxy
+
+    async def __aenter__(self):
+        await self.p.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self.p.__aexit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self.p, name)
+
+    async def lrange(self, *args):
+        res = await self.p.lrange(*args)  # immediate: the pipeline is watching
+        self.proxy.reads += 1
+        if self.proxy.reads == 1:
+            # between WATCH and EXEC, on another connection
+            await memory.asave_turn("s1", {}, self.proxy.turn, self.proxy.r)
+        return res
+
+
+def test_compaction_retries_when_a_turn_lands_between_watch_and_exec(monkeypatch):
+    r = fake_aioredis.FakeRedis(decode_responses=True)
+    full = memory.HIST_MAX_TURNS * 2
+    new = [{"role": "user", "content": "n0"}, {"role": "assistant", "content": "n1"}]
+    proxy = _AppendAfterWatch(r, new)
+
+    async def summarize(summary, old):
+        return "summary"
+
+    monkeypatch.setattr(memory, "HIST_SUMMARY_ON", False)
+    monkeypatch.setattr(memory, "_summarize", summarize)
+
+    async def run():
+        msgs = [{"role": "user", "content": f"m{i}"} for i in range(full)]
+        await memory.asave_turn("s1", {}, msgs, r)
+        await memory.acompact("s1", proxy)
+        return await memory.aget_history("s1")
+
+    monkeypatch.setattr(memory, "_aclient", lambda: r)
+    history = asyncio.run(run())
+
+    assert proxy.reads == 2  # the first EXEC was aborted and retried
+    recent = [f"m{i}" for i in range(full - memory.HIST_KEEP_RECENT, full)]
+    assert history[0] == {
+        "role": "system",
+        "content": memory.SUMMARY_PREFIX + "summary",
+    }
+    assert [m["content"] for m in history[1:]] == recent + ["n0", "n1"]
@@ -0,0 +1,58 @@
+import random
+import time
+
+from app.scripts.bench_pii import cases
+from app.utils.pii import StreamScrubber, redact, scrub_out
+
+
+def test_redact_masks_each_kind_in_one_pass():
+    text = "Mail jane.doe@example.com, card 4111-1111-1111-1111, tel 06 1234 5678."
+    assert redact(text) == ("Mail [EMAIL], card [CARD], tel [PHONE].", True)
+    assert redact("Room for 2 in Paris, budget 150") == (
+        "Room for 2 in Paris, budget 150",
+        False,
+    )
+    assert redact("") == ("", False)
+    assert scrub_out("card 4111111111111111") == "card [CARD]"
+
+
+def test_cards_with_separator_runs_are_masked():
+    for card in ("4111  1111  1111  1111", "4111 - 1111 - 1111 - 1111"):
+        assert redact(f"my card: {card}.") == ("my card: [CARD].", True)
+    # a separator run longer than three is not one card
+    assert redact("4111    1111    1111    1111")[1] is False
+
+
+def test_adversarial_inputs_stay_linear():
+    for name, text in cases(50_000).items():
+        t0 = time.perf_counter()
+        redact(text)
+        assert time.perf_counter() - t0 < 0.5, name
+
+
+def test_stream_scrubber_matches_scrub_out_for_any_chunking():
+    rng = random.Random(0)
+    texts = [
+        "Write to jane.doe@example.com or call (06) 1234 5678 today!",
+        "Card 4111 1111 1111 1111, ref 1234567. Room 12, 2 nights.",
+        "Cards 4111  1111  1111  1111 and 4111 - 1111 - 1111 - 1111  ok  then.",
+        "x" * 50 + "@mail.example.org\n+33 612 345 678 and 4111-1111-1111-1111",
+        "Prix: 150€ pour 2 adultes – tél 0612345678, ça va?",
+    ]
+    for text in texts:
+        want = scrub_out(text)
+        for _ in range(200):
+            s, out, i = StreamScrubber(), [], 0
+            while i < len(text):
+                n = rng.randint(1, 8)
+                out.append(s.feed(text[i : i + n]))
+                i += n
+            out.append(s.flush())
+            assert "".join(out) == want
+
+
+def test_stream_scrubber_holds_back_only_the_open_tail():
+    s = StreamScrubber()
+    assert s.feed("Call me at 06 12") == "Call me at "
+    assert s.feed("34 5678, thanks") == "[PHONE], "
+    assert s.flush() == "thanks"
@@ -0,0 +1,77 @@
+import asyncio
+import sys
+
+import pytest
+
+from app.graph import nodes_generator
+from app.graph.state import GraphState
+from app.llm import prompt
+from app.llm.prompt import build_messages, count_tokens
+
+
+@pytest.fixture(autouse=True)
+def _estimated_tokens(monkeypatch):
+    # no tokenizer: ~4 characters per token
+    monkeypatch.setattr(prompt, "LLM_TOKENIZER", "")
+    prompt._tokenizer.cache_clear()
+    count_tokens.cache_clear()
+    yield
+    prompt._tokenizer.cache_clear()
+    count_tokens.cache_clear()
+
+
+def _history(n):
+    roles = ("user", "assistant")
+    return [
+        {"role": roles[i % 2], "content": f"turn {i:02d} " + "x" * 31} for i in range(n)
+    ]
+
+
+def test_system_prompt_first_and_identical_across_calls():
+    a = build_messages("You are a hotel assistant.", "hi", _history(3))
+    b = build_messages("You are a hotel assistant.", "parking?", _history(7))
+    assert a[0] == b[0] == {"role": "system", "content": "You are a hotel assistant."}
+    assert a[-1] == {"role": "user", "content": "hi"}
+
+
+def test_newest_turns_are_kept_until_the_budget_runs_out():
+    history = _history(10)  # 40 chars = 10 tokens each
+    # system + prompt = 2 tokens; room for three turns, not four
+    msgs = build_messages("sys.", "ask?", history, budget=2 + 35)
+    assert msgs[1:-1] == history[-3:]  # newest three, oldest-first
+    assert build_messages("sys.", "ask?", history, budget=2)[1:-1] == []
+
+
+def test_long_turns_are_clipped(monkeypatch):
+    monkeypatch.setattr(prompt, "PROMPT_HISTORY_MSG_TOKENS", 20)
+    long = {"role": "user", "content": "y" * 2000}
+    summary = {"role": "system", "content": "s" * 400}  # rolling summary: as is
+    msgs = build_messages("sys", "q", [summary, long])
+    assert msgs[1] == summary
+    assert msgs[2]["content"].endswith("…") and count_tokens(msgs[2]["content"]) <= 21
+
+
+def test_estimate_when_transformers_is_missing(monkeypatch):
+    monkeypatch.setattr(prompt, "LLM_TOKENIZER", "some/model")
+    monkeypatch.setitem(sys.modules, "transformers", None)  # import fails
+    assert prompt._tokenizer() is None
+    assert count_tokens("abcdefgh") == 2 and count_tokens("abcdefghi") == 3
+
+
+def test_translate_prompts_carry_no_history(monkeypatch):
+    sent = []
+
+    async def achat(msgs):
+        sent.append(msgs)
+        return "Il parcheggio è gratuito."
+
+    monkeypatch.setattr(nodes_generator, "achat", achat)
+    monkeypatch.setattr(nodes_generator, "ANSWER_CACHE_ON", False)
+    state = GraphState(user_text="c'è parcheggio?", lang="it", history=_history(4))
+    state.citations = [
+        {"question": "Parking?", "answer": "Parking is free.", "meta": {"lang": "en"}}
+    ]
+    asyncio.run(nodes_generator.generator_node(state))
+
+    assert [m["role"] for m in sent[0]] == ["system", "user"]
+    assert sent[0][0]["content"] == nodes_generator.SYSTEM
@@ -0,0 +1,58 @@
+from prometheus_client import REGISTRY
+
+from app.rag import reranker
+
+
+def _doc(q, score, coll="faqs"):
+    return {"question": q, "answer": "", "score": score, "meta": {"collection": coll}}
+
+
+def _runs(path):
+    return REGISTRY.get_sample_value("rerank_runs_total", {"path": path}) or 0.0
+
+
+class _Cross:
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs):
+        self.pairs.extend(pairs)
+        return [float(len(d)) for _, d in pairs]  # longer text scores higher
+
+
+def test_margin_skip_only_for_pure_dense_lists(monkeypatch):
+    monkeypatch.setattr(reranker, "_CROSS", None)
+    clear = [_doc("a", 0.9), _doc("bb", 0.5)]
+    before = _runs("margin")
+    assert reranker.rerank("q", clear, topk=1) == clear[:1]
+    assert _runs("margin") == before + 1
+
+    # a BM25 hit in the list (fused) never takes the margin shortcut
+    mixed = [_doc("a", 0.9), _doc("bb", 0.5), _doc("ccc", 7.0, "lexical")]
+    before = _runs("cheap")
+    reranker.rerank("q", mixed, topk=1)
+    assert _runs("cheap") == before + 1
+
+
+def test_cross_encoder_scores_are_cached(monkeypatch):
+    cross = _Cross()
+    monkeypatch.setattr(reranker, "_CROSS", cross)
+    monkeypatch.setattr(reranker, "_predict", lambda pairs: cross.predict(pairs))
+    reranker._SCORES.clear()
+    docs = [_doc("a", 0.80), _doc("bbb", 0.79), _doc("cc", 3.0, "lexical")]
+
+    before = (_runs("cross"), _runs("cached"))
+    first = reranker.rerank("q", docs, topk=2)
+    again = reranker.rerank("q", docs, topk=2)
+    assert (
+        [d["question"] for d in first]
+        == ["bbb", "cc"]
+        == [d["question"] for d in again]
+    )
+    assert len(cross.pairs) == 3  # the second call scored nothing
+    assert (_runs("cross"), _runs("cached")) == (before[0] + 1, before[1] + 1)
+
+    # an edited answer is a different cache key
+    docs[0]["answer"] = "now much longer than before"
+    assert reranker.rerank("q", docs, topk=1)[0]["question"] == "a"
+    assert len(cross.pairs) == 4
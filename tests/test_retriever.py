@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.rag import retriever
+
+
+class _Qdrant:
+    """Collection metadata calls of a Qdrant client, counted."""
+
+    made = 0
+
+    def __init__(self, **kw):
+        _Qdrant.made += 1
+        self.lookups = 0
+
+    def collection_exists(self, name):
+        self.lookups += 1
+        return name == "faqs_v1"
+
+    def get_collection(self, name):
+        params = SimpleNamespace(vectors=SimpleNamespace(size=4))
+        return SimpleNamespace(config=SimpleNamespace(params=params))
+
+
+class _AQdrant(_Qdrant):
+    async def collection_exists(self, name):
+        return super().collection_exists(name)
+
+    async def get_collection(self, name):
+        return super().get_collection(name)
+
+
+def _setup(monkeypatch):
+    state = SimpleNamespace(version="1", now=0.0)
+    monkeypatch.setattr(retriever, "QdrantClient", _Qdrant)
+    monkeypatch.setattr(retriever, "AsyncQdrantClient", _AQdrant)
+    monkeypatch.setattr(retriever, "_CLIENT", None)
+    monkeypatch.setattr(retriever, "_ACLIENT", None)
+    monkeypatch.setattr(retriever, "_RESOLVED", {})
+    monkeypatch.setattr(retriever, "_embed_dim", lambda: 4)
+    monkeypatch.setattr(retriever, "get_version", lambda name: state.version)
+    monkeypatch.setattr(retriever, "time", SimpleNamespace(monotonic=lambda: state.now))
+    _Qdrant.made = 0
+    return state
+
+
+def test_collection_is_resolved_once_per_version_and_ttl(monkeypatch):
+    state = _setup(monkeypatch)
+
+    assert retriever.resolve_collection() == "faqs_v1"
+    lookups = retriever._client().lookups
+    for _ in range(3):
+        assert retriever.resolve_collection() == "faqs_v1"
+    assert retriever._client().lookups == lookups  # cached: no Qdrant calls
+    assert _Qdrant.made == 1  # one client per process
+
+    state.version = "2"  # reindex
+    retriever.resolve_collection()
+    assert retriever._client().lookups == 2 * lookups
+
+    state.now += retriever.RESOLVE_TTL_SECONDS  # TTL expiry, same version
+    retriever.resolve_collection()
+    assert retriever._client().lookups == 3 * lookups
+
+
+def test_async_resolution_shares_the_cache(monkeypatch):
+    state = _setup(monkeypatch)
+
+    async def aget_version(name):
+        return state.version
+
+    monkeypatch.setattr(retriever, "aget_version", aget_version)
+
+    async def run():
+        first = await retriever.aresolve_collection()
+        lookups = retriever._aclient().lookups
+        await retriever.aresolve_collection()
+        return first, lookups, retriever._aclient().lookups
+
+    first, before, after = asyncio.run(run())
+    assert first == "faqs_v1" and before == after
+    assert retriever.resolve_collection() == "faqs_v1"
+    assert retriever._CLIENT is None  # the sync path reused the async result
+    assert _Qdrant.made == 1
+
+
+class _Batch:
+    """query_batch_points of a Qdrant client: one canned response per request."""
+
+    def __init__(self, per_tier):
+        self.per_tier, self.calls = per_tier, []
+
+    def query_batch_points(self, collection_name, requests):
+        self.calls.append(requests)
+        return [SimpleNamespace(points=pts) for pts in self.per_tier[: len(requests)]]
+
+
+def _point(doc_id, question):
+    return SimpleNamespace(id=doc_id, score=0.9, payload={"question": question})
+
+
+def _must(request):
+    conds = request.filter.must if request.filter else []
+    return {c.key: c.match.value for c in conds}
+
+
+def test_filter_tiers_go_out_in_one_batch_and_the_first_hit_wins(monkeypatch):
+    cli = _Batch([[], [_point(1, "Lang only")], [_point(2, "No filter")]])
+    monkeypatch.setattr(retriever, "BACKEND", "QDRANT")
+    monkeypatch.setattr(retriever, "HYBRID_ON", False)
+    monkeypatch.setattr(retriever, "_client", lambda: cli)
+    monkeypatch.setattr(retriever, "resolve_collection", lambda: "faqs_v1")
+    monkeypatch.setattr(retriever, "get_version", lambda name: "1")
+
+    tiers = [
+        {"city": "Rome", "lang": "IT"},
+        {"city": None, "lang": "it"},
+        {"city": None, "lang": None},
+    ]
+    hits = retriever.retrieve_tiered(
+        "colazione?", tiers, topk=3, use_rerank=False, vec=[0.1] * 4
+    )
+
+    assert len(cli.calls) == 1  # all relaxations in one request
+    assert [_must(r) for r in cli.calls[0]] == [
+        {"city": "Rome", "lang": "it"},
+        {"lang": "it"},
+        {},
+    ]
+    assert [h["question"] for h in hits] == ["Lang only"]
+
+    # nothing anywhere: empty, still one call
+    cli.per_tier, cli.calls = [[], [], []], []
+    assert retriever.retrieve_tiered("x", tiers, use_rerank=False, vec=[0.1]) == []
+    assert len(cli.calls) == 1
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+from app.rag.retriever import _fuse, _payload_hit, _to_hits
+
+
+def _lex(doc_id, question):
+    return _payload_hit({"id": doc_id, "question": question}, 3.0, "lexical")
+
+
+def test_overlapping_dense_and_lexical_hits_fuse_once():
+    # reindex_faqs.py collections: FAQ id only in the Qdrant point id
+    points = [
+        SimpleNamespace(id=7, score=0.9, payload={"question": "Parking?"}),
+        SimpleNamespace(id=3, score=0.8, payload={"question": "Breakfast?"}),
+    ]
+    dense = _to_hits(points, "faqs")
+    lexical = [_lex("3", "Breakfast?"), _lex("9", "Pets?"), _lex("7", "Parking?")]
+
+    fused = _fuse(dense, lexical)
+    ids = [str(h["meta"]["id"]) for h in fused]
+    assert sorted(ids) == ["3", "7", "9"]  # no duplicates
+    assert ids[:2] == ["3", "7"]  # found by both rankings
+    assert fused[0]["meta"]["collection"] == "faqs"  # dense payload wins
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from app.graph import cities, nodes_rooms
+from app.graph.state import GraphState
+
+
+class _Repo:
+    def __init__(self):
+        self.calls = 0
+        self.delay = 0.0
+        self.kw = []
+
+    def search(self, **kw):
+        self.calls += 1
+        self.kw.append(kw)
+        time.sleep(self.delay)
+        return [{"price": 100 + self.calls}]
+
+
+def _search(repo, deadline_in=None):
+    state = GraphState(user_text="rooms")
+    state.deadline_at = None if deadline_in is None else time.monotonic() + deadline_in
+    kw = dict(city="Rome", max_price=None, occupancy=2, topk=5)
+    return asyncio.run(nodes_rooms._search(state, **kw)), state.degraded
+
+
+def test_cache_is_only_used_under_time_pressure(monkeypatch):
+    repo = _Repo()
+    monkeypatch.setattr(nodes_rooms, "repo", repo)
+    nodes_rooms._cache.clear()
+
+    assert _search(repo) == ([{"price": 101}], [])
+    # plenty of time: fresh prices from the repo, not the cached ones
+    assert _search(repo, deadline_in=10) == ([{"price": 102}], [])
+    # almost out of time: the cached result, no query
+    assert _search(repo, deadline_in=0.1) == ([{"price": 102}], ["rooms_cached"])
+    assert repo.calls == 2
+
+    # a query that outlives the deadline falls back to the cache
+    deadline_in = nodes_rooms.ROOMS_MIN_SECONDS + 0.1
+    repo.delay = deadline_in + 0.2
+    assert _search(repo, deadline_in) == ([{"price": 102}], ["rooms_timeout"])
+
+
+def test_only_gazetteer_cities_use_the_exact_match(monkeypatch):
+    repo = _Repo()
+    monkeypatch.setattr(nodes_rooms, "repo", repo)
+    monkeypatch.setattr(cities, "_current", cities.Gazetteer(["Rome"]))
+    nodes_rooms._cache.clear()
+
+    _search(repo)  # city="Rome"
+    monkeypatch.setattr(cities, "_current", None)  # gazetteer off / not loaded
+    nodes_rooms._cache.clear()
+    _search(repo)
+    assert [kw["exact_city"] for kw in repo.kw] == [True, False]
@@ -0,0 +1,52 @@
+from datetime import date
+
+from app.graph.extract import extract
+
+TODAY = date(2025, 3, 1)
+
+
+def test_english_rooms_request_with_dates():
+    ex = extract(
+        "Rooms in New York from 12/05 to 15/05 for 2 people under 150", "en", TODAY
+    )
+    assert (ex.intent, ex.city, ex.budget, ex.occupancy) == (
+        "rooms",
+        "New York",
+        150,
+        2,
+    )
+    assert (ex.check_in, ex.check_out) == ("2025-05-12", "2025-05-15")
+
+
+def test_per_language_tables():
+    ex = extract("Camere a Roma sotto 150 per 2 persone dal 3 al 5 maggio", "it", TODAY)
+    assert (ex.intent, ex.city, ex.budget, ex.occupancy) == ("rooms", "Roma", 150, 2)
+    assert (ex.check_in, ex.check_out) == ("2025-05-03", "2025-05-05")
+
+    ex = extract("Zimmer in Berlin für 2 Personen vom 12. bis 14. Juni", "de", TODAY)
+    assert (ex.city, ex.occupancy) == ("Berlin", 2)
+    assert (ex.check_in, ex.check_out) == ("2025-06-12", "2025-06-14")
+
+
+def test_faq_and_non_values():
+    assert extract("What time is check-in?", "en", TODAY).intent == "faq"
+    ex = extract("a room in the centre for 3 nights", "en", TODAY)
+    assert (ex.intent, ex.city, ex.occupancy) == ("rooms", None, None)
+    # past dates without a year roll over to next year
+    assert extract("check-in 12 January", "en", TODAY).check_in == "2026-01-12"
+
+
+def test_ambiguous_city_markers_and_stop_words():
+    # French/Italian "a" only marks a capitalized city
+    ex = extract("il y a des chambres ?", "fr", TODAY)
+    assert (ex.intent, ex.city) == ("rooms", None)
+    assert extract("Chambres a Paris pour 2 personnes", "fr", TODAY).city == "Paris"
+    assert extract("una camera a due letti", "it", TODAY).city is None
+    # stop words end a city name unless they are part of it
+    assert extract("rooms in The Hague please", "en", TODAY).city == "The Hague"
+    assert extract("Camere a La Spezia", "it", TODAY).city == "La Spezia"
+    assert extract("rooms in Rome near the station", "en", TODAY).city == "Rome"
+
+
+def test_decimal_after_a_month_is_not_a_day():
+    assert extract("rooms in May 150,5", "en", TODAY).check_in is None
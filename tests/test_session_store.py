@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.utils.memory import HIST_MAX_TURNS
+from app.utils.session_store import FakeRedisSessionStore, MemorySessionStore
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _turn(i):
+    return [
+        {"role": "user", "content": f"q{i}"},
+        {"role": "assistant", "content": f"a{i}"},
+    ]
+
+
+@pytest.mark.parametrize("make", [MemorySessionStore, FakeRedisSessionStore])
+def test_store_round_trip_and_history_cap(make):
+    store = make()
+
+    async def run():
+        for i in range(HIST_MAX_TURNS + 3):
+            await store.asave("s1", {"city": "Paris", "budget": None}, _turn(i))
+        await store.asave("s1", {"budget": 120}, [])
+        return await store.aload("s1")
+
+    slots, history = asyncio.run(run())
+    assert slots["city"] == "Paris" and slots["budget"] == 120
+    assert len(history) == HIST_MAX_TURNS * 2
+    assert history[-1] == {"role": "assistant", "content": f"a{HIST_MAX_TURNS + 2}"}
+
+
+def test_memory_store_ttl_and_lru_bound():
+    clock = _Clock()
+    store = MemorySessionStore(max_entries=2, ttl=10, clock=clock)
+
+    async def run():
+        await store.asave("a", {"city": "Rome"}, [])
+        await store.asave("b", {"city": "Nice"}, [])
+        clock.now = 5
+        await store.aload("a")  # refreshes "a" (TTL and LRU position)
+        await store.asave("c", {"city": "Lyon"}, [])  # evicts "b"
+        evicted = (await store.aload("b"))[0]["city"]
+        clock.now = 14
+        kept = (await store.aload("a"))[0]["city"]
+        clock.now = 30
+        expired = (await store.aload("a"))[0]["city"]
+        return evicted, kept, expired
+
+    assert asyncio.run(run()) == (None, "Rome", None)
+    assert len(store) == 1
@@ -0,0 +1,123 @@
+import asyncio
+
+import redis
+
+from app.utils.session_store import (
+    FakeRedisSessionStore,
+    MemorySessionStore,
+    set_session_store,
+)
+from app.utils.write_behind import WriteBehind
+
+
+class _Recording(MemorySessionStore):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    async def asave_many(self, turns, marks=None):
+        self.batches.append(turns)
+        await super().asave_many(turns, marks)
+
+
+def _turn(i):
+    return [
+        {"role": "user", "content": f"q{i}"},
+        {"role": "assistant", "content": f"a{i}"},
+    ]
+
+
+def _contents(history):
+    return [m["content"] for m in history]
+
+
+def test_turns_coalesce_per_session_in_order_and_overlay_reads():
+    store = _Recording()
+    set_session_store(store)
+    w = WriteBehind(flush_ms=10_000)
+
+    async def run():
+        w.enqueue("s1", {"city": "Rome", "budget": None}, _turn(0))
+        w.enqueue("s2", {"city": "Nice"}, _turn(0))
+        w.enqueue("s1", {"budget": 90}, _turn(1))
+        queued = await w.aload("s1")
+        await w.flush()
+        return queued, await store.aload("s1")
+
+    try:
+        queued, stored = asyncio.run(run())
+    finally:
+        set_session_store(None)
+
+    # one store call for both sessions, s1's turns merged in order
+    assert len(store.batches) == 1
+    slots, messages = store.batches[0]["s1"]
+    assert slots == {"city": "Rome", "budget": 90}
+    assert _contents(messages) == ["q0", "a0", "q1", "a1"]
+    # before the flush, reads already saw the queued turns
+    assert queued[0]["city"] == "Rome" and queued[0]["budget"] == 90
+    assert _contents(queued[1]) == ["q0", "a0", "q1", "a1"]
+    assert stored == queued
+
+
+class _Flaky(FakeRedisSessionStore):
+    """fakeredis store whose connection can drop, or lose a write's reply."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = 0  # the next N calls fail before reaching Redis
+        self.lost = 0  # the next N saves land, then fail
+
+    def _check(self):
+        if self.down:
+            self.down -= 1
+            raise redis.ConnectionError("connection refused")
+
+    async def amarks(self, session_ids):
+        self._check()
+        return await super().amarks(session_ids)
+
+    async def asave_many(self, turns, marks=None):
+        self._check()
+        await super().asave_many(turns, marks)
+        if self.lost:
+            self.lost -= 1
+            raise redis.ConnectionError("connection reset")
+
+
+def test_turns_survive_an_outage_and_a_lost_reply_is_not_replayed():
+    store = _Flaky()
+    set_session_store(store)
+    w = WriteBehind(flush_ms=10_000)
+
+    async def run():
+        w.enqueue("s1", {"city": "Rome"}, _turn(0))
+        store.down = 5  # longer than any fixed retry budget
+        for _ in range(5):
+            await w.flush()
+        assert w._failed and w._failures == 5
+        store.lost = 1  # the MULTI runs, its reply never arrives
+        await w.flush()
+        w.enqueue("s1", {}, _turn(1))
+        await w.flush()
+        return await store.aload("s1")
+
+    try:
+        slots, history = asyncio.run(run())
+    finally:
+        set_session_store(None)
+
+    assert slots["city"] == "Rome"
+    assert _contents(history) == ["q0", "a0", "q1", "a1"]
+    assert not w._failed and not w._pending and w._failures == 0
+
+
+def test_pending_sessions_are_bounded():
+    w = WriteBehind(flush_ms=10_000, max_pending=2)
+
+    async def run():
+        for sid in ("s1", "s2", "s3"):
+            w.enqueue(sid, {}, _turn(0))
+
+    asyncio.run(run())
+    assert list(w._pending) == ["s2", "s3"]